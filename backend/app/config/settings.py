@@ -2,7 +2,7 @@ import yaml
 import os
 import platform
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class NetworkConfig(BaseModel):
     ssid: str
@@ -13,24 +13,132 @@ class BackendConfig(BaseModel):
     port: int
     log_level: str
 
+class StreamRendition(BaseModel):
+    width: int = 0 # 0 = native capture width
+    quality: int = 70
+
 class CameraConfig(BaseModel):
     device_path: Optional[str] = None
     device_index: Optional[int] = None
     resolution: List[int] = [720, 480]
     framerate: int = 30
     pixel_format: str = "MJPG"
+    passthrough: bool = False # Forward the device's MJPG bytes without decode/re-encode
     simulation: bool = True
     allow_real: bool = False
+    stream_max_fps: int = 30 # Per-client cap; clients may request less via ?fps=
+    max_viewers: int = 4 # Concurrent stream clients before returning 503
+    ring_size: int = 16 # Frames of history kept per camera
+    encoder: str = "opencv" # "opencv" | "turbojpeg" (needs PyTurboJPEG + libturbojpeg)
+    encoder_workers: int = 0 # Opt-in cap: N dedicated encode threads per camera; 0 encodes on the caller's thread
+    capture_process: bool = False # Capture in a child process (own GIL), frames handed over in shared memory
+    # With no stream viewers or recorder: "keepalive" captures at idle_fps with the device kept open,
+    # "release" closes the device (and stops simulating), "off" always captures at full rate
+    idle_mode: str = "keepalive"
+    idle_fps: float = 1.0
+    idle_after_seconds: float = 10.0 # Grace period after the last viewer leaves (page reloads, tab switches)
+    # Frames grabbed and dropped (not decoded) before a frame is used after resuming, and before each
+    # keepalive frame: the driver's queued buffers are stale and exposure needs a moment after opening
+    warmup_frames: int = 4
+    # Renditions stepped through by ?auto=true streams, best first
+    stream_ladder: List[StreamRendition] = [
+        StreamRendition(width=0, quality=70),
+        StreamRendition(width=480, quality=60),
+        StreamRendition(width=320, quality=50),
+    ]
 
 class OBDConfig(BaseModel):
     port: Optional[str] = None
     simulation: bool = True
     allow_real: bool = False
-    polling_interval: float = 0.5
+    polling_interval: float = 0.5 # Rate for PIDs without an entry in pid_rates
+    # Target poll rate per PID in Hz (python-obd command names)
+    pid_rates: Dict[str, float] = {
+        "RPM": 10.0,
+        "SPEED": 10.0,
+        "THROTTLE_POS": 5.0,
+        "COOLANT_TEMP": 0.5,
+        "INTAKE_TEMP": 0.5,
+        "ELM_VOLTAGE": 0.2,
+        "MAF": 2.0,
+    }
+    multi_pid: bool = True # Batch up to 6 mode 01 PIDs per request on CAN vehicles
+    max_backoff_seconds: float = 60.0 # Reconnect backoff doubles from supervision.backoff_seconds up to this
+    backoff_jitter: float = 0.2 # +/- fraction applied to each backoff delay
+    # Seconds of per-PID history kept in memory (12 bytes/sample at each PID's poll rate)
+    history_seconds: int = 21600
+
+class DerivedConfig(BaseModel):
+    # Engine RPM per km/h in each gear (first gear first); measure by logging a steady cruise in each
+    gear_ratios: List[float] = [135.0, 75.0, 48.0, 36.0, 29.0, 24.0]
+    afr: float = 14.7 # Stoichiometric air/fuel ratio (petrol 14.7, diesel ~14.5)
+    fuel_density: float = 745.0 # g/L (petrol ~745, diesel ~832)
+    smoothing_seconds: float = 1.0 # EWMA time constant for acceleration and gear
+    rolling_window: float = 60.0 # Seconds covered by the <PID>_MIN/_MAX values
+    rolling_pids: List[str] = ["RPM", "SPEED", "COOLANT_TEMP"]
+
+class RecorderConfig(BaseModel):
+    enabled: bool = False
+    cameras: List[str] = ["camera_rear", "camera_front"]
+    directory: str = "recordings" # Relative paths resolve against the repo root
+    fps: int = 10
+    segment_seconds: int = 60
+    segment_max_bytes: int = 32 * 1024 * 1024
+    max_total_bytes: int = 1024 * 1024 * 1024 # Oldest segments are deleted beyond this
+    flush_interval: float = 1.0 # Seconds of frames batched per write
+    queue_frames: int = 64 # Frames buffered for the writer before dropping
+
+class TripLogConfig(BaseModel):
+    enabled: bool = True
+    directory: str = "trips" # Relative paths resolve against the repo root
+    gap_seconds: float = 300.0 # A pause in OBD samples longer than this ends the trip
+    flush_interval: float = 5.0 # Seconds of records batched per write + fsync
+    queue_records: int = 8192 # Records buffered for the writer before dropping
+    record_simulation: bool = False # Also log simulated telemetry (maintenance testing)
+    compact_after_days: float = 7.0 # Older trips are rolled into downsampled summaries
+    compact_resolution: float = 10.0 # Seconds per summary bucket
+    max_total_bytes: int = 512 * 1024 * 1024 # Oldest trips are deleted beyond this
 
 class SupervisionConfig(BaseModel):
     max_retries: int = 3
     backoff_seconds: float = 5.0
+    # Watchdog: restarts subsystems that report ACTIVE but stop producing data
+    watchdog_interval: float = 0.5 # Seconds between freshness checks
+    camera_missed_frames: int = 30 # Stalled after this many frame intervals without a frame
+    obd_missed_polls: int = 10 # Stalled after this many polling intervals without a sample
+    min_deadline_seconds: float = 2.0 # Floor for both deadlines
+    hang_seconds: float = 60.0 # Worker loop stuck outside streaming (e.g. opening a device)
+
+class MotionConfig(BaseModel):
+    enabled: bool = False
+    cameras: List[str] = ["camera_rear", "camera_front"]
+    arm: str = "parked" # "parked": while the engine is off (no OBD data, or RPM 0); "always"
+    parked_after_seconds: float = 120.0 # Engine off this long before arming (start-stop, stalls)
+    fps: float = 2.0 # Analysis rate; cameras in standby keep capturing at least this fast
+    width: int = 64 # Frames are analysed as grayscale at this width
+    learning_rate: float = 0.05 # Running-average background weight per analysed frame
+    pixel_threshold: int = 25 # Grey-level difference for a pixel to count as changed
+    min_area: float = 0.01 # Changed fraction of the frame that counts as motion
+    max_area: float = 0.6 # Above this it is a lighting change (headlights, clouds): relearn instead
+    trigger_frames: int = 2 # Consecutive motion frames before an event
+    cooldown_seconds: float = 30.0 # Minimum gap between events per camera
+    directory: str = "motion" # Event snapshots; relative paths resolve against the repo root
+    max_snapshots: int = 200 # Per camera, oldest deleted first
+
+class SystemConfig(BaseModel):
+    sample_interval: float = 2.0 # Seconds between system metric samples
+    history_seconds: int = 3600 # Sample history kept for /api/system/history
+    wifi_interface: str = "wlan0" # Access point interface whose clients are counted
+
+class LoggingConfig(BaseModel):
+    directory: Optional[str] = "logs" # Rotating log files, relative to the repo root; null disables
+    max_file_bytes: int = 1024 * 1024
+    backup_count: int = 5 # Rotated files kept next to the live one
+    queue_size: int = 4096 # Entries waiting for the writer thread; overflow is dropped and counted
+    rate_per_source: float = 20.0 # Sustained DEBUG/INFO entries/s per source before suppression (WARN+ always kept)
+    burst_per_source: int = 50
+    summary_interval: float = 5.0 # How often "suppressed N similar messages" summaries are written
+    console: bool = True
 
 class Settings(BaseModel):
     mode: str = "operational" # "maintenance" | "operational"
@@ -39,7 +147,13 @@ class Settings(BaseModel):
     camera_rear: CameraConfig
     camera_front: CameraConfig
     obd: OBDConfig
+    derived: DerivedConfig = DerivedConfig()
     supervision: SupervisionConfig
+    recorder: RecorderConfig = RecorderConfig()
+    trips: TripLogConfig = TripLogConfig()
+    logging: LoggingConfig = LoggingConfig()
+    system: SystemConfig = SystemConfig()
+    motion: MotionConfig = MotionConfig()
     
     # Environment info
     is_wsl: bool = False
@@ -51,6 +165,12 @@ class Settings(BaseModel):
             raise ValueError("Mode must be 'maintenance' or 'operational'")
         return v
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+
+def resolve_path(path: str) -> str:
+    """Resolves config paths relative to the repo root, whatever the working directory."""
+    return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
 def detect_environment():
     is_wsl = "microsoft-standard" in platform.release().lower()
     is_mounted = False
@@ -69,10 +189,8 @@ def load_settings() -> Settings:
     # 2. VANDASH_PROFILE=operational|maintenance (default operational)
     # 3. Fallback to operational.yaml, then maintenance.yaml if present
 
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
-    
-    op_path = os.path.join(base_dir, "config/operational.yaml")
-    maint_path = os.path.join(base_dir, "config/maintenance.yaml")
+    op_path = os.path.join(BASE_DIR, "config/operational.yaml")
+    maint_path = os.path.join(BASE_DIR, "config/maintenance.yaml")
     
     config_file = None
 
@@ -1,4 +1,12 @@
+import asyncio
+import atexit
 import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
 from datetime import datetime
 from collections import deque
 from typing import List, Dict, Optional
@@ -9,20 +17,141 @@ class LogEntry:
         self.source = source
         self.level = level
         self.message = message
-from typing import List, Dict, Optional, Any
-from ..config.settings import settings
+from typing import List, Dict, Optional, Any, Tuple
+from ..config.settings import settings, resolve_path
+
+# Numeric severities for the level filter; unknown levels count as INFO.
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+_STOP = object()
 
 class LoggingService:
-    def __init__(self, max_logs: int = 1000):
+    """Ring buffer of recent log entries with per-source and per-level indexes.
+
+    Every entry gets a monotonically increasing seq, so readers can ask for
+    just what is new (tail(since=seq)) or wait for it (wait_newer). Each index
+    is a deque of the same entry dicts in seq order; when the ring evicts its
+    oldest entry, that entry is also the oldest in its source and level
+    indexes, so eviction stays O(1). Appends and reads share one lock.
+
+    log() is safe to call from hot loops: it checks the level filter and the
+    source's rate budget, then queues the raw arguments. A writer thread does
+    the formatting, the ring append, console output and the rotating log
+    file. DEBUG/INFO entries over a source's budget are counted instead of
+    queued and written as "suppressed N similar messages" summaries; WARN
+    and above are always kept.
+    """
+
+    def __init__(self, max_logs: int = 1000, min_level: str = "INFO", directory: Optional[str] = None,
+                 max_file_bytes: int = 1024 * 1024, backup_count: int = 5, queue_size: int = 4096,
+                 rate_per_source: float = 20.0, burst_per_source: int = 50,
+                 summary_interval: float = 5.0, console: bool = True):
         self.logs = deque(maxlen=max_logs)
         self.sources = set()
+        self.seq = 0
+        # Cursors from before a restart must not be mistaken for current ones.
+        self.epoch = f"{int(time.time()):x}"
+        self._by_source: Dict[str, deque] = {}
+        self._by_level: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        # Async SSE handlers waiting for the next entry: (loop, event) pairs.
+        self._waiters = set()
+
+        self.min_level = LEVELS.get(min_level.upper(), 20)
+        self.rate = rate_per_source
+        self.burst = burst_per_source
+        self.summary_interval = summary_interval
+        self.console = console
+        self._budgets: Dict[str, List[float]] = {} # source -> [tokens, last refill time]
+        self._suppressed: Dict[Tuple[str, str], int] = {} # (source, message) -> count
+        self._budget_lock = threading.Lock()
+        self.dropped = 0 # Queue overflow
+        self.suppressed_total = 0
+        self.written = 0
+
+        self._file = self._open_file(directory, max_file_bytes, backup_count)
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="LogWriter")
+        self._thread.start()
+        atexit.register(self.stop)
+
+    @staticmethod
+    def _open_file(directory: Optional[str], max_bytes: int, backup_count: int):
+        if not directory:
+            return None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(os.path.join(directory, "vandash.log"), maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding="utf-8")
+        except OSError as e:
+            print(f"[{datetime.now().isoformat()}] LOGGING WARN: Log files disabled | Reason: {e}")
+            return None
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        return handler
 
     def log(self, source: str, message: str, level: str = "INFO", intent: Optional[str] = None, reason: Optional[str] = None, action: Optional[str] = None):
+        # Verbosity control: filtered entries cost a dict lookup, nothing is formatted.
+        severity = LEVELS.get(level, 20)
+        if severity < self.min_level:
+            return
         source = source.upper()
-        self.sources.add(source)
-        
-        timestamp = datetime.now().isoformat()
-        
+        now = time.time()
+
+        # WARN and above bypass the budget: they explain whatever is flooding the source.
+        if severity < LEVELS["WARN"] and not self._take_token(source, message, now):
+            return
+
+        try:
+            self._queue.put_nowait((now, source, level, message, intent, reason, action))
+        except queue.Full:
+            self.dropped += 1
+
+    def _take_token(self, source: str, message: str, now: float) -> bool:
+        """Spends one of the source's tokens, or counts the entry as suppressed if it has none."""
+        with self._budget_lock:
+            budget = self._budgets.get(source)
+            if budget is None:
+                budget = self._budgets[source] = [float(self.burst), now]
+            tokens = min(float(self.burst), budget[0] + (now - budget[1]) * self.rate)
+            budget[1] = now
+            if tokens < 1.0:
+                budget[0] = tokens
+                key = (source, message)
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.suppressed_total += 1
+                return False
+            budget[0] = tokens - 1.0
+            return True
+
+    def _run(self):
+        next_summary = time.monotonic() + self.summary_interval
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.summary_interval)]
+            except queue.Empty:
+                batch = []
+            # Drain whatever else is waiting so console and file are written once per batch.
+            while batch and len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = _STOP in batch
+            lines = [self._write(*item) for item in batch if item is not _STOP]
+            if time.monotonic() >= next_summary or stopping:
+                lines.extend(self._write_summaries())
+                next_summary = time.monotonic() + self.summary_interval
+            self._output(lines)
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                return
+
+    def _write(self, created: float, source: str, level: str, message: str, intent: Optional[str],
+               reason: Optional[str], action: Optional[str]) -> str:
+        timestamp = datetime.fromtimestamp(created).isoformat()
+
         # Narrative construction
         full_message = message
         if intent:
@@ -31,40 +160,153 @@ class LoggingService:
             full_message = f"{full_message} | Reason: {reason}"
         if action:
             full_message = f"{full_message} | Action: {action}"
-            
-        log_entry = {
+
+        self._append({
             "timestamp": timestamp,
             "source": source,
             "level": level,
             "message": full_message
-        }
-        
-        # Verbosity control
-        # In operational mode, we suppress non-essential INFO if needed, 
-        # but for now we follow the 'concise vs verbose' rule.
-        is_maintenance = settings.mode == "maintenance"
-        
-        if level == "DEBUG" and not is_maintenance:
+        })
+        return f"[{timestamp}] {source} {level}: {full_message}"
+
+    def _write_summaries(self) -> List[str]:
+        with self._budget_lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        by_source: Dict[str, List[Tuple[int, str]]] = {}
+        for (source, message), count in suppressed.items():
+            by_source.setdefault(source, []).append((count, message))
+        lines = []
+        for source, counts in by_source.items():
+            total = sum(count for count, _ in counts)
+            count, message = max(counts)
+            lines.append(self._write(time.time(), source, "WARN", f"Suppressed {total} similar messages", None,
+                                     f"Over {self.rate:g}/s for this source; most frequent ({count}x): {message}",
+                                     None))
+        return lines
+
+    def _output(self, lines: List[str]):
+        if not lines:
             return
+        self.written += len(lines)
+        if self.console:
+            # Console output for dev
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+        if self._file is not None:
+            for line in lines:
+                self._file.emit(logging.makeLogRecord({"msg": line}))
+
+    def flush(self, timeout: float = 2.0):
+        """Waits until everything logged so far has been written (tests, scripts)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
 
-        self.logs.append(log_entry)
-        
-        # Console output for dev
-        print(f"[{timestamp}] {source} {level}: {full_message}")
+    def stop(self):
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=1.0)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=2.0)
+        if self._file is not None:
+            self._file.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "suppressed": self.suppressed_total,
+            "dropped": self.dropped,
+            "file": self._file.baseFilename if self._file is not None else None,
+        }
+
+    def _append(self, entry: Dict[str, Any]):
+        with self._lock:
+            self.sources.add(entry["source"])
+            if len(self.logs) == self.logs.maxlen:
+                evicted = self.logs[0]
+                self._by_source[evicted["source"]].popleft()
+                self._by_level[evicted["level"]].popleft()
+            self.seq += 1
+            entry["seq"] = self.seq
+            self.logs.append(entry)
+            self._by_source.setdefault(entry["source"], deque()).append(entry)
+            self._by_level.setdefault(entry["level"], deque()).append(entry)
+        for loop, event in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                self._waiters.discard((loop, event))
 
     def get_sources(self) -> List[str]:
-        return sorted(list(self.sources))
-
-    def tail(self, source: Optional[str] = None, lines: int = 50, level: Optional[str] = None) -> List[Dict[str, Any]]:
-        filtered = list(self.logs)
-        if source:
-            filtered = [l for l in filtered if l["source"] == source.upper()]
-        if level:
-            filtered = [l for l in filtered if l["level"] == level.upper()]
-            
-        return filtered[-lines:]
-
-logger = LoggingService()
+        with self._lock:
+            return sorted(self.sources)
+
+    def tail(self, source: Optional[str] = None, lines: int = 50, level: Optional[str] = None,
+             since: int = 0) -> List[Dict[str, Any]]:
+        """Last `lines` entries matching the filters, oldest first; only seq > since if given."""
+        return self.entries_since(since, source, level, lines)[1]
+
+    def entries_since(self, since: int, source: Optional[str] = None, level: Optional[str] = None,
+                      lines: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Like tail(), but also returns the seq the result is current up to (the next cursor)."""
+        wanted_source = source.upper() if source else None
+        wanted_level = level.upper() if level else None
+        with self._lock:
+            # Walk the smallest index that covers the filters, newest first,
+            # stopping after `lines` matches or at the cursor.
+            candidates = self._by_source.get(wanted_source, ()) if wanted_source else self.logs
+            if wanted_level:
+                by_level = self._by_level.get(wanted_level, ())
+                if len(by_level) < len(candidates):
+                    candidates = by_level
+            result = []
+            for entry in reversed(candidates):
+                if entry["seq"] <= since or len(result) >= lines:
+                    break
+                if (wanted_source and entry["source"] != wanted_source) or \
+                        (wanted_level and entry["level"] != wanted_level):
+                    continue
+                result.append(entry)
+            seq = self.seq
+        result.reverse()
+        return seq, result
+
+    def cursor(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_cursor(self, cursor: Optional[str]) -> int:
+        """Returns the seq a client last saw, or 0 if the cursor is from another run."""
+        epoch, _, seq = (cursor or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return 0
+        return int(seq)
+
+    async def wait_newer(self, seq: int, timeout: float = 15.0) -> bool:
+        """Waits on the event loop until an entry newer than seq exists."""
+        if self.seq > seq:
+            return True
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        try:
+            # Re-check after registering so an append in between is not missed.
+            if self.seq <= seq:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+_config = settings.logging
+logger = LoggingService(
+    min_level=settings.backend.log_level,
+    directory=resolve_path(_config.directory) if _config.directory else None,
+    max_file_bytes=_config.max_file_bytes, backup_count=_config.backup_count,
+    queue_size=_config.queue_size, rate_per_source=_config.rate_per_source,
+    burst_per_source=_config.burst_per_source, summary_interval=_config.summary_interval,
+    console=_config.console)
 
 # Environment Warnings (Non-fatal)
 if settings.mode == "maintenance":
@@ -1,8 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Dict, Optional
+import json
 import time
 import os
 
@@ -32,18 +33,44 @@ from .services.health import health_service
 from .services.system import system_service
 from .services.obd import obd_service
 from .services.camera import camera_rear, camera_front
+from .services.broadcaster import AdaptiveRendition
+from .services.recorder import recorders
+from .services.motion import motion_detectors
+from .services.telemetry_bus import telemetry_bus
+from .services.telemetry_history import DOWNSAMPLERS
 from .services.simulation import simulation_service
+from .services.watchdog import watchdog
+from .services.multiplex import MultiplexSession
 from .logging.logger import logger as dash_logger
+from .config.settings import settings
 from sse_starlette.sse import EventSourceResponse
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import asyncio
-import json
 
 @app.on_event("startup")
 async def startup_event():
+    system_service.start()
     obd_service.start()
     camera_rear.start()
     camera_front.start()
+    if settings.recorder.enabled:
+        for recorder in recorders.values():
+            recorder.start()
+    if settings.motion.enabled:
+        for detector in motion_detectors.values():
+            detector.start()
+
+    supervision = settings.supervision
+    for camera in (camera_rear, camera_front):
+        watchdog.watch(camera.name, camera.freshness, camera.restart,
+                       deadline=max(supervision.camera_missed_frames / camera.framerate,
+                                    supervision.min_deadline_seconds))
+    watchdog.watch("obd", obd_service.freshness, obd_service.restart,
+                   deadline=max(supervision.obd_missed_polls * settings.obd.polling_interval,
+                                supervision.min_deadline_seconds))
+    health_service.register_metrics("watchdog", watchdog.get_stats)
+    health_service.register_metrics("logging", dash_logger.get_stats)
+    watchdog.start()
     dash_logger.log("backend", "VanDash Backend started")
 
 @app.get("/api/camera/rear/status")
@@ -54,41 +81,186 @@ async def get_camera_rear_status():
 async def get_camera_front_status():
     return camera_front.get_status()
 
+class ViewerStreamingResponse(StreamingResponse):
+    """StreamingResponse that returns its camera viewer slot however the stream ends."""
+
+    def __init__(self, content, broadcaster, **kwargs):
+        super().__init__(content, **kwargs)
+        self.broadcaster = broadcaster
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.broadcaster.release_viewer()
+
+async def _mjpeg_stream(camera, request: Request, fps: Optional[int], width: int, quality: int, auto: bool):
+    max_fps = min(fps, camera.stream_max_fps) if fps and fps > 0 else camera.stream_max_fps
+    min_interval = 1.0 / max(1, max_fps)
+    adaptive = AdaptiveRendition(camera.stream_ladder, min_interval) if auto else None
+
+    if not camera.broadcaster.acquire_viewer():
+        dash_logger.log(camera.name, "Stream viewer rejected", level="WARN",
+                        reason=f"Viewer limit ({camera.broadcaster.max_viewers}) reached",
+                        action="Returning 503")
+        raise HTTPException(status_code=503, detail=f"{camera.name} viewer limit reached")
+
+    async def frame_generator():
+        last_seq = 0
+        last_sent = 0.0
+        while not await request.is_disconnected():
+            if not await camera.broadcaster.wait_newer(last_seq):
+                continue
+            # Enforce the client's FPS cap by skipping frames that arrive too
+            # soon (with some slack for capture jitter) rather than sleeping,
+            # so whatever we do send is always the freshest frame.
+            if time.monotonic() - last_sent < min_interval * 0.9:
+                last_seq = camera.broadcaster.seq
+                continue
+
+            rendition_width, rendition_quality = adaptive.rendition if adaptive else (width, quality)
+            last_seq, jpeg, frame = await camera.broadcaster.fetch(rendition_width, rendition_quality)
+            if jpeg is None:
+                continue
+
+            last_sent = time.monotonic()
+            camera.latency.record("queue", (last_sent - frame.timestamp) * 1000)
+            # X-Timestamp is the wall-clock capture time so clients can show frame age.
+            headers = (f"Content-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n"
+                       f"X-Frame-Seq: {last_seq}\r\nX-Timestamp: {frame.wall_time:.6f}\r\n\r\n")
+            # The yield only resumes once the transport has accepted the part,
+            # so a slow client never accumulates a backlog of stale frames.
+            yield b'--frame\r\n' + headers.encode() + jpeg + b'\r\n'
+
+            sent = time.monotonic()
+            camera.latency.record("send", (sent - last_sent) * 1000)
+            camera.latency.record("total", (sent - frame.timestamp) * 1000)
+            if adaptive:
+                adaptive.record_send(len(jpeg), sent - last_sent)
+
+    return ViewerStreamingResponse(frame_generator(), camera.broadcaster,
+                                   media_type="multipart/x-mixed-replace; boundary=frame")
+
 @app.get("/api/camera/rear/stream")
-async def get_camera_rear_stream():
-    def frame_generator():
-        while True:
-            frame = camera_rear.get_frame()
-            if frame:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            else:
-                time.sleep(0.1)
-    return StreamingResponse(frame_generator(), media_type="multipart/x-mixed-replace; boundary=frame")
+async def get_camera_rear_stream(request: Request, fps: Optional[int] = None, width: int = 0,
+                                  quality: int = 0, auto: bool = False):
+    return await _mjpeg_stream(camera_rear, request, fps, width, quality, auto)
 
 @app.get("/api/camera/front/stream")
-async def get_camera_front_stream():
-    def frame_generator():
-        while True:
-            frame = camera_front.get_frame()
-            if frame:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            else:
-                time.sleep(0.1)
-    return StreamingResponse(frame_generator(), media_type="multipart/x-mixed-replace; boundary=frame")
+async def get_camera_front_stream(request: Request, fps: Optional[int] = None, width: int = 0,
+                                  quality: int = 0, auto: bool = False):
+    return await _mjpeg_stream(camera_front, request, fps, width, quality, auto)
+
+CAMERAS = {"rear": camera_rear, "front": camera_front}
+
+@app.get("/api/camera/{name}/snapshot")
+async def get_camera_snapshot(name: str, request: Request, width: int = 0, max_age: float = 2.0):
+    """Newest frame as a single JPEG, for previews that do not need a stream.
+
+    Served from a per-camera cache keyed by frame seq and width, so pollers
+    within one frame interval share one encode. Clients revalidate with
+    If-None-Match and get a 304 until a newer frame exists. A camera in
+    standby is woken for a fresh frame if the last one is older than max_age.
+    """
+    camera = CAMERAS.get(name)
+    if camera is None:
+        raise HTTPException(status_code=404, detail=f"Unknown camera {name!r}")
+    await camera.ensure_fresh(max_age)
+
+    _, etag = camera.broadcaster.snapshot_etag(width)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    snapshot = await camera.broadcaster.snapshot(width)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail=f"{camera.name} has no frame yet")
+    return Response(snapshot.jpeg, media_type="image/jpeg", headers={
+        "ETag": snapshot.etag,
+        "Cache-Control": "no-cache", # Always revalidate; unchanged frames cost a 304
+        "X-Frame-Seq": str(snapshot.seq),
+        "X-Timestamp": f"{snapshot.wall_time:.6f}",
+    })
+
+@app.get("/api/camera/latency")
+async def get_camera_latency():
+    """p50/p95/p99 (ms) per pipeline stage over the most recent frames."""
+    return {camera.name: camera.latency.summary() for camera in (camera_rear, camera_front)}
+
+# Delayed incident saves: the loop only holds weak references to tasks, so keep them until done.
+_save_tasks = set()
+
+def _save_done(task: asyncio.Task):
+    _save_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        dash_logger.log("recorder", "Scheduled incident save failed", level="ERROR",
+                        reason=str(task.exception()), action="Clip not saved")
+
+@app.post("/api/recorder/save")
+async def save_recording(seconds: float = 30.0, after: float = 0.0, camera: Optional[str] = None):
+    """Saves the last `seconds` of footage, optionally waiting `after` seconds to include the aftermath."""
+    selected = [r for r in recorders.values() if r.running and (camera is None or r.name == camera)]
+    if not selected:
+        raise HTTPException(status_code=404, detail="No active recorder for that camera")
+
+    async def save():
+        if after > 0:
+            await asyncio.sleep(after)
+        return [await asyncio.to_thread(r.save_clip, seconds + after) for r in selected]
+
+    if after > 0:
+        task = asyncio.create_task(save())
+        _save_tasks.add(task)
+        task.add_done_callback(_save_done)
+        return {"status": "scheduled", "cameras": [r.name for r in selected], "save_in": after}
+    return {"status": "saved", "clips": await save()}
+
+@app.get("/api/motion")
+async def get_motion():
+    """Parking sentinel state per camera and the most recent motion events, newest first.
+
+    Cameras are named as in /api/camera/{name}/snapshot (rear, front); each
+    event carries the URL of its snapshot, if one was saved.
+    """
+    cameras, events = {}, []
+    for name, camera in CAMERAS.items():
+        detector = motion_detectors.get(camera.name)
+        if detector is None:
+            continue
+        cameras[name] = detector.get_stats()
+        events += [{**event, "camera": name,
+                    "url": f"/api/motion/{name}/{event['snapshot']}" if event["snapshot"] else None}
+                   for event in detector.get_events()]
+    return {"cameras": cameras, "events": sorted(events, key=lambda event: event["time"], reverse=True)}
+
+@app.get("/api/motion/{name}/{filename}")
+async def get_motion_snapshot(name: str, filename: str):
+    camera = CAMERAS.get(name)
+    if camera is None:
+        raise HTTPException(status_code=404, detail=f"Unknown camera {name!r}")
+    detector = motion_detectors.get(camera.name)
+    path = detector.snapshot_path(filename) if detector else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return FileResponse(path, media_type="image/jpeg")
 
 @app.post("/api/system/simulation/toggle")
 async def toggle_simulation():
     is_active = simulation_service.toggle()
     dash_logger.log("SYSTEM", f"Simulation mode {'ENABLED' if is_active else 'DISABLED'}", 
                    level="INFO", action="Toggling global simulation state")
+    health_service.publish()
     return {"active": is_active}
 
 @app.get("/api/health")
 async def get_health():
     return health_service.get_health_summary()
 
+@app.get("/api/health/stream")
+async def stream_health(request: Request):
+    """Pushes the health summary (without metrics) whenever a subsystem changes state."""
+    if health_service.bus.seq == 0:
+        health_service.publish()
+    return bus_event_stream(health_service.bus, request)
+
 @app.get("/api/status")
 async def get_status():
     stats = system_service.get_stats()
@@ -100,13 +272,42 @@ async def get_log_sources():
     return dash_logger.get_sources()
 
 @app.get("/api/logs/tail")
-async def tail_logs(source: Optional[str] = None, lines: int = 50, level: Optional[str] = None):
-    return dash_logger.tail(source, lines, level)
+async def tail_logs(source: Optional[str] = None, lines: int = 50, level: Optional[str] = None, since: int = 0):
+    """Last `lines` entries; pass the highest seq seen as since= to get only newer ones."""
+    return dash_logger.tail(source, lines, level, since)
+
+@app.get("/api/logs/stream")
+async def stream_logs(request: Request, source: Optional[str] = None, level: Optional[str] = None,
+                      lines: int = 50):
+    """Pushes new log entries as they arrive, as a JSON list per event.
+
+    The first event carries the last `lines` matching entries. EventSource
+    reconnects resume from Last-Event-ID.
+    """
+    resume_seq = dash_logger.parse_cursor(request.headers.get("last-event-id"))
+
+    async def event_generator():
+        seq = resume_seq
+        limit = lines if not seq else dash_logger.logs.maxlen
+        while True:
+            if not await dash_logger.wait_newer(seq):
+                continue # sse_starlette keeps the connection alive with pings
+            seq, entries = dash_logger.entries_since(seq, source, level, limit)
+            limit = dash_logger.logs.maxlen
+            if entries:
+                yield {"id": dash_logger.cursor(seq), "data": json.dumps(entries)}
+
+    return EventSourceResponse(event_generator())
 
 @app.get("/api/system/telemetry")
 async def get_system_telemetry():
     return system_service.get_telemetry()
 
+@app.get("/api/system/history")
+async def get_system_history(since: float = -600):
+    """Sampled system metrics; since <= 0 is relative to now (default: last 10 minutes)."""
+    return system_service.get_history(since)
+
 @app.post("/api/system/reset/{subsystem}")
 async def reset_subsystem(subsystem: str):
     health_service.reset_subsystem(subsystem)
@@ -116,19 +317,82 @@ async def reset_subsystem(subsystem: str):
 async def get_obd_latest():
     return obd_service.get_latest()
 
-@app.get("/api/obd/stream")
-async def stream_obd_data():
+@app.get("/api/obd/history")
+async def get_obd_history(pid: str, since: float = -1200, points: int = 300, mode: str = "minmax"):
+    """Downsampled PID history. since is epoch seconds, or <= 0 for seconds before now.
+
+    mode=minmax returns per-bucket t/min/max/avg; mode=lttb returns t/v.
+    """
+    if pid not in obd_service.history.pids:
+        raise HTTPException(status_code=404, detail=f"No history for PID '{pid}'")
+    if mode not in DOWNSAMPLERS:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {sorted(DOWNSAMPLERS)}")
+    points = max(3, min(points, 5000))
+    return await asyncio.to_thread(obd_service.history.query, pid, since, points, mode)
+
+@app.get("/api/trips")
+async def list_trips():
+    return await asyncio.to_thread(obd_service.trip_log.list_trips)
+
+@app.get("/api/trips/{trip_id}")
+async def get_trip(trip_id: str, channel: Optional[str] = None, since: float = 0, until: float = 0,
+                   points: int = 500, mode: str = "minmax"):
+    """Trip summary, channels and health events; with channel=, a downsampled series for that channel."""
+    trip = await asyncio.to_thread(obd_service.trip_log.open_trip, trip_id)
+    if trip is None:
+        raise HTTPException(status_code=404, detail=f"Trip '{trip_id}' not found")
+    if mode not in DOWNSAMPLERS:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {sorted(DOWNSAMPLERS)}")
+    if channel is None:
+        result = trip.summary()
+        result["channels"] = trip.channels
+        result["events"] = await asyncio.to_thread(trip.events)
+        return result
+    if channel not in trip.channels:
+        raise HTTPException(status_code=404, detail=f"Trip '{trip_id}' has no channel '{channel}'")
+    points = max(3, min(points, 5000))
+    result = trip.summary()
+    result.update(await asyncio.to_thread(trip.series, channel, since, until, points, mode))
+    return result
+
+def bus_event_stream(bus, request: Request, delta: bool = False, max_hz: float = 0) -> EventSourceResponse:
+    """SSE response that follows a TelemetryBus.
+
+    delta=true sends only changed keys after the first (full) event. max_hz
+    caps the event rate; updates in between are coalesced. EventSource
+    reconnects resume from Last-Event-ID.
+    """
+    min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+    resume_seq = bus.parse_event_id(request.headers.get("last-event-id"))
+
     async def event_generator():
+        seq = resume_seq
+        last_sent = 0.0
         while True:
-            data = obd_service.get_latest()
-            if data:
-                yield {
-                    "data": json.dumps(data)
-                }
-            await asyncio.sleep(0.5) # 2Hz stream
-            
+            if not await bus.wait_newer(seq):
+                continue # sse_starlette keeps the connection alive with pings
+            wait = last_sent + min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            update = bus.updates_since(seq, delta)
+            if update is None:
+                continue
+            seq, payload = update
+            last_sent = time.monotonic()
+            yield {"id": bus.event_id(seq), "data": payload}
+
     return EventSourceResponse(event_generator())
 
+@app.get("/api/obd/stream")
+async def stream_obd_data(request: Request, delta: bool = False, max_hz: float = 0):
+    """Pushes telemetry as it changes."""
+    return bus_event_stream(telemetry_bus, request, delta, max_hz)
+
+@app.websocket("/api/ws")
+async def multiplexed_socket(websocket: WebSocket):
+    """Telemetry (binary), health and logs over one connection; see MultiplexSession."""
+    await MultiplexSession(websocket).run()
+
 @app.get("/api/test/fail")
 async def simulate_failure(subsystem: str = "obd"):
     health_service.update_status(subsystem, "FAULTY", error="Simulated hardware failure", message="Hardware not responding")
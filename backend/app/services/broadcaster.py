@@ -0,0 +1,339 @@
+import asyncio
+import cv2
+import numpy as np
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from .frame_ring import Frame, FrameRing
+from .metrics import LatencyTracker
+from .encoders import OpenCVEncoder
+
+class Snapshot(NamedTuple):
+    seq: int
+    jpeg: bytes
+    etag: str
+    wall_time: float
+
+class FrameBroadcaster:
+    """Fans out captured frames to every stream viewer of one camera.
+
+    Frames live in the camera's FrameRing. Each frame is JPEG-encoded at most
+    once (on first demand) and the bytes are cached on its ring slot, so the
+    same bytes are handed to every subscriber. In passthrough mode the device's
+    own JPEG bytes are committed instead and pixels are only decoded if
+    something asks for them.
+    """
+
+    def __init__(self, name: str, ring: FrameRing, quality: int = 70, max_viewers: int = 4,
+                 latency: Optional[LatencyTracker] = None, encoder=None):
+        self.name = name
+        self.ring = ring
+        self.latency = latency
+        self.encoder = encoder or OpenCVEncoder()
+        self.quality = quality
+        self.max_viewers = max_viewers
+        self.viewers = 0
+        self.subscribers = 0 # Consumers other than stream viewers that need frames (recorder)
+        # Called with the new demand whenever it changes, so capture can leave or enter standby.
+        self.demand_listener: Optional[Callable[[int], None]] = None
+
+        self._lock = threading.Lock()
+        self._locks: Dict[object, threading.Lock] = {}
+        # Scaled / re-quantized renditions of the current frame: (width, quality) -> (seq, jpeg)
+        self._renditions: Dict[Tuple[int, int], Tuple[int, bytes]] = {}
+
+        # Async stream handlers waiting for the next frame: (loop, event) pairs.
+        self._waiters = set()
+
+        # Stills served to pollers: (seq, width) -> Snapshot. The epoch keeps ETags
+        # from an earlier run (seq restarts at 1) from matching.
+        self.epoch = int(time.time())
+        self._snapshots: "OrderedDict[Tuple[int, int], Snapshot]" = OrderedDict()
+        self.snapshot_hits = 0
+        self.snapshot_misses = 0
+
+    @property
+    def seq(self) -> int:
+        return self.ring.seq
+
+    def publish(self, frame, timestamp: Optional[float] = None) -> int:
+        """Called by the capture thread for every new frame."""
+        seq = self.ring.commit(pixels=frame, timestamp=timestamp)
+        self._wake_waiters()
+        return seq
+
+    def publish_jpeg(self, jpeg: bytes, timestamp: Optional[float] = None) -> int:
+        """Publishes an already-compressed frame (MJPEG passthrough)."""
+        seq = self.ring.commit(jpeg=jpeg, timestamp=timestamp)
+        self._wake_waiters()
+        return seq
+
+    def publish_committed(self, seq: int) -> int:
+        """Announces a frame another process already wrote into a SharedFrameRing."""
+        self.ring.advance(seq)
+        self._wake_waiters()
+        return seq
+
+    def _wake_waiters(self):
+        for loop, event in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; the waiter will never be collected otherwise.
+                self._waiters.discard((loop, event))
+
+    @property
+    def demand(self) -> int:
+        return self.viewers + self.subscribers
+
+    def _demand_changed(self):
+        if self.demand_listener is not None:
+            self.demand_listener(self.demand)
+
+    def acquire_viewer(self) -> bool:
+        with self._lock:
+            if self.viewers >= self.max_viewers:
+                return False
+            self.viewers += 1
+        self._demand_changed()
+        return True
+
+    def release_viewer(self):
+        with self._lock:
+            self.viewers = max(0, self.viewers - 1)
+        self._demand_changed()
+
+    def subscribe(self):
+        with self._lock:
+            self.subscribers += 1
+        self._demand_changed()
+
+    def unsubscribe(self):
+        with self._lock:
+            self.subscribers = max(0, self.subscribers - 1)
+        self._demand_changed()
+
+    def get_pixels(self):
+        """Returns the newest frame as a BGR array, decoding passthrough JPEGs on demand."""
+        frame = self.ring.latest()
+        if frame is None:
+            return None
+        return self._pixels(frame)
+
+    def _lock_for(self, key) -> threading.Lock:
+        # One lock per rendition (plus one for decoding) so different renditions
+        # can be encoded in parallel while each is still encoded only once.
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _pixels(self, frame: Frame):
+        if frame.pixels is not None:
+            return frame.pixels
+        with self._lock_for("decode"):
+            current = self.ring.get(frame.seq)
+            if current is not None and current.pixels is not None:
+                # Another caller decoded it while we waited for the lock.
+                return current.pixels
+            if frame.jpeg is None:
+                return None
+
+            pixels = cv2.imdecode(np.frombuffer(frame.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if pixels is not None:
+                self.ring.attach(frame.seq, pixels=pixels)
+            return pixels
+
+    def _normalize(self, width: int, quality: int) -> Tuple[int, int]:
+        # Snap requests onto a coarse grid so similar clients share one rendition.
+        if quality:
+            quality = max(10, min(95, int(round(quality / 5.0)) * 5))
+            if quality == self.quality:
+                quality = 0
+        if width:
+            width = max(64, (width // 16) * 16)
+        return width, quality
+
+    def get_jpeg(self, width: int = 0, quality: int = 0) -> Tuple[int, Optional[bytes]]:
+        """Returns (seq, jpeg) for the newest frame, encoding it if nobody has yet.
+
+        width/quality select a rendition (0 = native size / default quality).
+        Each rendition is encoded at most once per frame and shared by all callers.
+        """
+        frame = self.ring.latest()
+        if frame is None:
+            return 0, None
+        return self._jpeg_for(frame, width, quality)
+
+    def _jpeg_for(self, frame: Frame, width: int, quality: int) -> Tuple[int, Optional[bytes]]:
+        width, quality = self._normalize(width, quality)
+        if width == 0 and quality == 0:
+            return self._default_jpeg(frame)
+
+        key = (width, quality)
+        with self._lock_for(key):
+            cached = self._renditions.get(key)
+            if cached is not None and cached[0] == frame.seq:
+                return cached
+
+            pixels = self._pixels(frame)
+            if pixels is None:
+                return frame.seq, frame.jpeg
+
+            if width and width < pixels.shape[1]:
+                height = max(2, int(round(pixels.shape[0] * width / pixels.shape[1])))
+                pixels = cv2.resize(pixels, (width, height), interpolation=cv2.INTER_AREA)
+            elif quality == 0:
+                # Requested width is at or above native size: same as the default.
+                return self._default_jpeg(frame)
+
+            jpeg = self._encode(pixels, quality or self.quality)
+            if jpeg is None:
+                return self._default_jpeg(frame)
+            if not self.ring.is_current(frame):
+                # Slot was reused while we resized/encoded it; the bytes may mix two frames.
+                return frame.seq, None
+            # Each key only ever holds its newest frame, so this stays bounded.
+            self._renditions[key] = (frame.seq, jpeg)
+            return frame.seq, jpeg
+
+    def _default_jpeg(self, frame: Frame) -> Tuple[int, Optional[bytes]]:
+        if frame.jpeg is not None:
+            return frame.seq, frame.jpeg
+        with self._lock_for((0, 0)):
+            current = self.ring.get(frame.seq)
+            if current is not None and current.jpeg is not None:
+                return frame.seq, current.jpeg
+            if frame.pixels is None:
+                return frame.seq, None
+
+            jpeg = self._encode(frame.pixels, self.quality)
+            if jpeg is None or not self.ring.is_current(frame):
+                # Slot was reused mid-encode; the bytes may mix two frames.
+                return frame.seq, None
+            self.ring.attach(frame.seq, jpeg=jpeg)
+            return frame.seq, jpeg
+
+    def _encode(self, pixels, quality: int) -> Optional[bytes]:
+        started = time.perf_counter()
+        jpeg = self.encoder.encode(pixels, quality)
+        if self.latency:
+            self.latency.record("encode", (time.perf_counter() - started) * 1000)
+        return jpeg
+
+    def wait_for_frame(self, last_seq: int, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """Blocks until a frame newer than last_seq exists, then returns it.
+
+        Returns (last_seq, None) on timeout so callers can re-check their own state.
+        """
+        if self.ring.wait_newer(last_seq, timeout) is None:
+            return last_seq, None
+        return self.get_jpeg()
+
+    async def wait_newer(self, last_seq: int, timeout: float = 1.0) -> bool:
+        """Waits on the event loop until a frame newer than last_seq exists."""
+        if self.ring.seq > last_seq:
+            return True
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        try:
+            # Re-check after registering so a publish in between is not missed.
+            if self.ring.seq <= last_seq:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+    async def fetch(self, width: int = 0, quality: int = 0) -> Tuple[int, Optional[bytes], Optional[Frame]]:
+        """Returns (seq, jpeg, frame) for the newest frame; frame carries the capture timestamps."""
+        frame = self.ring.latest()
+        if frame is None:
+            return 0, None, None
+        if not width and not quality and frame.jpeg is not None:
+            return frame.seq, frame.jpeg, frame
+        # Encoding releases the GIL but still takes milliseconds; keep it off the loop.
+        seq, jpeg = await asyncio.to_thread(self._jpeg_for, frame, width, quality)
+        return seq, jpeg, frame
+
+    SNAPSHOT_CACHE = 8
+
+    def snapshot_etag(self, width: int = 0) -> Tuple[int, str]:
+        """(seq, ETag) the newest frame would be served with, without encoding anything."""
+        width, _ = self._normalize(width, 0)
+        seq = self.ring.seq
+        return seq, f'"{self.epoch:x}-{seq}-{width}"'
+
+    async def snapshot(self, width: int = 0) -> Optional[Snapshot]:
+        """The newest frame as a still, encoded once per frame and size for every poller."""
+        frame = self.ring.latest()
+        if frame is None:
+            return None
+        width, _ = self._normalize(width, 0)
+        key = (frame.seq, width)
+        cached = self._snapshots.get(key)
+        if cached is not None:
+            self.snapshot_hits += 1
+            return cached
+
+        seq, jpeg = await asyncio.to_thread(self._jpeg_for, frame, width, 0)
+        if jpeg is None:
+            return None
+        cached = self._snapshots.get(key)
+        if cached is not None:
+            # Another poller built it meanwhile (the encode itself was shared through the rendition locks)
+            self.snapshot_hits += 1
+            return cached
+        self.snapshot_misses += 1
+        snapshot = Snapshot(seq, jpeg, f'"{self.epoch:x}-{seq}-{width}"', frame.wall_time)
+        self._snapshots[key] = snapshot
+        while len(self._snapshots) > self.SNAPSHOT_CACHE:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+class AdaptiveRendition:
+    """Per-client rendition picker for ?auto streams.
+
+    Measures how long each multipart write takes to be accepted by the
+    transport and steps down the ladder when sending eats most of the frame
+    interval, stepping back up only after a sustained quiet period.
+    """
+
+    STEP_DOWN_UTILIZATION = 0.8
+    STEP_UP_UTILIZATION = 0.3
+    STEP_UP_HOLD = 3.0 # Seconds of headroom before trying a larger rendition
+
+    def __init__(self, ladder: List[Tuple[int, int]], frame_interval: float):
+        self.ladder = ladder
+        self.frame_interval = frame_interval
+        self.level = 0
+        self.throughput = 0.0 # bytes/s, EWMA
+        self._send_time = 0.0 # seconds per frame, EWMA
+        self._headroom_since: Optional[float] = None
+
+    @property
+    def rendition(self) -> Tuple[int, int]:
+        return self.ladder[self.level]
+
+    def record_send(self, size: int, elapsed: float):
+        elapsed = max(elapsed, 1e-4)
+        self._send_time = 0.7 * self._send_time + 0.3 * elapsed
+        self.throughput = 0.7 * self.throughput + 0.3 * (size / elapsed)
+
+        now = time.monotonic()
+        utilization = self._send_time / self.frame_interval
+        if utilization > self.STEP_DOWN_UTILIZATION and self.level < len(self.ladder) - 1:
+            self.level += 1
+            self._send_time = 0.0
+            self._headroom_since = None
+        elif utilization < self.STEP_UP_UTILIZATION and self.level > 0:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= self.STEP_UP_HOLD:
+                self.level -= 1
+                self._headroom_since = None
+        else:
+            self._headroom_since = None
@@ -1,12 +1,24 @@
 import cv2
+import multiprocessing
 import threading
 import time
-import numpy as np
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from .health import health_service
+from .broadcaster import FrameBroadcaster
+from .frame_ring import FrameRing
+from .shared_ring import SharedFrameRing
+from .capture_process import run_capture
+from .metrics import LatencyTracker, StageStats
+from .encoders import create_encoder
+from .camera_sim import FrameSimulator
 from ..logging.logger import logger
 from ..config.settings import settings
 
+# capture: device read / simulator render; encode: JPEG encode (per rendition);
+# queue: capture -> picked up by a stream; send: write accepted by the transport;
+# total: capture -> sent.
+LATENCY_STAGES = ("capture", "encode", "queue", "send", "total")
+
 class CameraService:
     def __init__(
         self,
@@ -18,6 +30,18 @@ class CameraService:
         pixel_format: str,
         simulation: bool,
         allow_real: bool,
+        passthrough: bool = False,
+        stream_max_fps: int = 30,
+        max_viewers: int = 4,
+        stream_ladder: Optional[List[Tuple[int, int]]] = None,
+        ring_size: int = 16,
+        encoder: str = "opencv",
+        encoder_workers: int = 0,
+        capture_process: bool = False,
+        idle_mode: str = "keepalive",
+        idle_fps: float = 1.0,
+        idle_after: float = 10.0,
+        warmup_frames: int = 4,
     ):
         self.name = name
         self.device_path = device_path
@@ -27,38 +51,337 @@ class CameraService:
         self.pixel_format = pixel_format
         self.simulation_mode = simulation
         self.allow_real = allow_real
+        self.passthrough = passthrough and pixel_format.upper() == "MJPG"
+        self.stream_max_fps = stream_max_fps
+        self.stream_ladder = stream_ladder or [(0, 70)]
         
         self.cap = None
-        self.frame = None
         self.stopped = False
         self.thread = None
         self.last_frame_time = 0
-        self.fps = 0
+        # Watchdog freshness (monotonic): last loop iteration, last frame, device opened
+        self.last_progress = time.monotonic()
+        self._last_frame_mono = 0.0
+        self._opened_at = 0.0
+        # Bumped to abandon a capture thread that is stuck in the driver
+        self._generation = 0
+        self.restarts = 0
         self.error = None
         self._last_state = None
         self._last_error_reported = None
+        self._passthrough_active = False
+        self._simulator: Optional[FrameSimulator] = None
+        self._frame_shape = (resolution[1], resolution[0], 3)
+        # Capture-process mode: a child process captures into a shared-memory ring
+        self.capture_process = capture_process
+        self.process = None
+        self.process_spawns = 0
+        self._device_open = False
+        self._conn = None # Pipe to the capture process
+        self._send_lock = threading.Lock()
+        # Standby while nobody consumes frames (see _check_idle)
+        self.idle_mode = idle_mode
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.warmup_frames = warmup_frames
+        self.idle = False
+        # Consumers that need frames at a low rate even in standby (parking sentinel): owner -> fps
+        self._rate_holds: Dict[str, float] = {}
+        self.standby_entries = 0
+        self.first_frame_ms = StageStats(window=32) # Demand after standby -> first fresh frame published
+        self._idle_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._demand_ended = time.monotonic()
+        self._demand_at: Optional[float] = None
+        self._resumed_at = 0.0
+        self._flush_pending = False
+        self.ring = self._create_ring(ring_size)
+        self.latency = LatencyTracker(LATENCY_STAGES)
+        self.encoder = create_encoder(encoder, encoder_workers, name=name)
+        self.broadcaster = FrameBroadcaster(name, self.ring, max_viewers=max_viewers,
+                                            latency=self.latency, encoder=self.encoder)
+        self.broadcaster.demand_listener = self._on_demand
+
+    def _create_ring(self, ring_size: int) -> FrameRing:
+        if self.capture_process:
+            ring = SharedFrameRing(ring_size, slot_bytes=self.resolution[0] * self.resolution[1] * 3)
+            try:
+                ring.create()
+                return ring
+            except OSError as e:
+                self.capture_process = False
+                logger.log(self.name, "Shared memory unavailable for capture process", level="WARN",
+                           reason=str(e), action="Capturing on a thread instead")
+        return FrameRing(ring_size)
 
     def start(self):
         self.stopped = False
-        self.thread = threading.Thread(target=self._update, daemon=True, name=f"CameraThread-{self.name}")
+        self._start_thread()
+        mode = "process" if self.capture_process else "thread"
+        logger.log(self.name, f"Camera {mode} started for {self.name} targeting {self._target_label()}")
+
+    def _start_thread(self):
+        self._generation += 1
+        self.last_progress = time.monotonic()
+        if self.capture_process:
+            target, name = self._supervise, f"CaptureSupervisor-{self.name}"
+        else:
+            target, name = self._update, f"CameraThread-{self.name}"
+        self.thread = threading.Thread(target=target, args=(self._generation,), daemon=True, name=name)
         self.thread.start()
-        logger.log(self.name, f"Camera thread started for {self.name} targeting {self._target_label()}")
+
+    def restart(self, reason: str):
+        """Replaces a capture thread that stopped delivering frames (called by the watchdog).
+
+        A thread blocked inside the driver cannot be interrupted, so it is
+        abandoned instead: it keeps its own capture handle and releases it once
+        the read returns. The new thread opens the device afresh. In
+        capture-process mode the stuck process is killed outright.
+        """
+        self.restarts += 1
+        self.cap = None
+        self._last_state = None
+        process = self.process
+        if process is not None:
+            process.kill()
+        self._start_thread()
+
+    def freshness(self):
+        if self.stopped or self.thread is None:
+            return None
+        if self.idle and self._releases():
+            return None # Device released on purpose
+        now = time.monotonic()
+        if (self.cap is not None or self._device_open) and not self.idle:
+            # Streaming from hardware: every loop iteration should yield a frame
+            return True, now - max(self._last_frame_mono, self._opened_at, self._resumed_at)
+        return False, now - self.last_progress
+
+    def _on_demand(self, demand: int):
+        if demand == 0:
+            self._demand_ended = time.monotonic()
+        else:
+            self._check_idle()
+
+    def _wanted(self) -> bool:
+        if self.idle_mode == "off" or self.broadcaster.demand > 0:
+            return True
+        return time.monotonic() - self._demand_ended < self.idle_after
+
+    def _check_idle(self) -> bool:
+        """Enters or leaves standby to match demand; returns whether capture is idle.
+
+        Called from the capture loop (or the capture-process relay) every
+        iteration, which handles the grace period, and straight from the
+        request that brings the first viewer so capture resumes at once.
+        """
+        with self._idle_lock:
+            idle = not self._wanted()
+            if idle == self.idle:
+                return idle
+            self.idle = idle
+            if idle:
+                self.standby_entries += 1
+                logger.log(self.name, "No viewers, entering standby", level="INFO",
+                           action="Releasing the device" if self._releases()
+                           else f"Keepalive at {self._standby_fps():g} fps")
+            else:
+                # Also restarts the hang clock: a released capture process reports nothing while idle
+                self._demand_at = self._resumed_at = self.last_progress = time.monotonic()
+                self._flush_pending = True
+                logger.log(self.name, "Viewer connected, resuming full-rate capture", level="INFO",
+                           action=f"Warm-up: dropping {self.warmup_frames} buffered frames")
+        self._standby_changed()
+        return idle
+
+    def hold_rate(self, owner: str, fps: float):
+        """Keeps standby capture at fps or more (never releasing the device) until release_rate(owner)."""
+        # Replaced rather than mutated: the capture loop reads it without a lock
+        self._rate_holds = {**self._rate_holds, owner: fps}
+        self._standby_changed()
+
+    def release_rate(self, owner: str):
+        if owner in self._rate_holds:
+            self._rate_holds = {k: v for k, v in self._rate_holds.items() if k != owner}
+            self._standby_changed()
+
+    def _standby_fps(self) -> float:
+        return max([self.idle_fps, *self._rate_holds.values()])
+
+    def _releases(self) -> bool:
+        return self.idle_mode == "release" and not self._rate_holds
+
+    def _standby_changed(self):
+        self._wake.set()
+        self._notify_child(("standby", self.idle, self._standby_fps(), self._releases()))
+
+    def _frame_interval(self) -> float:
+        return 1 / self._standby_fps() if self.idle else 1 / self.framerate
+
+    def _pace(self, interval: float):
+        """Sleeps between frames; a viewer arriving during standby cuts it short."""
+        if self._wake.wait(interval):
+            self._wake.clear()
+
+    def _standby_message(self, message: Optional[str] = None) -> Optional[str]:
+        return f"Standby, keepalive at {self._standby_fps():g} fps" if self.idle else message
+
+    def _discard_buffered(self, cap):
+        # grab() dequeues a driver buffer without decoding it
+        for _ in range(self.warmup_frames):
+            if not cap.grab():
+                break
 
     def stop(self):
         self.stopped = True
+        self._wake.set()
         if self.thread:
             self.thread.join(timeout=2)
         if self.cap:
             self.cap.release()
+        process = self.process
+        if process is not None and process.is_alive():
+            process.kill()
+
+    def _supervise(self, generation: int):
+        """Capture-process mode: keeps a capture process running and relays what it reports.
+
+        A process that dies (driver crash, OOM kill) counts as a failure in
+        HealthService and is respawned while the subsystem may still retry;
+        once it is FAULTY nothing is spawned until it is reset.
+        """
+        context = multiprocessing.get_context("spawn") # Never fork the API process's threads
+        while not self.stopped and generation == self._generation:
+            self.last_progress = time.monotonic()
+            if not health_service.should_retry(self.name):
+                time.sleep(1)
+                continue
+
+            conn, child_conn = context.Pipe()
+            self._conn = conn # Before reading self.idle for the options, so no transition is missed
+            process = context.Process(target=run_capture, name=f"Capture-{self.name}", daemon=True,
+                                      args=(self._capture_options(), self.ring.name, self.ring.seq, child_conn))
+            process.start()
+            child_conn.close()
+            self.process = process
+            self.process_spawns += 1
+            logger.log(self.name, f"Capture process started (pid {process.pid})", level="INFO",
+                       action=f"Frames shared through {self.ring.name}")
+
+            exit_reason = self._relay(process, conn, generation)
+            self._end_process(process, conn)
+            if exit_reason is None or self.stopped or generation != self._generation:
+                return
+            self._set_state("WAITING", message="Capture process exited, restarting", error=exit_reason)
+            time.sleep(1)
+
+    def _relay(self, process, conn, generation: int) -> Optional[str]:
+        """Handles the child's messages until it exits (returns why) or this thread is retired (None)."""
+        from .simulation import simulation_service
+        simulation_sent = None
+        while not self.stopped and generation == self._generation:
+            self._check_idle() # Grace period expiry; resuming is pushed by _on_demand
+            simulation = (simulation_service.active, simulation_service.start_time)
+            try:
+                if simulation != simulation_sent:
+                    self._notify_child(("simulation", *simulation))
+                    simulation_sent = simulation
+                if not conn.poll(0.5):
+                    if process.is_alive():
+                        continue
+                    break
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            self.last_progress = time.monotonic()
+            self._handle_message(message)
+        else:
+            return None
+        process.join(timeout=1)
+        return f"Capture process exited with code {process.exitcode}"
 
-    def _update(self):
-        while not self.stopped:
+    def _handle_message(self, message):
+        kind = message[0]
+        if kind == "frame":
+            _, seq, timestamp, capture_ms = message
+            self.broadcaster.publish_committed(seq)
+            self._frame_published(timestamp)
+            self.latency.record("capture", capture_ms)
+            health_service.heartbeat(self.name)
+        elif kind == "state":
+            self._set_state(message[1], message=message[2], error=message[3])
+        elif kind == "device":
+            self._device_open = message[1]
+            if self._device_open:
+                self._opened_at = time.monotonic()
+        elif kind == "passthrough":
+            self._passthrough_active = message[1]
+        elif kind == "log":
+            _, text, level, reason, action = message
+            logger.log(self.name, text, level=level, reason=reason, action=action)
+
+    def _notify_child(self, message):
+        conn = self._conn
+        if conn is None:
+            return
+        # Sent from the relay thread and from request handlers (demand changes)
+        with self._send_lock:
+            try:
+                conn.send(message)
+            except OSError:
+                pass
+
+    def _end_process(self, process, conn):
+        with self._send_lock:
+            if self._conn is conn:
+                self._conn = None
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        process.join(timeout=1)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=1)
+        conn.close()
+        self._device_open = False
+        if self.process is process:
+            self.process = None
+
+    def _capture_options(self):
+        return {
+            "name": self.name,
+            "device_path": self.device_path,
+            "device_index": self.device_index,
+            "resolution": self.resolution,
+            "framerate": self.framerate,
+            "pixel_format": self.pixel_format,
+            "simulation": self.simulation_mode,
+            "allow_real": self.allow_real,
+            "passthrough": self.passthrough,
+            "idle": self.idle,
+            "idle_fps": self._standby_fps(),
+            "idle_release": self._releases(),
+            "warmup_frames": self.warmup_frames,
+        }
+
+    def _update(self, generation: int):
+        while not self.stopped and generation == self._generation:
             from .simulation import simulation_service
-            
+            self.last_progress = time.monotonic()
+
+            idle = self._check_idle()
+            if idle and self._releases():
+                self._release_capture()
+                self._set_state("ACTIVE", message="Standby, device released")
+                self._pace(1.0)
+                continue
+            interval = self._frame_interval()
+
             if simulation_service.active:
                 self._simulate_frame()
-                self._set_state("ACTIVE", message="Simulation Override")
-                time.sleep(1 / self.framerate)
+                self._set_state("ACTIVE", message=self._standby_message("Simulation Override"))
+                self._pace(interval)
                 continue
 
             prefer_sim = self.simulation_mode and not self.allow_real
@@ -66,40 +389,61 @@ class CameraService:
 
             if prefer_sim:
                 self._simulate_frame()
-                self._set_state("ACTIVE", message="Simulation Mode")
-                time.sleep(1 / self.framerate)  # Match target FPS
+                self._set_state("ACTIVE", message=self._standby_message("Simulation Mode"))
+                self._pace(interval)  # Match target FPS
                 continue
 
             # Real Hardware Path
             if self.cap is None or not self.cap.isOpened():
-                self._connect()
+                self._connect(generation)
                 if self.cap is None:
                     if allow_sim_fallback:
                         self._simulate_frame()
                         self._set_state("WAITING", message="Camera unavailable, simulation fallback")
-                        time.sleep(1 / self.framerate)
+                        self._pace(interval)
                     else:
                         time.sleep(2)
                     continue
 
-            ret, frame = self.cap.read()
+            cap = self.cap
+            if self._flush_pending or idle:
+                # Buffers queued while idle (or since opening) are stale
+                self._flush_pending = False
+                self._discard_buffered(cap)
+            read_started = time.monotonic()
+            if self._passthrough_active:
+                ret, frame = cap.read()
+            else:
+                # Decode straight into the next ring slot's buffer.
+                ret, frame = cap.read(self.ring.writable(self._frame_shape))
+            captured = time.monotonic()
+            if generation != self._generation:
+                cap.release() # Abandoned by the watchdog while stuck in read()
+                return
             if not ret:
                 self._set_state("WAITING", message="Capture interrupted", error="Failed to grab frame")
                 self._release_capture()
                 if allow_sim_fallback:
                     self._simulate_frame()
                     self._set_state("ACTIVE", message="Simulation fallback (hardware missing)")
-                    time.sleep(1 / self.framerate)
+                    self._pace(interval)
                 else:
                     time.sleep(1)
                 continue
 
-            self.frame = frame
-            self.last_frame_time = time.time()
-            self.fps = self.framerate
-            self._set_state("ACTIVE")
+            if self._passthrough_active:
+                if not self._publish_passthrough(frame, captured):
+                    continue
+            else:
+                self._frame_shape = frame.shape
+                self._publish(frame, captured)
+            # Includes waiting for the device to deliver the frame (bounded by the frame interval).
+            self.latency.record("capture", (captured - read_started) * 1000)
+            self._set_state("ACTIVE", message=self._standby_message())
+            if idle:
+                self._pace(interval)
 
-    def _connect(self):
+    def _connect(self, generation: int):
         target = self.device_path if self.device_path else self.device_index
 
         if target is None:
@@ -115,10 +459,16 @@ class CameraService:
                 action=f"Requesting {self.pixel_format} {self.resolution[0]}x{self.resolution[1]} @ {self.framerate}fps",
             )
             
-            self.cap = cv2.VideoCapture(target)
+            cap = cv2.VideoCapture(target)
+            if generation != self._generation:
+                cap.release() # The watchdog gave up on this thread while the open hung
+                return
+            self.cap = cap
             if self.cap.isOpened():
+                self._opened_at = time.monotonic()
                 self._configure_capture()
                 self.error = None
+                self._flush_pending = True # Let exposure settle before the first frame
                 self._set_state("ACTIVE", message="Camera connected")
             else:
                 self.cap = None
@@ -134,6 +484,15 @@ class CameraService:
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
         self.cap.set(cv2.CAP_PROP_FPS, self.framerate)
 
+        # With RGB conversion disabled the V4L2 backend hands back the raw
+        # MJPG buffer from the driver's mmap queue instead of decoded pixels.
+        self._passthrough_active = False
+        if self.passthrough:
+            self._passthrough_active = bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+            if not self._passthrough_active:
+                logger.log(self.name, "MJPEG passthrough unsupported by capture backend", level="WARN",
+                           action="Falling back to decode/re-encode path")
+
     def _release_capture(self):
         if self.cap:
             self.cap.release()
@@ -169,55 +528,96 @@ class CameraService:
 
     def _simulate_frame(self):
         from .simulation import simulation_service
-        
-        # Create a test pattern with moving elements
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        t = time.time()
-        
+
+        if self._simulator is None:
+            self._simulator = FrameSimulator(self.name, self.resolution)
+
         # Moving circle - uses global simulation cycle for responsiveness
-        cycle = simulation_service.get_cycle_value()
-        
-        if self.name == "camera_rear":
-            # Rear pattern: Orbiting circle
-            cx = int(320 + 200 * np.cos(t * 2))
-            cy = int(240 + 150 * np.sin(t * 2))
-            cv2.circle(frame, (cx, cy), 50, (0, 210, 255), -1)
-            cv2.putText(frame, "REAR CAMERA SIMULATION", (150, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        else:
-            # Front pattern: Pulsing circle in center
-            radius = int(50 + 100 * cycle)
-            cv2.circle(frame, (320, 240), radius, (255, 100, 0), 2)
-            cv2.circle(frame, (320, 240), 10, (255, 255, 255), -1)
-            cv2.putText(frame, "FRONT CAMERA SIMULATION", (150, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        started = time.monotonic()
+        out = self.ring.writable((self._simulator.height, self._simulator.width, 3))
+        frame = self._simulator.render(time.time(), simulation_service.get_cycle_value(), out=out)
+        captured = time.monotonic()
+        self._publish(frame, captured)
+        self.latency.record("capture", (captured - started) * 1000)
 
-        cv2.putText(frame, f"TIME: {time.strftime('%H:%M:%S')}", (20, 450), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-        
-        # Add some "analog noise"
-        noise = np.random.randint(0, 10, (480, 640, 3), dtype=np.uint8)
-        frame = cv2.add(frame, noise)
+    def _publish_passthrough(self, buffer, timestamp: float) -> bool:
+        data = buffer.tobytes() if buffer is not None else b""
+        if not data.startswith(b"\xff\xd8"):
+            # The driver decoded anyway (or delivered a non-JPEG format); switch
+            # back to the regular path rather than streaming garbage.
+            logger.log(self.name, "Capture buffer is not JPEG; disabling MJPEG passthrough", level="WARN",
+                       reason=f"Unexpected buffer shape {getattr(buffer, 'shape', None)}",
+                       action="Re-enabling RGB conversion")
+            self._passthrough_active = False
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            return False
+
+        self.broadcaster.publish_jpeg(data, timestamp)
+        self._frame_published(timestamp)
+        return True
 
-        self.frame = frame
-        self.last_frame_time = t
+    def _publish(self, frame, timestamp: float):
+        self.broadcaster.publish(frame, timestamp)
+        self._frame_published(timestamp)
+
+    def _frame_published(self, timestamp: float):
+        self.last_frame_time = time.time()
+        self._last_frame_mono = timestamp
+        demand_at = self._demand_at
+        if demand_at is not None and timestamp >= demand_at and not self.idle:
+            self._demand_at = None
+            self.first_frame_ms.record((time.monotonic() - demand_at) * 1000)
+
+    async def ensure_fresh(self, max_age: float, timeout: float = 3.0):
+        """Wakes a camera in standby for one fresh frame if the newest is older than max_age.
+
+        The standby grace period then keeps it capturing for a while, so a
+        poller asking every few seconds does not pay the warm-up each time.
+        """
+        frame = self.ring.latest()
+        if not self.idle or (frame is not None and time.monotonic() - frame.timestamp <= max_age):
+            return
+        self.broadcaster.subscribe()
+        try:
+            await self.broadcaster.wait_newer(frame.seq if frame else 0, timeout)
+        finally:
+            self.broadcaster.unsubscribe()
 
     def get_frame(self):
-        if self.frame is None:
-            return None
-        ret, jpeg = cv2.imencode('.jpg', self.frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-        if not ret:
-            return None
-        return jpeg.tobytes()
+        _, jpeg = self.broadcaster.get_jpeg()
+        return jpeg
+
+    def get_pixels(self):
+        return self.broadcaster.get_pixels()
 
     def get_status(self):
         from .simulation import simulation_service
         return {
-            "detected": self.cap is not None or self.simulation_mode or simulation_service.active,
+            "detected": self.cap is not None or self._device_open or self.simulation_mode or simulation_service.active,
             "last_frame_time": self.last_frame_time,
-            "fps": self.fps,
+            "fps": round(self.ring.measured_fps(), 1),
+            "target_fps": self.framerate,
+            "frame_age": self.ring.frame_age(),
+            "frame_seq": self.ring.seq,
             "resolution": f"{self.resolution[0]}x{self.resolution[1]}",
             "error": self.error,
             "simulation": self.simulation_mode or simulation_service.active,
             "device": self._target_label(),
             "pixel_format": self.pixel_format,
+            "passthrough": self._passthrough_active,
+            "encoder": self.encoder.name,
+            "viewers": self.broadcaster.viewers,
+            "snapshots": {"hits": self.broadcaster.snapshot_hits, "misses": self.broadcaster.snapshot_misses},
+            "restarts": self.restarts,
+            "demand": self.broadcaster.demand,
+            "idle": self.idle,
+            "standby_entries": self.standby_entries,
+            "rate_holds": dict(self._rate_holds),
+            "first_frame_ms": self.first_frame_ms.summary(),
+            "capture_process": {
+                "pid": self.process.pid if self.process else None,
+                "spawns": self.process_spawns,
+            } if self.capture_process else None,
         }
 
 camera_rear = CameraService(
@@ -229,6 +629,18 @@ camera_rear = CameraService(
     pixel_format=settings.camera_rear.pixel_format,
     simulation=settings.camera_rear.simulation,
     allow_real=settings.camera_rear.allow_real,
+    passthrough=settings.camera_rear.passthrough,
+    stream_max_fps=settings.camera_rear.stream_max_fps,
+    max_viewers=settings.camera_rear.max_viewers,
+    stream_ladder=[(r.width, r.quality) for r in settings.camera_rear.stream_ladder],
+    ring_size=settings.camera_rear.ring_size,
+    encoder=settings.camera_rear.encoder,
+    encoder_workers=settings.camera_rear.encoder_workers,
+    capture_process=settings.camera_rear.capture_process,
+    idle_mode=settings.camera_rear.idle_mode,
+    idle_fps=settings.camera_rear.idle_fps,
+    idle_after=settings.camera_rear.idle_after_seconds,
+    warmup_frames=settings.camera_rear.warmup_frames,
 )
 
 camera_front = CameraService(
@@ -240,4 +652,16 @@ camera_front = CameraService(
     pixel_format=settings.camera_front.pixel_format,
     simulation=settings.camera_front.simulation,
     allow_real=settings.camera_front.allow_real,
+    passthrough=settings.camera_front.passthrough,
+    stream_max_fps=settings.camera_front.stream_max_fps,
+    max_viewers=settings.camera_front.max_viewers,
+    stream_ladder=[(r.width, r.quality) for r in settings.camera_front.stream_ladder],
+    ring_size=settings.camera_front.ring_size,
+    encoder=settings.camera_front.encoder,
+    encoder_workers=settings.camera_front.encoder_workers,
+    capture_process=settings.camera_front.capture_process,
+    idle_mode=settings.camera_front.idle_mode,
+    idle_fps=settings.camera_front.idle_fps,
+    idle_after=settings.camera_front.idle_after_seconds,
+    warmup_frames=settings.camera_front.warmup_frames,
 )
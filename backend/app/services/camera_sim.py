@@ -0,0 +1,91 @@
+import cv2
+import math
+import time
+import numpy as np
+from typing import Optional, Tuple
+
+class FrameSimulator:
+    """Renders the simulated camera test pattern without per-frame allocations.
+
+    Everything is sized from the configured resolution and allocated up front:
+    a background with the static title already drawn, a pool of noise tiles
+    that are rotated through, a cached strip for the clock overlay (redrawn
+    once per second) and a small set of output buffers used round-robin so a
+    frame that has just been published is not overwritten while viewers read it.
+    The camera service passes its ring slot buffers in directly instead.
+    """
+
+    NOISE_TILES = 4
+    OUTPUT_BUFFERS = 4
+    NOISE_LEVEL = 10
+
+    def __init__(self, name: str, resolution: Tuple[int, int]):
+        self.name = name
+        self.width, self.height = int(resolution[0]), int(resolution[1])
+        # The pattern was designed for 640x480; scale positions and sizes from there.
+        self._sx = self.width / 640.0
+        self._sy = self.height / 480.0
+        self._scale = min(self._sx, self._sy)
+
+        shape = (self.height, self.width, 3)
+        self._background = np.zeros(shape, dtype=np.uint8)
+        title = "REAR CAMERA SIMULATION" if name == "camera_rear" else "FRONT CAMERA SIMULATION"
+        cv2.putText(self._background, title, self._point(150, 50), cv2.FONT_HERSHEY_SIMPLEX,
+                    self._scale, (255, 255, 255), max(1, int(round(2 * self._scale))))
+
+        rng = np.random.default_rng()
+        self._noise = [rng.integers(0, self.NOISE_LEVEL, shape, dtype=np.uint8) for _ in range(self.NOISE_TILES)]
+        self._noise_index = 0
+
+        self._outputs = None # Only needed when the caller does not supply buffers
+        self._output_index = 0
+
+        # Clock overlay strip, re-rendered only when the displayed second changes.
+        x0, y0 = self._point(20, 432)
+        x1, y1 = self._point(220, 458)
+        self._clock_region = (slice(y0, min(y1, self.height)), slice(x0, min(x1, self.width)))
+        self._clock_strip = np.zeros(self._background[self._clock_region].shape, dtype=np.uint8)
+        self._clock_text = None
+
+    def _point(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x * self._sx), int(y * self._sy)
+
+    def _update_clock(self):
+        text = f"TIME: {time.strftime('%H:%M:%S')}"
+        if text == self._clock_text:
+            return
+        self._clock_text = text
+        self._clock_strip.fill(0)
+        baseline = self._clock_strip.shape[0] - int(8 * self._sy)
+        cv2.putText(self._clock_strip, text, (0, baseline), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5 * self._scale, (200, 200, 200), 1)
+
+    def render(self, t: float, cycle: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Draws a frame into out (e.g. a FrameRing slot) or the next internal buffer."""
+        if out is not None and out.shape == self._background.shape:
+            frame = out
+        else:
+            if self._outputs is None:
+                self._outputs = [np.empty_like(self._background) for _ in range(self.OUTPUT_BUFFERS)]
+            frame = self._outputs[self._output_index]
+            self._output_index = (self._output_index + 1) % self.OUTPUT_BUFFERS
+
+        np.copyto(frame, self._background)
+        cx, cy = self.width // 2, self.height // 2
+
+        if self.name == "camera_rear":
+            # Rear pattern: Orbiting circle
+            center = (int(cx + 200 * self._sx * math.cos(t * 2)), int(cy + 150 * self._sy * math.sin(t * 2)))
+            cv2.circle(frame, center, int(50 * self._scale), (0, 210, 255), -1)
+        else:
+            # Front pattern: Pulsing circle in center
+            cv2.circle(frame, (cx, cy), int((50 + 100 * cycle) * self._scale), (255, 100, 0), 2)
+            cv2.circle(frame, (cx, cy), int(10 * self._scale), (255, 255, 255), -1)
+
+        self._update_clock()
+        np.copyto(frame[self._clock_region], self._clock_strip)
+
+        # Add some "analog noise" in place, rotating through the precomputed tiles
+        cv2.add(frame, self._noise[self._noise_index], dst=frame)
+        self._noise_index = (self._noise_index + 1) % self.NOISE_TILES
+        return frame
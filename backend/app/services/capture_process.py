@@ -0,0 +1,242 @@
+import cv2
+import time
+from typing import Any, Dict, Optional
+from .camera_sim import FrameSimulator
+from .shared_ring import SharedFrameRing
+from .simulation import simulation_service
+
+# Runs in the child process: only import what capture needs. The logger,
+# health and settings singletons belong to the API process and are reached
+# through messages on the pipe instead.
+
+def run_capture(options: Dict[str, Any], ring_name: str, start_seq: int, conn):
+    """Entry point of a camera's capture process (see CameraService capture_process mode)."""
+    worker = CaptureWorker(options, SharedFrameRing.open(ring_name, start_seq), conn)
+    try:
+        worker.run()
+    except (EOFError, BrokenPipeError):
+        pass # The API process went away or closed the pipe
+    finally:
+        worker.release()
+
+class CaptureWorker:
+    """The capture loop of one camera, in its own process and with its own GIL.
+
+    Follows CameraService's threaded loop: simulation override, simulated
+    source, hardware with optional simulation fallback, MJPEG passthrough.
+    Frames are written into the shared ring (pixels are read into the slot
+    directly) and everything else goes to the API process over the pipe:
+      ("frame", seq, timestamp, capture_ms)
+      ("state", state, message, error)   sent on change and on every error
+      ("device", opened)
+      ("passthrough", active)
+      ("log", message, level, reason, action)
+    The API process sends ("simulation", active, start_time), ("standby",
+    idle, fps, release) (decided there, from viewer demand) and ("stop",).
+    """
+
+    def __init__(self, options: Dict[str, Any], ring: SharedFrameRing, conn):
+        self.name = options["name"]
+        self.device_path = options["device_path"]
+        self.device_index = options["device_index"]
+        self.resolution = tuple(options["resolution"])
+        self.framerate = options["framerate"]
+        self.pixel_format = options["pixel_format"]
+        self.simulation_mode = options["simulation"]
+        self.allow_real = options["allow_real"]
+        self.passthrough = options["passthrough"]
+        self.idle = options["idle"]
+        self.idle_fps = options["idle_fps"]
+        self.idle_release = options["idle_release"]
+        self.warmup_frames = options["warmup_frames"]
+        self.ring = ring
+        self.conn = conn
+        self.cap = None
+        self.stopped = False
+        self._passthrough_active = False
+        self._simulator: Optional[FrameSimulator] = None
+        self._frame_shape = (self.resolution[1], self.resolution[0], 3)
+        self._last_state = None
+        self._flush_pending = False
+
+    def run(self):
+        while not self.stopped:
+            self._receive()
+
+            idle = self.idle
+            if idle and self.idle_release:
+                self.release()
+                self._set_state("ACTIVE", message="Standby, device released")
+                self._pace(1.0)
+                continue
+            interval = 1 / self.idle_fps if idle else 1 / self.framerate
+
+            if simulation_service.active:
+                self._simulate_frame()
+                self._set_state("ACTIVE", message=self._standby_message("Simulation Override"))
+                self._pace(interval)
+                continue
+
+            prefer_sim = self.simulation_mode and not self.allow_real
+            allow_sim_fallback = self.simulation_mode and self.allow_real
+
+            if prefer_sim:
+                self._simulate_frame()
+                self._set_state("ACTIVE", message=self._standby_message("Simulation Mode"))
+                self._pace(interval)
+                continue
+
+            if self.cap is None or not self.cap.isOpened():
+                self._connect()
+                if self.cap is None:
+                    if allow_sim_fallback:
+                        self._simulate_frame()
+                        self._set_state("WAITING", message="Camera unavailable, simulation fallback")
+                        self._pace(interval)
+                    else:
+                        time.sleep(2)
+                    continue
+
+            if self._flush_pending or idle:
+                # Buffers queued while idle (or since opening) are stale
+                self._flush_pending = False
+                for _ in range(self.warmup_frames):
+                    if not self.cap.grab():
+                        break
+            read_started = time.monotonic()
+            if self._passthrough_active:
+                ret, frame = self.cap.read()
+            else:
+                ret, frame = self.cap.read(self.ring.writable(self._frame_shape))
+            captured = time.monotonic()
+            if not ret:
+                self._set_state("WAITING", message="Capture interrupted", error="Failed to grab frame")
+                self.release()
+                if allow_sim_fallback:
+                    self._simulate_frame()
+                    self._set_state("ACTIVE", message="Simulation fallback (hardware missing)")
+                    self._pace(interval)
+                else:
+                    time.sleep(1)
+                continue
+
+            if self._passthrough_active:
+                if not self._publish_passthrough(frame, captured, read_started):
+                    continue
+            else:
+                self._publish(self._fit(frame), captured, read_started)
+            self._set_state("ACTIVE", message=self._standby_message())
+            if idle:
+                self._pace(interval)
+
+    def _receive(self):
+        while self.conn.poll():
+            message = self.conn.recv()
+            if message[0] == "simulation":
+                simulation_service.active, simulation_service.start_time = message[1], message[2]
+            elif message[0] == "standby":
+                resumed = self.idle and not message[1]
+                self.idle, self.idle_fps, self.idle_release = message[1], message[2], message[3]
+                self._flush_pending = self._flush_pending or resumed
+            elif message[0] == "stop":
+                self.stopped = True
+
+    def _pace(self, interval: float):
+        # Waits on the pipe rather than sleeping so that leaving standby takes effect at once.
+        self.conn.poll(interval)
+
+    def _standby_message(self, message: Optional[str] = None) -> Optional[str]:
+        return f"Standby, keepalive at {self.idle_fps:g} fps" if self.idle else message
+
+    def _send(self, *message):
+        self.conn.send(message)
+
+    def _log(self, message: str, level: str = "INFO", reason: Optional[str] = None, action: Optional[str] = None):
+        self._send("log", message, level, reason, action)
+
+    def _set_state(self, state: str, message: Optional[str] = None, error: Optional[str] = None):
+        # Repeats are implied by the frame messages; errors always count towards supervision.
+        if error is None and (state, message) == self._last_state:
+            return
+        self._last_state = (state, message)
+        self._send("state", state, message, error)
+
+    def _connect(self):
+        target = self.device_path if self.device_path else self.device_index
+        if target is None:
+            self._set_state("FAULTY", message="No camera target configured", error="Camera target missing")
+            return
+
+        self._log(f"Opening camera at {target}", action=f"Requesting {self.pixel_format} "
+                  f"{self.resolution[0]}x{self.resolution[1]} @ {self.framerate}fps (capture process)")
+        cap = cv2.VideoCapture(target)
+        if not cap.isOpened():
+            self._set_state("WAITING", message="Camera unavailable", error=f"Camera unavailable at {target}")
+            return
+        self.cap = cap
+        self._configure_capture()
+        self._flush_pending = True # Let exposure settle before the first frame
+        self._send("device", True)
+        self._set_state("ACTIVE", message="Camera connected")
+
+    def _configure_capture(self):
+        fourcc = cv2.VideoWriter_fourcc(*self.pixel_format)
+        self.cap.set(cv2.CAP_PROP_FOURCC, fourcc)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        self.cap.set(cv2.CAP_PROP_FPS, self.framerate)
+
+        self._passthrough_active = False
+        if self.passthrough:
+            self._passthrough_active = bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+            if not self._passthrough_active:
+                self._log("MJPEG passthrough unsupported by capture backend", level="WARN",
+                          action="Falling back to decode/re-encode path")
+        self._send("passthrough", self._passthrough_active)
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+            try:
+                self._send("device", False)
+            except (OSError, ValueError):
+                pass
+
+    def _fit(self, frame):
+        if frame.shape == self._frame_shape:
+            return frame
+        # The driver delivered another size than requested and reallocated the buffer.
+        if self.ring.fits(frame.shape):
+            self._frame_shape = frame.shape
+            return frame
+        self._log(f"Device delivers {frame.shape[1]}x{frame.shape[0]}, larger than configured", level="WARN",
+                  reason="Frame does not fit the shared ring slots",
+                  action=f"Scaling to {self.resolution[0]}x{self.resolution[1]}")
+        return cv2.resize(frame, self.resolution, interpolation=cv2.INTER_AREA)
+
+    def _simulate_frame(self):
+        if self._simulator is None:
+            self._simulator = FrameSimulator(self.name, self.resolution)
+        started = time.monotonic()
+        out = self.ring.writable((self._simulator.height, self._simulator.width, 3))
+        frame = self._simulator.render(time.time(), simulation_service.get_cycle_value(), out=out)
+        self._publish(frame, time.monotonic(), started)
+
+    def _publish_passthrough(self, buffer, timestamp: float, started: float) -> bool:
+        data = buffer.tobytes() if buffer is not None else b""
+        if not data.startswith(b"\xff\xd8") or len(data) > self.ring.slot_bytes:
+            self._log("Capture buffer is not JPEG; disabling MJPEG passthrough", level="WARN",
+                      reason=f"Unexpected buffer shape {getattr(buffer, 'shape', None)}",
+                      action="Re-enabling RGB conversion")
+            self._passthrough_active = False
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            self._send("passthrough", False)
+            return False
+        seq = self.ring.commit(jpeg=data, timestamp=timestamp)
+        self._send("frame", seq, timestamp, (timestamp - started) * 1000)
+        return True
+
+    def _publish(self, frame, timestamp: float, started: float):
+        seq = self.ring.commit(pixels=frame, timestamp=timestamp)
+        self._send("frame", seq, timestamp, (timestamp - started) * 1000)
@@ -0,0 +1,163 @@
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+class RollingExtreme:
+    """Sliding-window min and max via monotonic deques: amortized O(1) per sample.
+
+    Each deque holds (time, value) candidates in order; a sample is pushed and
+    popped at most once, so the cost does not depend on window length.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window = window_seconds
+        self._min: deque = deque()
+        self._max: deque = deque()
+
+    def update(self, timestamp: float, value: float):
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        cutoff = timestamp - self.window
+        while self._min[0][0] < cutoff:
+            self._min.popleft()
+        while self._max[0][0] < cutoff:
+            self._max.popleft()
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def reset(self):
+        self._min.clear()
+        self._max.clear()
+
+class DerivedTelemetry:
+    """Streaming metrics derived from the polled PIDs, updated in O(1) per sample.
+
+    Fed each poll's values (only the PIDs sampled that cycle), it keeps just
+    the previous sample of each input plus running sums and EWMA states:
+      ACCELERATION   m/s^2 from SPEED deltas, EWMA-smoothed
+      GEAR           nearest configured gear for the smoothed RPM/SPEED ratio
+      FUEL_RATE      L/h from MAF (air mass / AFR / fuel density)
+      ECONOMY        instantaneous L/100km (while moving)
+      TRIP_DISTANCE, TRIP_FUEL, TRIP_ECONOMY   integrated since the trip began
+      <PID>_MIN/_MAX rolling extremes over the last rolling_window seconds
+    A gap in samples longer than trip_gap_seconds starts a new trip.
+    """
+
+    def __init__(self, gear_ratios: List[float], afr: float = 14.7, fuel_density: float = 745.0,
+                 smoothing_seconds: float = 1.0, rolling_window: float = 60.0,
+                 rolling_pids: Optional[List[str]] = None, trip_gap_seconds: float = 300.0):
+        self.gear_ratios = gear_ratios # Engine RPM per km/h in each gear, first gear first
+        self.afr = afr
+        self.fuel_density = fuel_density # g/L
+        self.tau = smoothing_seconds
+        self.trip_gap = trip_gap_seconds
+        self.rolling = {pid: RollingExtreme(rolling_window)
+                        for pid in (rolling_pids or ["RPM", "SPEED", "COOLANT_TEMP"])}
+        self.reset_trip()
+
+    def reset_trip(self):
+        self._last: Dict[str, tuple] = {} # PID -> (timestamp, value)
+        self._accel: Optional[float] = None
+        self._ratio: Optional[float] = None
+        self._fuel_rate: Optional[float] = None
+        self.trip_distance = 0.0 # km
+        self.trip_fuel = 0.0 # L
+        for extreme in self.rolling.values():
+            extreme.reset()
+
+    def _ewma(self, previous: Optional[float], value: float, dt: float) -> float:
+        if previous is None:
+            return value
+        alpha = 1.0 - math.exp(-dt / self.tau) if self.tau > 0 else 1.0
+        return previous + alpha * (value - previous)
+
+    def update(self, values: Dict[str, Any], timestamp: float) -> Dict[str, Any]:
+        last_seen = max((t for t, _ in self._last.values()), default=None)
+        if last_seen is not None and timestamp - last_seen > self.trip_gap:
+            self.reset_trip()
+
+        speed = self._number(values.get("SPEED"))
+        if speed is not None:
+            previous = self._last.get("SPEED")
+            if previous is not None and timestamp > previous[0]:
+                dt = timestamp - previous[0]
+                accel = (speed - previous[1]) / 3.6 / dt
+                self._accel = self._ewma(self._accel, accel, dt)
+                # Trapezoidal distance; fuel uses the last known flow over the same interval
+                self.trip_distance += (speed + previous[1]) / 2 * dt / 3600
+            self._last["SPEED"] = (timestamp, speed)
+
+        maf = self._number(values.get("MAF"))
+        if maf is not None:
+            previous = self._last.get("MAF")
+            rate = maf / self.afr / self.fuel_density * 3600 # L/h
+            if previous is not None and timestamp > previous[0]:
+                dt = timestamp - previous[0]
+                self.trip_fuel += (rate + self._fuel_rate) / 2 * dt / 3600
+            self._fuel_rate = rate
+            self._last["MAF"] = (timestamp, maf)
+
+        rpm = self._number(values.get("RPM"))
+        if rpm is not None:
+            previous = self._last.get("RPM")
+            self._last["RPM"] = (timestamp, rpm)
+            current_speed = self._last.get("SPEED", (0, 0.0))[1]
+            if current_speed > 5 and rpm > 500:
+                dt = timestamp - previous[0] if previous else 0.0
+                self._ratio = self._ewma(self._ratio, rpm / current_speed, dt)
+            else:
+                self._ratio = None
+
+        for pid, extreme in self.rolling.items():
+            value = self._number(values.get(pid))
+            if value is not None:
+                extreme.update(timestamp, value)
+
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        speed = self._last.get("SPEED", (0, 0.0))[1]
+        derived: Dict[str, Any] = {
+            "ACCELERATION": self._round(self._accel, 2),
+            "GEAR": self._gear(),
+            "FUEL_RATE": self._round(self._fuel_rate, 2),
+            "ECONOMY": self._round(self._fuel_rate / speed * 100, 1)
+                       if self._fuel_rate is not None and speed > 3 else None,
+            "TRIP_DISTANCE": round(self.trip_distance, 2),
+            "TRIP_FUEL": round(self.trip_fuel, 3),
+            "TRIP_ECONOMY": round(self.trip_fuel / self.trip_distance * 100, 1)
+                            if self.trip_distance > 0.1 and self.trip_fuel > 0 else None,
+        }
+        for pid, extreme in self.rolling.items():
+            derived[f"{pid}_MIN"] = extreme.min
+            derived[f"{pid}_MAX"] = extreme.max
+        return derived
+
+    def _gear(self) -> Optional[int]:
+        if self._ratio is None or not self.gear_ratios:
+            return None
+        best = min(range(len(self.gear_ratios)), key=lambda i: abs(self.gear_ratios[i] - self._ratio))
+        # Outside 20% of every gear: clutch in, coasting or wheelspin
+        if abs(self.gear_ratios[best] - self._ratio) > 0.2 * self.gear_ratios[best]:
+            return None
+        return best + 1
+
+    @staticmethod
+    def _number(value) -> Optional[float]:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return None
+
+    @staticmethod
+    def _round(value: Optional[float], digits: int) -> Optional[float]:
+        return round(value, digits) if value is not None else None
@@ -0,0 +1,84 @@
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from ..logging.logger import logger
+
+try:
+    # Optional: PyTurboJPEG plus the system libturbojpeg (libturbojpeg0 on Raspberry Pi OS).
+    from turbojpeg import TurboJPEG, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
+
+class OpenCVEncoder:
+    """cv2.imencode; releases the GIL while encoding."""
+
+    name = "opencv"
+
+    def encode(self, pixels, quality: int) -> Optional[bytes]:
+        ret, jpeg = cv2.imencode('.jpg', pixels, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return jpeg.tobytes() if ret else None
+
+class TurboJPEGEncoder:
+    """libjpeg-turbo via PyTurboJPEG's ctypes binding, which drops the GIL for the call.
+
+    Uses 4:2:0 subsampling to match OpenCV's output size/quality trade-off.
+    """
+
+    name = "turbojpeg"
+
+    def __init__(self):
+        if TurboJPEG is None:
+            raise RuntimeError("PyTurboJPEG is not installed")
+        # Raises if libturbojpeg itself cannot be found. A fresh libjpeg-turbo
+        # handle is created per call, so one instance is safe across threads.
+        self._jpeg = TurboJPEG()
+
+    def encode(self, pixels, quality: int) -> Optional[bytes]:
+        return self._jpeg.encode(pixels, quality=quality, jpeg_subsample=TJSAMP_420)
+
+class EncoderPool:
+    """Runs another encoder on a small dedicated thread pool (opt-in, encoder_workers > 0).
+
+    encode() still blocks its caller until the encode is done, so a pool does
+    not make one caller's encodes overlap: that comes from the callers, which
+    already encode on worker threads (FrameBroadcaster.fetch). What a pool adds
+    is a cap on how many encodes a camera runs at once, at the cost of a thread
+    hop per frame and idle threads; the default (0) encodes on the caller's thread.
+    """
+
+    def __init__(self, encoder, workers: int, name: str = "encoder"):
+        self.encoder = encoder
+        self.name = f"{encoder.name}x{workers}"
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"Encoder-{name}")
+
+    def encode(self, pixels, quality: int) -> Optional[bytes]:
+        return self._executor.submit(self.encoder.encode, pixels, quality).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+ENCODERS = {
+    "opencv": OpenCVEncoder,
+    "turbojpeg": TurboJPEGEncoder,
+}
+
+def create_encoder(backend: str = "opencv", workers: int = 0, name: str = "encoder"):
+    """Builds the configured encoder, falling back to OpenCV if the backend is unavailable.
+
+    workers > 0 wraps the encoder in an EncoderPool of that size.
+    """
+    try:
+        encoder = ENCODERS[backend]()
+    except KeyError:
+        logger.log(name, f"Unknown JPEG encoder '{backend}'", level="WARN",
+                   reason=f"Expected one of {sorted(ENCODERS)}", action="Using OpenCV encoder")
+        encoder = OpenCVEncoder()
+    except Exception as e:
+        logger.log(name, f"JPEG encoder '{backend}' unavailable", level="WARN",
+                   reason=str(e), action="Using OpenCV encoder")
+        encoder = OpenCVEncoder()
+
+    if workers > 0:
+        return EncoderPool(encoder, workers, name=name)
+    return encoder
@@ -0,0 +1,137 @@
+import threading
+import time
+import numpy as np
+from typing import List, NamedTuple, Optional, Tuple
+
+class Frame(NamedTuple):
+    seq: int
+    timestamp: float # time.monotonic() at capture
+    wall_time: float # time.time() at capture, for display
+    pixels: Optional[np.ndarray]
+    jpeg: Optional[bytes]
+
+class _Slot:
+    __slots__ = ("seq", "timestamp", "wall_time", "buffer", "pixels", "jpeg")
+
+    def __init__(self):
+        self.seq = 0 # 0 = empty or being written
+        self.timestamp = 0.0
+        self.wall_time = 0.0
+        self.buffer: Optional[np.ndarray] = None # Reused pixel storage owned by the slot
+        self.pixels: Optional[np.ndarray] = None
+        self.jpeg: Optional[bytes] = None
+
+class FrameRing:
+    """Fixed-size ring of frame slots for one camera.
+
+    Single writer (the capture thread), many readers. The writer invalidates a
+    slot (seq = 0) before touching its buffer and stamps the new sequence number
+    only once the frame is complete, so readers validate a slot by reading its
+    seq before and after taking the fields (a seqlock). Pixel buffers are
+    allocated once per slot and reused; readers that hold on to pixels for longer
+    than a few frame intervals should check is_current() or copy them.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = max(2, capacity)
+        self._slots = [_Slot() for _ in range(self.capacity)]
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    # Writer side
+
+    def writable(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Returns the reusable buffer of the next slot, invalidating it for readers."""
+        slot = self._slots[(self._seq + 1) % self.capacity]
+        slot.seq = 0
+        if slot.buffer is None or slot.buffer.shape != tuple(shape):
+            slot.buffer = np.empty(shape, dtype=np.uint8)
+        return slot.buffer
+
+    def commit(self, pixels: Optional[np.ndarray] = None, jpeg: Optional[bytes] = None,
+               timestamp: Optional[float] = None) -> int:
+        seq = self._seq + 1
+        slot = self._slots[seq % self.capacity]
+        slot.seq = 0
+        slot.pixels = pixels
+        slot.jpeg = jpeg
+        slot.timestamp = timestamp if timestamp is not None else time.monotonic()
+        slot.wall_time = time.time()
+        slot.seq = seq
+        with self._cond:
+            self._seq = seq
+            self._cond.notify_all()
+        return seq
+
+    def attach(self, seq: int, pixels: Optional[np.ndarray] = None, jpeg: Optional[bytes] = None):
+        """Caches derived data (encoded JPEG, decoded pixels) on a slot if it still holds seq."""
+        slot = self._slots[seq % self.capacity]
+        if slot.seq != seq:
+            return
+        if pixels is not None:
+            slot.pixels = pixels
+        if jpeg is not None:
+            slot.jpeg = jpeg
+
+    # Reader side
+
+    def get(self, seq: int) -> Optional[Frame]:
+        if seq <= 0 or seq > self._seq or seq <= self._seq - self.capacity:
+            return None
+        slot = self._slots[seq % self.capacity]
+        if slot.seq != seq:
+            return None
+        frame = Frame(seq, slot.timestamp, slot.wall_time, slot.pixels, slot.jpeg)
+        return frame if slot.seq == seq else None
+
+    def is_current(self, frame: Frame) -> bool:
+        """True while the frame's slot has not been reused by the writer."""
+        return self._slots[frame.seq % self.capacity].seq == frame.seq
+
+    def latest(self) -> Optional[Frame]:
+        seq = self._seq
+        while seq > 0:
+            frame = self.get(seq)
+            if frame is not None:
+                return frame
+            # Only possible if the writer lapped us; try the newest again.
+            if self._seq == seq:
+                return None
+            seq = self._seq
+        return None
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Blocks until a frame newer than seq exists; returns the newest one, or None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq, timeout=timeout):
+                return None
+        return self.latest()
+
+    def last(self, k: int) -> List[Frame]:
+        """Up to k most recent frames, oldest first."""
+        head = self._seq
+        frames = []
+        for seq in range(head, max(0, head - min(k, self.capacity - 1)), -1):
+            frame = self.get(seq)
+            if frame is not None:
+                frames.append(frame)
+        frames.reverse()
+        return frames
+
+    def measured_fps(self, window: int = 30) -> float:
+        frames = self.last(window)
+        if len(frames) < 2:
+            return 0.0
+        span = frames[-1].timestamp - frames[0].timestamp
+        if span <= 0 or time.monotonic() - frames[-1].timestamp > 2.0:
+            return 0.0
+        return (len(frames) - 1) / span
+
+    def frame_age(self) -> Optional[float]:
+        """Seconds since the newest frame was captured."""
+        frame = self.latest()
+        return time.monotonic() - frame.timestamp if frame else None
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List
 import time
+from .telemetry_bus import TelemetryBus
 from ..logging.logger import logger
 
 class SubsystemStatus(BaseModel):
@@ -22,12 +23,38 @@ class HealthService:
             "logging": SubsystemStatus(state="ACTIVE", last_update=time.time()),
             "system": SubsystemStatus(state="ACTIVE", last_update=time.time()),
         }
+        # Extra per-component counters included in the health summary (e.g. recorders).
+        self.metrics: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        # Called as listener(name, old_state, new_state) on every state transition (e.g. the trip log).
+        self.listeners: List[Callable[[str, str, str], None]] = []
+        # Last heartbeat per subsystem. Written without a lock by the hot paths
+        # (every camera frame, every OBD poll); merged into last_update on read.
+        self.heartbeats: Dict[str, float] = {}
+        # Pushes summaries to /api/health/stream whenever something actually changes.
+        self.bus = TelemetryBus(history=64)
+
+    def register_metrics(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        self.metrics[name] = provider
+
+    def add_listener(self, listener: Callable[[str, str, str], None]):
+        self.listeners.append(listener)
+
+    def heartbeat(self, name: str):
+        """Marks a subsystem as alive without touching its state."""
+        self.heartbeats[name] = time.time()
 
     def update_status(self, name: str, state: str, message: Optional[str] = None, error: Optional[str] = None):
         if name not in self.subsystems:
             return
 
         sub = self.subsystems[name]
+
+        # Fast path: a repeat of the current status is just a heartbeat. The
+        # transition logic below only runs when something changes.
+        if error is None and state == sub.state and message == sub.message \
+                and not (state == "ACTIVE" and sub.restart_count > 0):
+            self.heartbeats[name] = time.time()
+            return
         
         # Supervision Check
         # We allow transitioning to ACTIVE even if at max_retries, 
@@ -68,6 +95,11 @@ class HealthService:
                     logger.log(name, f"Subsystem reached steady state (ACTIVE)", level="INFO",
                                reason="Health checks passed", action="Monitoring operational data")
 
+        if sub.state != old_state:
+            for listener in self.listeners:
+                listener(name, old_state, sub.state)
+        self.publish()
+
     def should_retry(self, name: str) -> bool:
         if name not in self.subsystems:
             return False
@@ -82,23 +114,43 @@ class HealthService:
             sub.last_error = None
             logger.log("SUPERVISOR", f"Manual reset triggered for {name.upper()}", level="INFO",
                        action="Resetting restart counter and state to WAITING")
+            self.publish()
 
-    def get_health_summary(self):
+    def _subsystem_view(self, name: str, sub: SubsystemStatus) -> SubsystemStatus:
+        heartbeat = self.heartbeats.get(name, 0.0)
+        if heartbeat <= sub.last_update:
+            return sub
+        return sub.model_copy(update={"last_update": heartbeat})
+
+    def _overall_status(self) -> str:
         is_faulty = any(s.state == "FAULTY" for name, s in self.subsystems.items() if name in ["backend", "networking"])
         is_degraded = any(s.state == "FAULTY" for s in self.subsystems.values())
         
-        status = "OK"
         if is_faulty:
-            status = "FAULTY"
-        elif is_degraded:
-            status = "DEGRADED"
-            
+            return "FAULTY"
+        if is_degraded:
+            return "DEGRADED"
+        return "OK"
+
+    def publish(self):
+        """Pushes the current summary (without metrics) to stream subscribers."""
+        from .simulation import simulation_service
+        self.bus.publish({
+            "status": self._overall_status(),
+            "subsystems": {name: self._subsystem_view(name, sub).model_dump()
+                           for name, sub in self.subsystems.items()},
+            "simulation_active": simulation_service.active,
+            "timestamp": time.time(),
+        })
+
+    def get_health_summary(self):
         from .simulation import simulation_service
         return {
-            "status": status,
-            "subsystems": self.subsystems,
+            "status": self._overall_status(),
+            "subsystems": {name: self._subsystem_view(name, sub) for name, sub in self.subsystems.items()},
             "timestamp": time.time(),
-            "simulation_active": simulation_service.active
+            "simulation_active": simulation_service.active,
+            "metrics": {name: provider() for name, provider in self.metrics.items()},
         }
 
 from ..config.settings import settings
@@ -0,0 +1,48 @@
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+class StageStats:
+    """Fixed-size window of recent samples (milliseconds) for one pipeline stage.
+
+    record() is a couple of attribute writes so it can sit on hot paths;
+    percentiles are only computed when someone asks for them.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._count = 0
+
+    def record(self, value_ms: float):
+        i = self._count
+        self._count = i + 1
+        self._samples[i % len(self._samples)] = value_ms
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        n = min(self._count, len(self._samples))
+        if n == 0:
+            return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+        window = self._samples[:n]
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        return {
+            "count": self._count,
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "max": round(float(window.max()), 2),
+        }
+
+class LatencyTracker:
+    """Named set of StageStats, e.g. the capture -> send stages of one camera."""
+
+    def __init__(self, stages: Iterable[str], window: int = 1024):
+        self.stages: Dict[str, StageStats] = {stage: StageStats(window) for stage in stages}
+
+    def record(self, stage: str, value_ms: float):
+        self.stages[stage].record(value_ms)
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {stage: stats.summary() for stage, stats in self.stages.items()}
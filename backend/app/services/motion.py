@@ -0,0 +1,300 @@
+import cv2
+import os
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Any, Dict, List, Optional
+from .frame_ring import Frame
+from .health import health_service
+from .metrics import StageStats
+from ..logging.logger import logger
+from ..config.settings import settings, resolve_path
+
+class MotionDetector:
+    """Parking sentinel for one camera: flags motion on heavily downscaled frames.
+
+    A thread samples the camera's newest frame at a low analysis rate and
+    reduces it to a small grayscale image: INTER_AREA downscaling for pixel
+    frames, and for passthrough JPEGs a 1/8 scale decode, for which libjpeg
+    only needs each block's DC coefficient. The image is compared against a
+    running-average background (cv2.accumulateWeighted). Enough changed
+    pixels for trigger_frames in a row make an event: it is logged, counted
+    in the health metrics and saved as a snapshot. While armed, the camera's
+    standby capture rate is held at the analysis rate, so watching a parked
+    van never needs full-rate capture.
+    """
+
+    EVENTS_KEPT = 50
+
+    def __init__(
+        self,
+        camera,
+        directory: str,
+        fps: float = 2.0,
+        width: int = 64,
+        learning_rate: float = 0.05,
+        pixel_threshold: int = 25,
+        min_area: float = 0.01,
+        max_area: float = 0.6,
+        trigger_frames: int = 2,
+        cooldown_seconds: float = 30.0,
+        max_snapshots: int = 200,
+        arm: str = "parked",
+        parked_after_seconds: float = 120.0,
+    ):
+        self.camera = camera
+        self.name = camera.name
+        self.directory = os.path.join(directory, camera.name)
+        self.interval = 1.0 / max(0.1, fps)
+        self.fps = fps
+        self.width = width
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.max_area = max_area
+        self.trigger_frames = trigger_frames
+        self.cooldown_seconds = cooldown_seconds
+        self.max_snapshots = max_snapshots
+        self.arm = arm
+        self.parked_after_seconds = parked_after_seconds
+
+        self.running = False
+        self.armed = False
+        self.background: Optional[np.ndarray] = None # float32 running average
+        self.events: deque = deque(maxlen=self.EVENTS_KEPT)
+        self.frames_analysed = 0
+        self.relearns = 0 # Frames dropped as lighting changes
+        self.last_changed = 0.0 # Changed fraction of the last analysed frame
+        self.analysis_ms = StageStats(window=256)
+        self._streak = 0
+        self._last_event = 0.0
+        self._engine_off_since: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Motion-{self.name}")
+        self._thread.start()
+        health_service.register_metrics(f"motion_{self.name}", self.get_stats)
+        logger.log(self.name, "Parking sentinel started", level="INFO",
+                   action=f"Analysing at {self.fps:g} fps, {self.width}px wide, armed {self.arm}")
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._set_armed(False, "Sentinel stopped")
+
+    def _run(self):
+        last_seq = 0
+        next_at = time.monotonic()
+        while self.running:
+            self._update_armed()
+            if not self.armed:
+                self._stop.wait(1.0)
+                next_at = time.monotonic()
+                continue
+
+            frame = self.camera.ring.latest()
+            if frame is not None and frame.seq != last_seq:
+                last_seq = frame.seq
+                try:
+                    self.analyse(frame)
+                except Exception as e:
+                    logger.log(self.name, "Motion analysis failed", level="WARN", reason=str(e),
+                               action="Skipping frame")
+
+            next_at += self.interval
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                next_at = time.monotonic() # Fell behind; do not try to catch up
+                delay = 0
+            self._stop.wait(delay)
+
+    # Arming
+
+    def _parked(self) -> bool:
+        if self.arm == "always":
+            return True
+        from .obd import obd_service
+        latest = obd_service.get_latest()
+        now = time.time()
+        # No recent OBD sample (the adapter sleeps with the ignition off) or a stopped engine.
+        engine_off = now - latest.get("timestamp", 0) > 10 or not latest.get("RPM")
+        if not engine_off:
+            self._engine_off_since = None
+            return False
+        if self._engine_off_since is None:
+            self._engine_off_since = now
+        return now - self._engine_off_since >= self.parked_after_seconds
+
+    def _update_armed(self):
+        parked = self._parked()
+        if parked != self.armed:
+            self._set_armed(parked, "Engine off" if parked else "Engine running")
+
+    def _set_armed(self, armed: bool, reason: str):
+        if armed == self.armed:
+            return
+        self.armed = armed
+        self.background = None # The scene may have changed while disarmed
+        self._streak = 0
+        if armed:
+            self.camera.hold_rate("motion", self.fps)
+        else:
+            self.camera.release_rate("motion")
+        logger.log(self.name, f"Parking sentinel {'armed' if armed else 'disarmed'}", level="INFO",
+                   reason=reason, action=f"Watching at {self.fps:g} fps" if armed else "Capture back to normal")
+
+    # Analysis
+
+    def _downscale(self, frame: Frame) -> Optional[np.ndarray]:
+        if frame.pixels is not None:
+            pixels = frame.pixels
+            height = max(1, round(pixels.shape[0] * self.width / pixels.shape[1]))
+            small = cv2.resize(pixels, (self.width, height), interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        if frame.jpeg is not None:
+            gray = cv2.imdecode(np.frombuffer(frame.jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            if gray is None:
+                return None
+            if gray.shape[1] != self.width:
+                height = max(1, round(gray.shape[0] * self.width / gray.shape[1]))
+                gray = cv2.resize(gray, (self.width, height), interpolation=cv2.INTER_AREA)
+            return gray
+        return None
+
+    def analyse(self, frame: Frame) -> float:
+        """Compares one frame with the background; returns the changed fraction."""
+        started = time.perf_counter()
+        small = self._downscale(frame)
+        if small is None or not self.camera.ring.is_current(frame):
+            return 0.0 # Nothing to analyse, or the slot was rewritten while we read it
+        self.frames_analysed += 1
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            return 0.0
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]) / diff.size
+        self.last_changed = changed
+
+        if changed > self.max_area:
+            # Global change (headlights, a cloud, auto exposure): relearn rather than alert.
+            self.relearns += 1
+            self.background = small.astype(np.float32)
+            self._streak = 0
+        else:
+            cv2.accumulateWeighted(small, self.background, self.learning_rate)
+            self._streak = self._streak + 1 if changed >= self.min_area else 0
+        self.analysis_ms.record((time.perf_counter() - started) * 1000)
+
+        if self._streak >= self.trigger_frames and time.monotonic() - self._last_event >= self.cooldown_seconds:
+            self._last_event = time.monotonic()
+            self._streak = 0
+            self._record_event(frame, changed)
+        return changed
+
+    # Events
+
+    def _record_event(self, frame: Frame, changed: float):
+        snapshot = self._save_snapshot(frame)
+        self.events.append({
+            "camera": self.name,
+            "time": frame.wall_time,
+            "frame_seq": frame.seq,
+            "changed": round(changed, 4),
+            "snapshot": snapshot,
+        })
+        logger.log(self.name, "Motion detected", level="WARN",
+                   reason=f"{changed * 100:.1f}% of the frame changed for {self.trigger_frames} frames",
+                   action=f"Snapshot saved as {snapshot}" if snapshot else "No snapshot available")
+
+    def _frame_jpeg(self, frame: Frame) -> Optional[bytes]:
+        """The analysed frame itself as JPEG, not whatever the camera has captured since."""
+        if frame.jpeg is not None:
+            return frame.jpeg
+        current = self.camera.ring.get(frame.seq)
+        if current is not None and current.jpeg is not None:
+            return current.jpeg # Already encoded for a viewer
+        if frame.pixels is None:
+            return None
+        broadcaster = self.camera.broadcaster
+        jpeg = broadcaster.encoder.encode(frame.pixels, broadcaster.quality)
+        # Slot reused mid-encode: the bytes may mix two frames.
+        return jpeg if self.camera.ring.is_current(frame) else None
+
+    def _save_snapshot(self, frame: Frame) -> Optional[str]:
+        jpeg = self._frame_jpeg(frame)
+        if jpeg is None:
+            return None
+        filename = time.strftime("%Y%m%d-%H%M%S", time.localtime(frame.wall_time)) + f"-{frame.seq:08d}.jpg"
+        try:
+            with open(os.path.join(self.directory, filename), "wb") as f:
+                f.write(jpeg)
+            self._prune()
+        except OSError as e:
+            logger.log(self.name, "Motion snapshot not saved", level="WARN", reason=str(e),
+                       action="Event kept without a snapshot")
+            return None
+        return filename
+
+    def _prune(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".jpg"))
+        for name in names[:max(0, len(names) - self.max_snapshots)]:
+            os.remove(os.path.join(self.directory, name))
+
+    def snapshot_path(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.directory, os.path.basename(filename))
+        return path if os.path.isfile(path) else None
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        return list(self.events)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "armed": self.armed,
+            "fps": self.fps,
+            "frames_analysed": self.frames_analysed,
+            "events": len(self.events),
+            "last_event": self.events[-1]["time"] if self.events else None,
+            "last_changed": round(self.last_changed, 4),
+            "relearns": self.relearns,
+            "analysis_ms": self.analysis_ms.summary(),
+        }
+
+def _build_detectors() -> Dict[str, MotionDetector]:
+    from .camera import camera_rear, camera_front
+
+    config = settings.motion
+    directory = resolve_path(config.directory)
+    return {
+        camera.name: MotionDetector(
+            camera,
+            directory=directory,
+            fps=config.fps,
+            width=config.width,
+            learning_rate=config.learning_rate,
+            pixel_threshold=config.pixel_threshold,
+            min_area=config.min_area,
+            max_area=config.max_area,
+            trigger_frames=config.trigger_frames,
+            cooldown_seconds=config.cooldown_seconds,
+            max_snapshots=config.max_snapshots,
+            arm=config.arm,
+            parked_after_seconds=config.parked_after_seconds,
+        )
+        for camera in (camera_rear, camera_front)
+        if camera.name in config.cameras
+    }
+
+motion_detectors = _build_detectors()
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional
+from starlette.websockets import WebSocket, WebSocketDisconnect
+from .health import health_service
+from .telemetry_codec import TelemetryCodec, telemetry_codec
+from ..logging.logger import logger
+
+TOPICS = ("telemetry", "health", "logs")
+
+class MultiplexSession:
+    """One /api/ws connection carrying several topics.
+
+    The client sends JSON commands:
+      {"op": "subscribe", "topic": "telemetry", "max_hz": 10}
+      {"op": "subscribe", "topic": "logs", "source": "OBD", "level": null, "lines": 50}
+      {"op": "subscribe", "topic": "health"}
+      {"op": "unsubscribe", "topic": "logs"}
+    Subscribing again replaces the topic's options. Each topic is followed by
+    its own task and every subscription starts with the current state.
+    Telemetry goes out as binary frames (see telemetry_codec), preceded by
+    {"topic": "telemetry.keys", "offset": n, "data": [...]} whenever new keys
+    appear; everything else is JSON text {"topic": ..., "data": ...}.
+    """
+
+    def __init__(self, websocket: WebSocket, codec: TelemetryCodec = telemetry_codec):
+        self.websocket = websocket
+        self.codec = codec
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+        self._keys_sent = 0
+        self.bytes_sent = 0
+
+    async def run(self):
+        await self.websocket.accept()
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                await self._handle(message.get("text"))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+
+    async def _handle(self, text: Optional[str]):
+        # A bad command gets an error reply; it never ends the session.
+        try:
+            command = json.loads(text) if text is not None else None
+        except ValueError:
+            command = None
+        if not isinstance(command, dict):
+            await self._send_error("Commands must be JSON objects")
+            return
+        op, topic = command.get("op"), command.get("topic")
+        if topic not in TOPICS:
+            await self._send_error(f"Unknown topic {topic!r}")
+            return
+        if op not in ("subscribe", "unsubscribe"):
+            await self._send_error(f"Unknown op {op!r}")
+            return
+        if op == "subscribe":
+            try:
+                options = self._options(topic, command)
+            except (TypeError, ValueError, OverflowError) as e:
+                await self._send_error(f"Invalid {topic} options: {e}")
+                return
+        previous = self.tasks.pop(topic, None)
+        if previous is not None:
+            previous.cancel()
+        if op == "subscribe":
+            follow = {"telemetry": self._follow_telemetry, "health": self._follow_health,
+                      "logs": self._follow_logs}[topic]
+            self.tasks[topic] = asyncio.create_task(follow(options))
+
+    @staticmethod
+    def _options(topic: str, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated options for a subscription; raises ValueError/TypeError for bad ones."""
+        if topic == "telemetry":
+            max_hz = float(command.get("max_hz") or 0)
+            if not max_hz >= 0:
+                raise ValueError("max_hz must be 0 (unlimited) or more")
+            return {"max_hz": max_hz}
+        if topic == "logs":
+            options = {"lines": int(command.get("lines") or 50)}
+            if options["lines"] < 1:
+                raise ValueError("lines must be 1 or more")
+            for key in ("source", "level"):
+                value = command.get(key) or None
+                if value is not None and not isinstance(value, str):
+                    raise TypeError(f"{key} must be a string")
+                options[key] = value
+            return options
+        return {}
+
+    async def _send_error(self, message: str):
+        await self._send_text(json.dumps({"topic": "error", "data": message}))
+
+    async def _send_text(self, text: str):
+        async with self._send_lock:
+            await self.websocket.send_text(text)
+        self.bytes_sent += len(text)
+
+    async def _send_bytes(self, data: bytes):
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+        self.bytes_sent += len(data)
+
+    async def _follow_telemetry(self, options: Dict[str, Any]):
+        max_hz = options["max_hz"]
+        min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        seq, last_sent = 0, 0.0
+        while True:
+            if not await self.codec.bus.wait_newer(seq):
+                continue
+            wait = last_sent + min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            update = self.codec.frame_since(seq)
+            if update is None:
+                continue
+            seq, frame, extras = update
+            last_sent = time.monotonic()
+            new_keys = self.codec.keys_from(self._keys_sent)
+            if new_keys:
+                await self._send_text(json.dumps({"topic": "telemetry.keys", "offset": self._keys_sent,
+                                                  "data": new_keys}))
+                self._keys_sent += len(new_keys)
+            await self._send_bytes(frame)
+            if extras:
+                await self._send_text(json.dumps({"topic": "telemetry", "data": extras}))
+
+    async def _follow_health(self, options: Dict[str, Any]):
+        bus = health_service.bus
+        if bus.seq == 0:
+            health_service.publish()
+        seq = 0
+        while True:
+            if not await bus.wait_newer(seq):
+                continue
+            update = bus.updates_since(seq)
+            if update is None:
+                continue
+            seq, payload = update
+            # The summary is already serialized once for every subscriber; wrap it without re-encoding.
+            await self._send_text('{"topic": "health", "data": ' + payload + '}')
+
+    async def _follow_logs(self, options: Dict[str, Any]):
+        source: Optional[str] = options["source"]
+        level: Optional[str] = options["level"]
+        limit = options["lines"]
+        # Always answer a (re)subscription, even with an empty backlog, so the client can clear its view.
+        seq, entries = logger.entries_since(0, source, level, limit)
+        await self._send_text(json.dumps({"topic": "logs", "reset": True, "data": entries}))
+        while True:
+            if not await logger.wait_newer(seq):
+                continue
+            seq, entries = logger.entries_since(seq, source, level, logger.logs.maxlen)
+            if entries:
+                await self._send_text(json.dumps({"topic": "logs", "data": entries}))
@@ -2,9 +2,15 @@ import obd
 import time
 import threading
 from typing import Dict, Any, Optional
+from .derived_telemetry import DerivedTelemetry
 from .health import health_service
+from .obd_connection import OBDConnectionManager
+from .obd_scheduler import PIDScheduler, build_rates
+from .telemetry_bus import telemetry_bus
+from .telemetry_history import TelemetryHistory
+from .trip_log import TripLog
 from ..logging.logger import logger
-from ..config.settings import settings
+from ..config.settings import settings, resolve_path
 
 class OBDService:
     def __init__(self):
@@ -25,24 +31,89 @@ class OBDService:
             obd.commands.COOLANT_TEMP,
             obd.commands.THROTTLE_POS,
             obd.commands.INTAKE_TEMP,
+            obd.commands.MAF,
             obd.commands.ELM_VOLTAGE
         ]
+        # Each PID is polled at its own rate; polling_interval is the fallback rate
+        rates = build_rates(self.commands, settings.obd.pid_rates, 1.0 / self.polling_interval)
+        self.scheduler = PIDScheduler(rates, multi_pid=settings.obd.multi_pid)
+        # Size each history ring for its poll rate (simulation runs slower, so it only keeps more)
+        self.history = TelemetryHistory({
+            cmd.name: int(settings.obd.history_seconds * rate) + 1 for cmd, rate in rates.items()
+        })
+        trips = settings.trips
+        self.trip_log = TripLog(
+            resolve_path(trips.directory), [cmd.name for cmd in self.commands],
+            gap_seconds=trips.gap_seconds, flush_interval=trips.flush_interval,
+            queue_records=trips.queue_records, compact_after_days=trips.compact_after_days,
+            compact_resolution=trips.compact_resolution, max_total_bytes=trips.max_total_bytes)
+        health_service.register_metrics("obd_pids", self.get_poll_stats)
+
+        derived = settings.derived
+        self.derived = DerivedTelemetry(
+            derived.gear_ratios, afr=derived.afr, fuel_density=derived.fuel_density,
+            smoothing_seconds=derived.smoothing_seconds, rolling_window=derived.rolling_window,
+            rolling_pids=derived.rolling_pids, trip_gap_seconds=settings.trips.gap_seconds)
+
+        # One state machine owns the adapter connection, driven from the poll thread
+        self.link = OBDConnectionManager(
+            self.port, backoff_seconds=self.backoff_time,
+            max_backoff_seconds=settings.obd.max_backoff_seconds, jitter=settings.obd.backoff_jitter)
+        self._sim_override_ports = []
+        health_service.register_metrics("obd_connection", self.link.get_stats)
+
+        # Watchdog freshness (monotonic): last loop iteration and last sample
+        self.last_progress = time.monotonic()
+        self.last_sample = 0.0
+        # Bumped to abandon a poll thread that is stuck on a query
+        self._generation = 0
+        self.restarts = 0
 
     def start(self):
         if not self.is_running:
             self.is_running = True
-            self.thread = threading.Thread(target=self._poll_loop, daemon=True)
-            self.thread.start()
+            self._start_thread()
             logger.log("obd", "OBD polling thread started")
+            if settings.trips.enabled:
+                self.trip_log.start()
+
+    def _start_thread(self):
+        self._generation += 1
+        self.last_progress = time.monotonic()
+        self.thread = threading.Thread(target=self._poll_loop, args=(self._generation,), daemon=True)
+        self.thread.start()
+
+    def restart(self, reason: str):
+        """Replaces a poll thread whose queries stopped returning (called by the watchdog).
+
+        The hung connection is dropped, which also unblocks the stuck read
+        once its port is closed; the abandoned thread exits when it wakes and
+        the new one reconnects straight away.
+        """
+        self.restarts += 1
+        self.link.abandon(reason)
+        self.connection = None
+        self._start_thread()
+
+    def freshness(self):
+        if not self.is_running:
+            return None
+        now = time.monotonic()
+        if self.link.state == "CONNECTED":
+            return True, now - max(self.last_sample, self.link.connected_at)
+        return False, now - self.last_progress
 
     def stop(self):
         self.is_running = False
         if self.thread:
             self.thread.join(timeout=2)
+        self.link.close()
+        self.trip_log.stop()
 
-    def _poll_loop(self):
+    def _poll_loop(self, generation: int):
         from .simulation import simulation_service
-        while self.is_running:
+        while self.is_running and generation == self._generation:
+            self.last_progress = time.monotonic()
             # Global Toggle takes absolute priority
             if simulation_service.active:
                 health_service.update_status("obd", "ACTIVE", message="Simulation Mode")
@@ -53,81 +124,58 @@ class OBDService:
             # Intent Check: Should we use simulation?
             use_sim = self.simulation_mode
             
-            # Maintenance Override
-            if settings.mode == "maintenance" and settings.obd.simulation and settings.obd.allow_real:
-                # We check for serial ports
-                import obd
-                ports = obd.scan_serial()
-                if ports:
-                    use_sim = False
-                    # We don't log every loop to avoid spam
-                    if not hasattr(self, '_notified_real_hw'):
+            # Maintenance Override: prefer a real adapter when one is plugged in.
+            # The port list is cached and only rescanned on hotplug.
+            if use_sim and settings.mode == "maintenance" and settings.obd.allow_real and self.link.connection is None:
+                ports = self.link.available_ports()
+                if ports != self._sim_override_ports:
+                    if ports:
                         logger.log("OBD", f"Maintenance mode: Adapter ports detected: {ports}", level="INFO",
                                    reason="allow_real is True and ports available",
                                    action="Self-overriding simulation to use real hardware")
-                        self._notified_real_hw = True
-                else:
-                    use_sim = True
-
-            if self.connection and self.connection.is_connected():
-                health_service.update_status("obd", "ACTIVE")
-                self._poll_data()
-            elif use_sim:
-                health_service.update_status("obd", "ACTIVE", message="Simulation Mode")
-                self._simulate_data()
-            else:
-                # Hardware connection attempt (Non-blocking check)
-                if not hasattr(self, '_connecting') or not self._connecting:
-                    self._connecting = True
-                    threading.Thread(target=self._connect, daemon=True).start()
-                
-                health_service.update_status("obd", "WAITING", message="Hardware Probe in progress...")
-            
-            time.sleep(self.polling_interval)
+                    self._sim_override_ports = ports
+                use_sim = not ports
 
-    def _connect(self):
-        try:
-            logger.log("OBD", f"Probing OBD adapter on port {self.port or 'auto-scan'}", level="DEBUG",
-                       intent="Establish serial handshake", action="Calling obd.OBD()")
-            
-            conn = obd.OBD(self.port)
-            if conn.is_connected():
-                self.connection = conn
-                logger.log("OBD", "OBD adapter connected successfully", level="INFO",
-                           reason="Serial handshake confirmed", action="Entering poll loop")
-            else:
-                conn.close()
-                raise Exception("Adapter present but link-layer failed (Is ignition on?)")
-        except Exception as e:
-            logger.log("OBD", "Connection failed", level="WARN", 
-                       reason=str(e), action="Subsystem entering WAITING state for backoff")
-            self.connection = None
-        finally:
-            self._connecting = False
-
-    def _handle_disconnect(self, error: str = "Disconnected"):
-        health_service.update_status("obd", "WAITING", error=error)
-        sleep_time = min(30, self.backoff_time * (health_service.subsystems["obd"].restart_count + 1))
-        logger.log("OBD", f"Adapter unavailable. Retrying in {sleep_time}s", level="DEBUG",
-                   reason="Not connected to vehicle ECU", action="Applying exponential backoff")
-        time.sleep(sleep_time)
+            if not use_sim or self.link.connection is not None:
+                connection = self.connection
+                if self.link.step():
+                    if self.link.connection is not connection:
+                        self.scheduler.reset()
+                        self.connection = self.link.connection
+                    health_service.update_status("obd", "ACTIVE")
+                    self._poll_data()
+                    # Wake up when the next PID is due rather than on a fixed tick
+                    time.sleep(self.scheduler.time_until_next())
+                    continue
+                self.connection = None
+                if not use_sim:
+                    health_service.update_status("obd", "WAITING",
+                                                 message="Adapter unavailable, backing off")
+                    time.sleep(min(self.polling_interval, max(self.link.retry_in(), 0.05)))
+                    continue
+
+            health_service.update_status("obd", "ACTIVE", message="Simulation Mode")
+            self._simulate_data()
+            time.sleep(self.polling_interval)
 
     def _poll_data(self):
         data = {}
-        for cmd in self.commands:
-            response = self.connection.query(cmd)
-            if not response.is_null():
-                # Convert pint quantities to serializable types
-                val = response.value
-                if hasattr(val, 'magnitude'):
-                    data[cmd.name] = round(float(val.magnitude), 2)
-                    data[f"{cmd.name}_unit"] = str(val.units)
-                else:
-                    data[cmd.name] = val
+        for name, val in self.scheduler.poll(self.connection).items():
+            # Convert pint quantities to serializable types
+            if hasattr(val, 'magnitude'):
+                data[name] = round(float(val.magnitude), 2)
+                data[f"{name}_unit"] = str(val.units)
+            else:
+                data[name] = val
         
         if data:
+            self.last_sample = time.monotonic()
             data["timestamp"] = time.time()
+            self.history.record(data, data["timestamp"])
+            self.trip_log.record(data, data["timestamp"])
+            data.update(self.derived.update(data, data["timestamp"]))
             self.latest_data.update(data)
+            telemetry_bus.publish(data)
 
     def _simulate_data(self):
         from .simulation import simulation_service
@@ -145,11 +193,20 @@ class OBDService:
             "THROTTLE_POS": round(0 + 100 * cycle, 1), # 0 to 100%
             "INTAKE_TEMP": 25.0 + (5 * cycle),
             "ELM_VOLTAGE": round(12.0 + 2.5 * cycle, 1), # 12V to 14.5V
+            "MAF": round(3 + 60 * cycle, 2),          # 3 to 63 g/s
             "timestamp": t,
             "simulated": True
         }
+        self.history.record(self.latest_data, t)
+        if settings.trips.record_simulation:
+            self.trip_log.record(self.latest_data, t)
+        self.latest_data.update(self.derived.update(self.latest_data, t))
+        telemetry_bus.publish(self.latest_data)
 
     def get_latest(self):
         return self.latest_data
 
+    def get_poll_stats(self):
+        return {"requests": self.scheduler.requests, "restarts": self.restarts, "pids": self.scheduler.stats()}
+
 obd_service = OBDService()
@@ -0,0 +1,211 @@
+import glob
+import random
+import threading
+import time
+import obd
+from typing import Any, Dict, List, Optional, Tuple
+from .metrics import StageStats
+from ..logging.logger import logger
+
+# The device nodes python-obd's scan_serial() probes on Linux.
+PORT_PATTERNS = ("/dev/rfcomm[0-9]*", "/dev/ttyUSB[0-9]*")
+
+class PortScanner:
+    """Caches obd.scan_serial() results.
+
+    scan_serial() opens every candidate port, which is slow and can disturb
+    other serial devices. Hotplug is detected instead from the set of device
+    nodes udev creates and removes (a directory listing, no port is opened);
+    a real scan only happens when that set changes or the caller asks for a
+    refresh (after a backoff timer expires).
+    """
+
+    def __init__(self, port: Optional[str] = None):
+        self.port = port # Fixed port from config; no scanning at all
+        self.scans = 0
+        self.hotplug_events = 0
+        self._nodes: Tuple[str, ...] = ()
+        self._ports: List[str] = []
+        self._scanned = False
+
+    def _device_nodes(self) -> Tuple[str, ...]:
+        if self.port:
+            return (self.port,) if glob.glob(self.port) else ()
+        return tuple(sorted(node for pattern in PORT_PATTERNS for node in glob.glob(pattern)))
+
+    def check_hotplug(self) -> bool:
+        """True if adapter device nodes appeared or disappeared since the last check."""
+        nodes = self._device_nodes()
+        if nodes == self._nodes:
+            return False
+        self._nodes = nodes
+        self._scanned = False
+        self.hotplug_events += 1
+        return True
+
+    def ports(self, refresh: bool = False) -> List[str]:
+        self.check_hotplug()
+        if not self._nodes:
+            self._ports = []
+        elif self.port:
+            self._ports = [self.port]
+        elif refresh or not self._scanned:
+            self._ports = obd.scan_serial()
+            self.scans += 1
+        self._scanned = True
+        return self._ports
+
+class Backoff:
+    """Bounded exponential backoff with jitter: min(max, base * 2^n), scaled by 1 +/- jitter."""
+
+    def __init__(self, base: float, maximum: float, jitter: float = 0.2):
+        self.base = base
+        self.maximum = maximum
+        self.jitter = jitter
+        self.failures = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.maximum, self.base * (2 ** self.failures))
+        self.failures += 1
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def reset(self):
+        self.failures = 0
+
+class OBDConnectionManager:
+    """Owns the ELM327 connection as a small state machine.
+
+    States: DISCONNECTED -> CONNECTING -> CONNECTED, and on failure or link
+    loss BACKOFF until the timer expires or an adapter is hotplugged. step() is
+    driven by the OBD poll thread, so connects are never run concurrently.
+    """
+
+    def __init__(self, port: Optional[str], backoff_seconds: float, max_backoff_seconds: float,
+                 jitter: float = 0.2):
+        self.scanner = PortScanner(port)
+        self.backoff = Backoff(backoff_seconds, max_backoff_seconds, jitter)
+        self.state = "DISCONNECTED"
+        self.connection = None
+        self.connected_at = 0.0 # Monotonic time of the last successful connect
+        self.next_attempt = 0.0
+        self.last_error: Optional[str] = None
+
+        self.attempts = 0
+        self.successes = 0
+        self.disconnects = 0
+        self.connect_ms = StageStats(window=64) # Duration of each successful handshake
+        self.time_to_connect = None # Seconds from link down (or start) to connected
+        self._down_since = time.monotonic()
+
+    def available_ports(self) -> List[str]:
+        """Adapter ports currently present (cached; rescanned only on hotplug)."""
+        return self.scanner.ports()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.next_attempt - time.monotonic())
+
+    def step(self) -> bool:
+        """Advances the state machine. Returns True while connected."""
+        if self.connection is not None:
+            if self.connection.is_connected():
+                return True
+            self._disconnected("Adapter link lost")
+
+        if self.scanner.check_hotplug() and self.state == "BACKOFF":
+            logger.log("OBD", "Adapter hotplug detected", level="INFO",
+                       action="Retrying connection immediately")
+            self.backoff.reset()
+            self.next_attempt = 0.0
+        if time.monotonic() < self.next_attempt:
+            return False
+
+        ports = self.scanner.ports(refresh=self.state == "BACKOFF")
+        if not ports:
+            self._failed("No OBD adapter ports found")
+            return False
+        return self._connect(ports[0])
+
+    def _connect(self, port: str) -> bool:
+        self.state = "CONNECTING"
+        self.attempts += 1
+        logger.log("OBD", f"Probing OBD adapter on port {port}", level="DEBUG",
+                   intent="Establish serial handshake", action="Calling obd.OBD()")
+        started = time.monotonic()
+        try:
+            conn = obd.OBD(port)
+            if not conn.is_connected():
+                conn.close()
+                raise Exception("Adapter present but link-layer failed (Is ignition on?)")
+        except Exception as e:
+            self._failed(str(e))
+            return False
+
+        finished = time.monotonic()
+        self.connection = conn
+        self.connected_at = finished
+        self.state = "CONNECTED"
+        self.successes += 1
+        self.last_error = None
+        self.backoff.reset()
+        self.connect_ms.record((finished - started) * 1000)
+        self.time_to_connect = finished - self._down_since
+        logger.log("OBD", "OBD adapter connected successfully", level="INFO",
+                   reason=f"Serial handshake confirmed in {finished - started:.1f}s",
+                   action="Entering poll loop")
+        return True
+
+    def _failed(self, error: str):
+        delay = self.backoff.next_delay()
+        self.next_attempt = time.monotonic() + delay
+        # Only log when the reason changes; a parked van would otherwise log every retry.
+        if error != self.last_error:
+            logger.log("OBD", "Connection failed", level="WARN", reason=error,
+                       action=f"Backing off {delay:.0f}s (max {self.backoff.maximum:.0f}s) or until hotplug")
+        self.last_error = error
+        self.state = "BACKOFF"
+
+    def _disconnected(self, error: str):
+        self.disconnects += 1
+        self._down_since = time.monotonic()
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+        self._failed(error)
+
+    def abandon(self, error: str):
+        """Drops a connection that stopped answering and retries immediately.
+
+        The close runs on a helper thread: the port may be wedged, and
+        closing it is also what unblocks the thread stuck reading from it.
+        """
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            self.disconnects += 1
+            self._down_since = time.monotonic()
+            threading.Thread(target=connection.close, daemon=True, name="OBDClose").start()
+        self.last_error = error
+        self.backoff.reset()
+        self.next_attempt = 0.0
+        self.state = "DISCONNECTED"
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.state = "DISCONNECTED"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "disconnects": self.disconnects,
+            "port_scans": self.scanner.scans,
+            "hotplug_events": self.scanner.hotplug_events,
+            "retry_in": round(self.retry_in(), 1) if self.state == "BACKOFF" else None,
+            "connect_ms": self.connect_ms.summary(),
+            "time_to_connect": round(self.time_to_connect, 2) if self.time_to_connect is not None else None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,190 @@
+import copy
+import time
+from obd import OBDCommand
+from obd.protocols import ECU
+from typing import Any, Dict, List, Optional
+from ..logging.logger import logger
+
+# ELM327 accepts up to six PIDs in one mode 01 request (CAN protocols only).
+MAX_PIDS_PER_REQUEST = 6
+CAN_PROTOCOLS = {"6", "7", "8", "9", "A", "B", "C"}
+
+class PIDSchedule:
+    __slots__ = ("command", "interval", "next_due", "last_sample", "achieved_hz", "samples", "failures")
+
+    def __init__(self, command: OBDCommand, rate_hz: float):
+        self.command = command
+        self.interval = 1.0 / rate_hz
+        self.next_due = 0.0
+        self.last_sample = 0.0
+        self.achieved_hz = 0.0 # EWMA of the sample rate actually delivered
+        self.samples = 0
+        self.failures = 0
+
+    def mark_sampled(self, now: float):
+        if self.last_sample:
+            rate = 1.0 / max(now - self.last_sample, 1e-3)
+            self.achieved_hz = rate if self.samples < 2 else 0.8 * self.achieved_hz + 0.2 * rate
+        self.last_sample = now
+        self.samples += 1
+
+class PIDScheduler:
+    """Polls each PID at its own target rate over a single ELM327 link.
+
+    Every call to poll() queries the PIDs that are due. Due mode 01 PIDs are
+    packed into multi-PID requests when the adapter and protocol support it, and
+    PIDs that come due within half an interval ride along in spare request slots
+    since an extra PID costs far less than an extra round-trip. Multi-PID support
+    is probed on first use and the scheduler falls back to one PID per request if
+    the vehicle answers incompletely.
+    """
+
+    def __init__(self, rates: Dict[OBDCommand, float], multi_pid: bool = True):
+        self.schedules = [PIDSchedule(cmd, rate) for cmd, rate in rates.items() if rate > 0]
+        self.multi_pid = multi_pid
+        self._multi_supported: Optional[bool] = None if multi_pid else False
+        self.requests = 0
+
+    def reset(self):
+        """Forget per-connection state (call after reconnecting to an adapter)."""
+        self._multi_supported = None if self.multi_pid else False
+        for schedule in self.schedules:
+            schedule.next_due = 0.0
+
+    def time_until_next(self, now: Optional[float] = None) -> float:
+        now = now if now is not None else time.monotonic()
+        if not self.schedules:
+            return 1.0
+        return max(0.0, min(s.next_due for s in self.schedules) - now)
+
+    def poll(self, connection) -> Dict[str, Any]:
+        """Queries every due PID once. Returns {command name: OBDResponse value}."""
+        now = time.monotonic()
+        due = sorted((s for s in self.schedules if s.next_due <= now), key=lambda s: s.next_due)
+        # PIDs the vehicle does not report (e.g. no MAF sensor) are skipped, so
+        # they cost no traffic and cannot spoil a multi-PID request.
+        supports = getattr(connection, "supports", None)
+        if supports is not None:
+            for schedule in [s for s in due if not supports(s.command)]:
+                schedule.next_due = now + schedule.interval
+                due.remove(schedule)
+        if not due:
+            return {}
+
+        results: Dict[str, Any] = {}
+        batchable = [s for s in due if self._batchable(s.command)]
+        singles = [s for s in due if not self._batchable(s.command)]
+
+        if batchable and self._use_multi(connection):
+            # Fill spare slots with PIDs that would come due soon anyway.
+            soon = sorted((s for s in self.schedules
+                           if s not in due and self._batchable(s.command)
+                           and s.next_due - now <= s.interval / 2
+                           and (supports is None or supports(s.command))), key=lambda s: s.next_due)
+            pending = batchable + soon
+            for i in range(0, len(pending), MAX_PIDS_PER_REQUEST):
+                batch = pending[i:i + MAX_PIDS_PER_REQUEST]
+                if len(batch) == 1:
+                    singles.append(batch[0])
+                    continue
+                decoded = self._query_multi(connection, batch)
+                if decoded is None:
+                    # Adapter/vehicle rejected multi-PID; finish this cycle one at a time.
+                    singles.extend(s for s in pending[i:] if s not in singles)
+                    break
+                results.update(decoded)
+        else:
+            singles = due
+
+        for schedule in singles:
+            response = connection.query(schedule.command)
+            self.requests += 1
+            if not response.is_null():
+                results[schedule.command.name] = response.value
+
+        finished = time.monotonic()
+        by_name = {s.command.name: s for s in self.schedules}
+        for name in results:
+            by_name[name].mark_sampled(finished)
+        for schedule in due:
+            if schedule.command.name not in results:
+                schedule.failures += 1
+        # Schedule from the planned due time to hold the average rate, but never
+        # try to "catch up" a backlog if the link was slower than the targets.
+        for schedule in set(due) | {by_name[n] for n in results}:
+            planned = schedule.next_due + schedule.interval
+            schedule.next_due = planned if planned > now else now + schedule.interval
+        return results
+
+    @staticmethod
+    def _batchable(command: OBDCommand) -> bool:
+        return command.mode == 1 and command.pid is not None and command.bytes > 2
+
+    def _use_multi(self, connection) -> bool:
+        if self._multi_supported is None:
+            protocol = connection.protocol_id() if hasattr(connection, "protocol_id") else None
+            if protocol not in CAN_PROTOCOLS:
+                self._multi_supported = False
+                logger.log("OBD", "Multi-PID requests disabled", level="INFO",
+                           reason=f"Protocol {protocol} is not CAN", action="Querying one PID per request")
+        return self._multi_supported is not False
+
+    def _query_multi(self, connection, batch: List[PIDSchedule]) -> Optional[Dict[str, Any]]:
+        command_string = b"01" + b"".join(b"%02X" % s.command.pid for s in batch)
+        request = OBDCommand("MULTI_PID", "Multi-PID mode 01 request", command_string, 0,
+                             lambda messages: messages, ECU.ENGINE, False)
+        response = connection.query(request, force=True)
+        self.requests += 1
+        messages = response.value if not response.is_null() else None
+
+        decoded = self._split_response(messages or [], batch)
+        if len(decoded) < len(batch):
+            if self._multi_supported is None:
+                self._multi_supported = False
+                logger.log("OBD", "Multi-PID requests disabled", level="INFO",
+                           reason=f"Vehicle answered {len(decoded)}/{len(batch)} PIDs to {command_string.decode()}",
+                           action="Querying one PID per request")
+                return None
+        elif self._multi_supported is None:
+            self._multi_supported = True
+            logger.log("OBD", "Multi-PID requests enabled", level="INFO",
+                       action=f"Batching up to {MAX_PIDS_PER_REQUEST} PIDs per request")
+        return decoded
+
+    @staticmethod
+    def _split_response(messages, batch: List[PIDSchedule]) -> Dict[str, Any]:
+        # A multi-PID reply is "41 <pid> <data...> <pid> <data...>" per ECU; cut
+        # it into single-PID messages so each command's own decoder can run.
+        by_pid = {s.command.pid: s.command for s in batch}
+        decoded: Dict[str, Any] = {}
+        for message in messages:
+            data = message.data
+            if len(data) < 2 or data[0] != 0x41:
+                continue
+            i = 1
+            while i < len(data):
+                command = by_pid.get(data[i])
+                if command is None:
+                    break # Unknown PID: payload length is unknown, stop parsing
+                size = command.bytes - 2
+                part = copy.copy(message)
+                part.data = bytearray([0x41, data[i]]) + data[i + 1:i + 1 + size]
+                response = command([part])
+                if not response.is_null() and command.name not in decoded:
+                    decoded[command.name] = response.value
+                i += 1 + size
+        return decoded
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            s.command.name: {
+                "target_hz": round(1.0 / s.interval, 2),
+                "achieved_hz": round(s.achieved_hz, 2),
+                "samples": s.samples,
+                "failures": s.failures,
+            }
+            for s in self.schedules
+        }
+
+def build_rates(commands: List[OBDCommand], rates: Dict[str, float], default_hz: float) -> Dict[OBDCommand, float]:
+    return {cmd: rates.get(cmd.name, default_hz) for cmd in commands}
@@ -0,0 +1,370 @@
+import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Any, Dict, List, Optional
+from .broadcaster import FrameBroadcaster
+from .health import health_service
+from ..logging.logger import logger
+from ..config.settings import settings, resolve_path
+
+# One index record per frame: wall-clock capture time, byte offset, length.
+INDEX_RECORD = struct.Struct("<dQI")
+INDEX_DTYPE = np.dtype([("time", "<f8"), ("offset", "<u8"), ("length", "<u4")])
+
+class _Segment:
+    __slots__ = ("path", "start", "end", "size")
+
+    def __init__(self, path: str, start: float, end: float = 0.0, size: int = 0):
+        self.path = path # .mjpeg data file; the index lives alongside as .idx
+        self.start = start
+        self.end = end
+        self.size = size
+
+class SegmentRecorder:
+    """Dashcam-style rolling recorder for one camera.
+
+    A grab thread samples the camera's frame ring at the recording rate and
+    queues the already-encoded JPEG bytes (shared with stream viewers, or the
+    device's own bytes in passthrough mode). A writer thread drains the queue in
+    batches into rotating .mjpeg segments (concatenated JPEGs, playable with
+    `ffplay -f mjpeg`) plus a per-frame .idx file. Nothing here runs on the
+    capture thread; if the SD card stalls the queue fills and frames are counted
+    as dropped instead of backing up into capture.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        broadcaster: FrameBroadcaster,
+        directory: str,
+        fps: int = 10,
+        segment_seconds: int = 60,
+        segment_max_bytes: int = 32 * 1024 * 1024,
+        max_total_bytes: int = 1024 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        queue_frames: int = 64,
+    ):
+        self.name = name
+        self.broadcaster = broadcaster
+        self.directory = os.path.join(directory, name)
+        self.incident_directory = os.path.join(directory, "incidents")
+        self.interval = 1.0 / max(1, fps)
+        self.segment_seconds = segment_seconds
+        self.segment_max_bytes = segment_max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.flush_interval = flush_interval
+
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_frames)
+        self.running = False
+        self._threads: List[threading.Thread] = []
+
+        self._lock = threading.Lock() # Guards segment files and the segment list
+        self._segments: deque = deque()
+        self._data_file = None
+        self._index_file = None
+        self._flush_requested = threading.Event()
+        self._flushed = threading.Condition()
+        self._flush_count = 0
+
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.frames_dropped = 0
+        self.write_errors = 0
+        self.segments_deleted = 0
+        self.write_throughput = 0.0 # bytes/s written to disk, EWMA
+        self.last_flush_ms = 0.0 # Time the last batch write took
+        self._last_flush_end = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        os.makedirs(self.incident_directory, exist_ok=True)
+        self._load_segments()
+        self.running = True
+        self.broadcaster.subscribe() # Keeps the camera at full rate while recording
+        self._threads = [
+            threading.Thread(target=self._grab_loop, daemon=True, name=f"RecorderGrab-{self.name}"),
+            threading.Thread(target=self._write_loop, daemon=True, name=f"RecorderWrite-{self.name}"),
+        ]
+        for thread in self._threads:
+            thread.start()
+        health_service.register_metrics(f"recorder_{self.name}", self.get_stats)
+        logger.log(self.name, f"Recorder started ({len(self._segments)} existing segments)", level="INFO",
+                   action=f"Writing segments to {self.directory}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.broadcaster.unsubscribe()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        with self._lock:
+            self._close_segment()
+
+    def _load_segments(self):
+        # Segments survive restarts; rebuild the list from disk so rotation and
+        # clip saving keep working across reboots.
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".mjpeg"))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            times = self._read_index(path)["time"]
+            if len(times) == 0:
+                self._remove_segment_files(path)
+                continue
+            self._segments.append(_Segment(path, float(times[0]), float(times[-1]), os.path.getsize(path)))
+
+    # Capture side
+
+    def _grab_loop(self):
+        ring = self.broadcaster.ring
+        last_seq = ring.seq
+        while self.running:
+            started = time.monotonic()
+            frame = ring.wait_newer(last_seq, timeout=1.0)
+            if frame is None:
+                continue
+
+            seq, jpeg = self.broadcaster.get_jpeg()
+            if jpeg is not None and seq > last_seq:
+                last_seq = seq
+                try:
+                    self.queue.put_nowait((frame.wall_time, jpeg))
+                except queue.Full:
+                    self.frames_dropped += 1
+
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    # Writer side
+
+    def _write_loop(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while self.running or not self.queue.empty():
+            try:
+                batch.append(self.queue.get(timeout=max(0.0, min(0.2, deadline - time.monotonic()))))
+            except queue.Empty:
+                pass
+
+            if time.monotonic() >= deadline or self._flush_requested.is_set() or not self.running:
+                if batch:
+                    self._write_batch(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+                if self._flush_requested.is_set():
+                    self._flush_requested.clear()
+                    with self._flushed:
+                        self._flush_count += 1
+                        self._flushed.notify_all()
+
+    def _write_batch(self, batch):
+        started = time.monotonic()
+        try:
+            with self._lock:
+                segment = self._current_segment(batch[0][0])
+                offset = segment.size
+                index = bytearray()
+                for wall_time, jpeg in batch:
+                    index += INDEX_RECORD.pack(wall_time, offset, len(jpeg))
+                    offset += len(jpeg)
+
+                data = b"".join(jpeg for _, jpeg in batch)
+                self._data_file.write(data)
+                self._index_file.write(index)
+                self._data_file.flush()
+                self._index_file.flush()
+
+                segment.size = offset
+                segment.end = batch[-1][0]
+                self._enforce_limits()
+        except OSError as e:
+            self.write_errors += 1
+            self.frames_dropped += len(batch)
+            logger.log(self.name, "Recorder write failed", level="ERROR", reason=str(e),
+                       action="Dropping batch and reopening segment")
+            with self._lock:
+                self._close_segment()
+            return
+
+        finished = time.monotonic()
+        self.frames_written += len(batch)
+        self.bytes_written += len(data)
+        self.last_flush_ms = (finished - started) * 1000
+        if self._last_flush_end:
+            rate = len(data) / max(finished - self._last_flush_end, 1e-3)
+            self.write_throughput = 0.8 * self.write_throughput + 0.2 * rate
+        self._last_flush_end = finished
+
+    def _current_segment(self, first_time: float) -> _Segment:
+        # Caller holds _lock.
+        segment = self._segments[-1] if self._data_file and self._segments else None
+        if segment and (first_time - segment.start >= self.segment_seconds
+                        or segment.size >= self.segment_max_bytes):
+            self._close_segment()
+            segment = None
+
+        if segment is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(first_time))
+            path = os.path.join(self.directory, f"{self.name}-{stamp}-{int(first_time * 1000) % 1000:03d}.mjpeg")
+            self._data_file = open(path, "ab")
+            self._index_file = open(path[:-len(".mjpeg")] + ".idx", "ab")
+            segment = _Segment(path, first_time)
+            self._segments.append(segment)
+        return segment
+
+    def _close_segment(self):
+        # Caller holds _lock. fsync once per segment rather than per batch to
+        # keep SD card write amplification down.
+        for f in (self._data_file, self._index_file):
+            if f is None:
+                continue
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+            except OSError:
+                pass
+        self._data_file = None
+        self._index_file = None
+
+    def _enforce_limits(self):
+        # Caller holds _lock. Never delete the segment currently being written.
+        total = sum(s.size for s in self._segments)
+        while total > self.max_total_bytes and len(self._segments) > 1:
+            oldest = self._segments.popleft()
+            total -= oldest.size
+            self._remove_segment_files(oldest.path)
+            self.segments_deleted += 1
+
+    @staticmethod
+    def _remove_segment_files(path: str):
+        for p in (path, path[:-len(".mjpeg")] + ".idx"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _read_index(path: str) -> np.ndarray:
+        index_path = path[:-len(".mjpeg")] + ".idx"
+        try:
+            raw = np.fromfile(index_path, dtype=np.uint8)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        # Ignore a torn trailing record from an unclean shutdown.
+        usable = len(raw) - len(raw) % INDEX_DTYPE.itemsize
+        return raw[:usable].view(INDEX_DTYPE)
+
+    # Incidents
+
+    def flush(self, timeout: float = 2.0):
+        """Asks the writer to write out whatever is batched and waits for it."""
+        if not self.running:
+            return
+        with self._flushed:
+            target = self._flush_count + 1
+            self._flush_requested.set()
+            self._flushed.wait_for(lambda: self._flush_count >= target, timeout=timeout)
+
+    def save_clip(self, seconds: float, end_time: Optional[float] = None) -> Dict[str, Any]:
+        """Copies the last `seconds` of recorded frames into a standalone incident clip."""
+        self.flush()
+        end_time = end_time or time.time()
+        start_time = end_time - seconds
+
+        clip_path, clip = self._create_clip(end_time)
+        frames = 0
+        clip_offset = 0
+        first_time = last_time = None
+
+        with self._lock, clip, open(clip_path[:-len(".mjpeg")] + ".idx", "wb") as clip_index:
+            for segment in list(self._segments):
+                if segment.end < start_time or segment.start > end_time:
+                    continue
+                index = self._read_index(segment.path)
+                selected = index[(index["time"] >= start_time) & (index["time"] <= end_time)]
+                if len(selected) == 0:
+                    continue
+
+                # Frames are appended in time order, so the selection is one contiguous range.
+                begin = int(selected["offset"][0])
+                end = int(selected["offset"][-1] + selected["length"][-1])
+                with open(segment.path, "rb") as src:
+                    src.seek(begin)
+                    clip.write(src.read(end - begin))
+
+                rebased = selected.copy()
+                rebased["offset"] = selected["offset"].astype(np.int64) - begin + clip_offset
+                clip_index.write(rebased.tobytes())
+                clip_offset += end - begin
+                frames += len(selected)
+                first_time = first_time if first_time is not None else float(selected["time"][0])
+                last_time = float(selected["time"][-1])
+
+        logger.log(self.name, f"Saved incident clip ({frames} frames)", level="INFO",
+                   reason=f"Last {seconds:.0f}s requested", action=f"Wrote {clip_path}")
+        return {
+            "camera": self.name,
+            "path": clip_path,
+            "frames": frames,
+            "bytes": clip_offset,
+            "start": first_time,
+            "end": last_time,
+        }
+
+    def _create_clip(self, end_time: float):
+        """Creates a new clip file named after end_time (to the millisecond); never reuses a name."""
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(end_time)) + f"-{int(end_time * 1000) % 1000:03d}"
+        attempt = 0
+        while True:
+            suffix = f"-{attempt}" if attempt else ""
+            path = os.path.join(self.incident_directory, f"{self.name}-{stamp}{suffix}.mjpeg")
+            try:
+                return path, open(path, "xb")
+            except FileExistsError:
+                attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "frames_written": self.frames_written,
+            "bytes_written": self.bytes_written,
+            "frames_dropped": self.frames_dropped,
+            "write_errors": self.write_errors,
+            "queue_depth": self.queue.qsize(),
+            "write_throughput_kbps": round(self.write_throughput / 1024, 1),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "segments": len(self._segments),
+            "segments_deleted": self.segments_deleted,
+            "disk_bytes": sum(s.size for s in self._segments),
+        }
+
+def _build_recorders() -> Dict[str, SegmentRecorder]:
+    from .camera import camera_rear, camera_front
+
+    config = settings.recorder
+    directory = resolve_path(config.directory)
+    return {
+        camera.name: SegmentRecorder(
+            name=camera.name,
+            broadcaster=camera.broadcaster,
+            directory=directory,
+            fps=config.fps,
+            segment_seconds=config.segment_seconds,
+            segment_max_bytes=config.segment_max_bytes,
+            max_total_bytes=config.max_total_bytes,
+            flush_interval=config.flush_interval,
+            queue_frames=config.queue_frames,
+        )
+        for camera in (camera_rear, camera_front)
+        if camera.name in config.cameras
+    }
+
+recorders = _build_recorders()
@@ -0,0 +1,166 @@
+import atexit
+import struct
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from .frame_ring import Frame, FrameRing
+
+# Block layout: HEAD, then per slot a SLOT header followed by its data (both 64-byte aligned).
+HEAD = struct.Struct("<II") # capacity, slot data bytes
+SLOT = struct.Struct("<QddBxxxIIII") # seq, monotonic timestamp, wall time, kind, height, width, channels, nbytes
+KIND_PIXELS = 1
+KIND_JPEG = 2
+ALIGN = 64
+
+def _aligned(size: int) -> int:
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+class SharedFrameRing(FrameRing):
+    """FrameRing whose slots live in a multiprocessing.shared_memory block.
+
+    Used when a camera captures in a child process: the child is the single
+    writer and the API process reads pixels as numpy views straight out of the
+    block, without copying. The slot seqlock works as in FrameRing, with the
+    seq stored in the slot header. The reader does not watch the block for new
+    frames; the writer reports each committed seq over a pipe and the reader
+    calls advance(), so a slot is only read once the pipe has made its data
+    visible. Encoded JPEGs and decoded pixels attached by the reader are kept
+    on the reader's side.
+    """
+
+    def __init__(self, capacity: int = 16, slot_bytes: int = 0):
+        super().__init__(capacity)
+        self.slot_bytes = _aligned(slot_bytes)
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._stride = _aligned(SLOT.size) + self.slot_bytes
+        # Reader-side data attached per slot: [seq, pixels, jpeg]
+        self._local: List[list] = [[0, None, None] for _ in range(self.capacity)]
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.shm.name if self.shm is not None else None
+
+    def create(self):
+        """Allocates the block (reader side, once). Unlinked when the process exits."""
+        if self.shm is not None:
+            return
+        size = _aligned(HEAD.size) + self._stride * self.capacity
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        HEAD.pack_into(self.shm.buf, 0, self.capacity, self.slot_bytes)
+        for index in range(self.capacity):
+            SLOT.pack_into(self.shm.buf, self._header_offset(index), 0, 0.0, 0.0, 0, 0, 0, 0, 0)
+        atexit.register(self.unlink)
+
+    @classmethod
+    def open(cls, name: str, start_seq: int = 0) -> "SharedFrameRing":
+        """Opens an existing block (writer side); numbering continues from start_seq."""
+        # The creating process owns the block's lifetime, so the writer does not track it.
+        shm = shared_memory.SharedMemory(name=name, track=False)
+        capacity, slot_bytes = HEAD.unpack_from(shm.buf, 0)
+        ring = cls(capacity, slot_bytes)
+        ring.shm = shm
+        ring._seq = start_seq
+        return ring
+
+    def unlink(self):
+        if self.shm is None:
+            return
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _header_offset(self, index: int) -> int:
+        return _aligned(HEAD.size) + index * self._stride
+
+    def _data_offset(self, index: int) -> int:
+        return self._header_offset(index) + _aligned(SLOT.size)
+
+    def _view(self, index: int, shape: Tuple[int, ...]) -> np.ndarray:
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=self._data_offset(index))
+
+    def _slot_seq(self, index: int) -> int:
+        return struct.unpack_from("<Q", self.shm.buf, self._header_offset(index))[0]
+
+    def fits(self, shape: Tuple[int, ...]) -> bool:
+        return int(np.prod(shape)) <= self.slot_bytes
+
+    # Writer side (child process)
+
+    def writable(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """A view of the next slot's data area, invalidating the slot for readers."""
+        if not self.fits(shape):
+            raise ValueError(f"Frame {shape} does not fit a {self.slot_bytes} byte slot")
+        index = (self._seq + 1) % self.capacity
+        struct.pack_into("<Q", self.shm.buf, self._header_offset(index), 0)
+        return self._view(index, tuple(shape))
+
+    def commit(self, pixels: Optional[np.ndarray] = None, jpeg: Optional[bytes] = None,
+               timestamp: Optional[float] = None) -> int:
+        seq = self._seq + 1
+        index = seq % self.capacity
+        offset = self._data_offset(index)
+        struct.pack_into("<Q", self.shm.buf, self._header_offset(index), 0)
+        if jpeg is not None:
+            if len(jpeg) > self.slot_bytes:
+                raise ValueError(f"JPEG of {len(jpeg)} bytes does not fit a {self.slot_bytes} byte slot")
+            self.shm.buf[offset:offset + len(jpeg)] = jpeg
+            kind, shape, nbytes = KIND_JPEG, (0, 0, 0), len(jpeg)
+        else:
+            shape = tuple(pixels.shape) + (1,) * (3 - pixels.ndim)
+            view = self._view(index, pixels.shape)
+            if not np.shares_memory(view, pixels):
+                np.copyto(view, pixels) # Not rendered in place (e.g. the driver reallocated)
+            kind, nbytes = KIND_PIXELS, pixels.nbytes
+        SLOT.pack_into(self.shm.buf, self._header_offset(index), 0,
+                       timestamp if timestamp is not None else time.monotonic(), time.time(),
+                       kind, *shape, nbytes)
+        # Stamp the seq last: the slot is complete from here on.
+        struct.pack_into("<Q", self.shm.buf, self._header_offset(index), seq)
+        self._seq = seq
+        return seq
+
+    # Reader side (API process)
+
+    def advance(self, seq: int):
+        """Publishes frames up to seq to readers once the writer has reported them."""
+        with self._cond:
+            if seq > self._seq:
+                self._seq = seq
+            self._cond.notify_all()
+
+    def attach(self, seq: int, pixels: Optional[np.ndarray] = None, jpeg: Optional[bytes] = None):
+        index = seq % self.capacity
+        if self._slot_seq(index) != seq:
+            return
+        local = self._local[index]
+        if local[0] != seq:
+            local[0], local[1], local[2] = seq, None, None
+        if pixels is not None:
+            local[1] = pixels
+        if jpeg is not None:
+            local[2] = jpeg
+
+    def get(self, seq: int) -> Optional[Frame]:
+        if self.shm is None or seq <= 0 or seq > self._seq or seq <= self._seq - self.capacity:
+            return None
+        index = seq % self.capacity
+        slot_seq, timestamp, wall_time, kind, height, width, channels, nbytes = \
+            SLOT.unpack_from(self.shm.buf, self._header_offset(index))
+        if slot_seq != seq:
+            return None
+        local = self._local[index]
+        pixels, jpeg = (local[1], local[2]) if local[0] == seq else (None, None)
+        if kind == KIND_PIXELS and pixels is None:
+            pixels = self._view(index, (height, width, channels) if channels > 1 else (height, width))
+        elif kind == KIND_JPEG and jpeg is None:
+            # Copied out once (JPEGs are small) so responses can hold on to plain bytes.
+            offset = self._data_offset(index)
+            jpeg = bytes(self.shm.buf[offset:offset + nbytes])
+            self.attach(seq, jpeg=jpeg)
+        frame = Frame(seq, timestamp, wall_time, pixels, jpeg)
+        return frame if self._slot_seq(index) == seq else None
+
+    def is_current(self, frame: Frame) -> bool:
+        return self.shm is not None and self._slot_seq(frame.seq % self.capacity) == frame.seq
@@ -1,29 +1,225 @@
+import os
 import psutil
+import threading
 import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from ..logging.logger import logger
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+# Raspberry Pi firmware flags (same bits as `vcgencmd get_throttled`), readable without spawning a process.
+THROTTLED_PATH = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+THROTTLE_BITS = {
+    "under_voltage": 0,
+    "freq_capped": 1,
+    "throttled": 2,
+    "soft_temp_limit": 3,
+}
+OCCURRED_SHIFT = 16 # The same flags, latched since boot
+
+# Scalars kept per history sample; the full snapshot is only kept for the latest sample.
+HISTORY_FIELDS = ("cpu_temp", "cpu_usage", "cpu_freq", "ram_usage", "disk_usage",
+                  "throttled", "wifi_clients", "process_cpu")
 
 class SystemService:
-    def __init__(self):
+    """Samples host metrics on a background thread at a fixed cadence.
+
+    Requests are served from the latest snapshot and a bounded history, so
+    polling /api/status never costs a measurement. Per-thread CPU is derived
+    from the delta of each thread's CPU time between samples, which makes it
+    possible to see which worker (capture, encoder, OBD poll...) is busy.
+    """
+
+    def __init__(self, interval: float = 2.0, history_seconds: int = 3600, wifi_interface: str = "wlan0"):
         self.start_time = time.time()
+        self.interval = interval
+        self.wifi_interface = wifi_interface
+        self.history = deque(maxlen=max(1, int(history_seconds / interval)))
+        self.latest: Optional[Dict[str, Any]] = None
+        self.samples = 0
+        self.sample_ms = 0.0 # Cost of the last sample, to keep the sampler honest
+        self._process = psutil.Process()
+        self._thread_times: Dict[int, float] = {}
+        self._last_sample_at = 0.0
+        self._last_throttled = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
 
-    def get_stats(self):
-        try:
-            # CPU Temperature (Raspberry Pi specific)
-            cpu_temp = 0.0
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SystemSampler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
             try:
-                with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-                    cpu_temp = float(f.read()) / 1000.0
-            except FileNotFoundError:
-                # Fallback for non-Pi systems (development)
-                cpu_temp = 45.0 + (time.time() % 10) 
-
-            return {
-                "cpu_temp": round(cpu_temp, 1),
-                "cpu_usage": psutil.cpu_percent(),
-                "ram_usage": psutil.virtual_memory().percent,
-                "disk_usage": psutil.disk_usage('/').percent,
-                "uptime": int(time.time() - self.start_time),
-            }
-        except Exception as e:
-            return {"error": str(e)}
-
-system_service = SystemService()
+                self.sample()
+            except Exception as e:
+                logger.log("SYSTEM", "System metrics sample failed", level="WARN", reason=str(e),
+                           action=f"Retrying in {self.interval:g}s")
+
+    def sample(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        now = time.time()
+        per_core = psutil.cpu_percent(percpu=True) # Since the previous call
+        freq = psutil.cpu_freq()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        throttled = self._read_throttled()
+
+        snapshot = {
+            "timestamp": now,
+            "cpu_temp": self._read_cpu_temp(),
+            "cpu_usage": round(sum(per_core) / len(per_core), 1) if per_core else 0.0,
+            "cpu_per_core": per_core,
+            "cpu_freq": round(freq.current) if freq else None,
+            "load_avg": [round(v, 2) for v in os.getloadavg()],
+            "ram_usage": memory.percent,
+            "ram_available_mb": memory.available // (1024 * 1024),
+            "disk_usage": disk.percent,
+            "disk_free_mb": disk.free // (1024 * 1024),
+            "throttled": throttled,
+            "throttle_flags": self._decode_throttled(throttled),
+            "wifi_clients": self._count_wifi_clients(),
+            "uptime": int(now - self.start_time),
+        }
+        snapshot.update(self._process_stats(started))
+
+        self._check_throttling(throttled, snapshot["cpu_temp"])
+        self.latest = snapshot
+        self.history.append({"timestamp": now, **{k: snapshot[k] for k in HISTORY_FIELDS}})
+        self.samples += 1
+        self.sample_ms = round((time.monotonic() - started) * 1000, 2)
+        return snapshot
+
+    @staticmethod
+    def _read_cpu_temp() -> float:
+        # CPU Temperature (Raspberry Pi specific)
+        try:
+            with open(THERMAL_ZONE, "r") as f:
+                return round(float(f.read()) / 1000.0, 1)
+        except (FileNotFoundError, ValueError):
+            # Fallback for non-Pi systems (development)
+            return round(45.0 + (time.time() % 10), 1)
+
+    @staticmethod
+    def _read_throttled() -> Optional[int]:
+        try:
+            with open(THROTTLED_PATH, "r") as f:
+                return int(f.read().strip(), 16)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _decode_throttled(value: Optional[int]) -> Optional[Dict[str, Dict[str, bool]]]:
+        if value is None:
+            return None
+        return {
+            "now": {name: bool(value >> bit & 1) for name, bit in THROTTLE_BITS.items()},
+            "since_boot": {name: bool(value >> (bit + OCCURRED_SHIFT) & 1) for name, bit in THROTTLE_BITS.items()},
+        }
+
+    def _check_throttling(self, value: Optional[int], cpu_temp: float):
+        if value is None:
+            return
+        active = value & 0xF
+        started = active & ~self._last_throttled
+        if started:
+            names = [name for name, bit in THROTTLE_BITS.items() if started >> bit & 1]
+            logger.log("SYSTEM", f"Firmware throttling: {', '.join(names)}", level="WARN",
+                       reason=f"CPU {cpu_temp} C, flags 0x{value:x}",
+                       action="Check power supply and cooling")
+        self._last_throttled = active
+
+    def _count_wifi_clients(self) -> Optional[int]:
+        # Neighbours with a resolved address on the access point interface. Cheaper than
+        # `iw station dump` (no process spawn); a client that just left lingers until its entry expires.
+        if not os.path.exists(f"/sys/class/net/{self.wifi_interface}"):
+            return None
+        try:
+            with open("/proc/net/arp", "r") as f:
+                rows = [line.split() for line in f.readlines()[1:]]
+        except OSError:
+            return None
+        return sum(1 for row in rows if len(row) >= 6 and row[5] == self.wifi_interface and row[2] != "0x0")
+
+    def _process_stats(self, now: float) -> Dict[str, Any]:
+        proc = self._process
+        with proc.oneshot():
+            cpu = proc.cpu_percent() # Since the previous call
+            rss = proc.memory_info().rss
+            threads = proc.threads()
+
+        elapsed = now - self._last_sample_at if self._last_sample_at else 0.0
+        self._last_sample_at = now
+        names = {t.native_id: t.name for t in threading.enumerate()}
+        times = {}
+        per_thread = []
+        for thread in threads:
+            total = thread.user_time + thread.system_time
+            times[thread.id] = total
+            previous = self._thread_times.get(thread.id)
+            if previous is None or elapsed <= 0:
+                continue
+            per_thread.append({
+                "name": names.get(thread.id) or self._native_thread_name(thread.id),
+                "tid": thread.id,
+                "cpu": round((total - previous) / elapsed * 100, 1),
+            })
+        self._thread_times = times
+        per_thread.sort(key=lambda t: t["cpu"], reverse=True)
+
+        return {
+            "process_cpu": cpu,
+            "process_rss_mb": round(rss / (1024 * 1024), 1),
+            "process_threads": len(threads),
+            "threads": per_thread[:16],
+        }
+
+    @staticmethod
+    def _native_thread_name(tid: int) -> str:
+        # Threads not started from Python (OpenCV, uvicorn workers) only have their OS name.
+        try:
+            with open(f"/proc/self/task/{tid}/comm", "r") as f:
+                return f.read().strip()
+        except OSError:
+            return str(tid)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Summary from the latest sample (the /api/status fields)."""
+        latest = self.latest or self.sample()
+        return {
+            "cpu_temp": latest["cpu_temp"],
+            "cpu_usage": latest["cpu_usage"],
+            "ram_usage": latest["ram_usage"],
+            "disk_usage": latest["disk_usage"],
+            "throttled": latest["throttled"],
+            "uptime": int(time.time() - self.start_time),
+            "sampled_at": latest["timestamp"],
+        }
+
+    def get_telemetry(self) -> Dict[str, Any]:
+        """The full latest sample, including per-core, throttling, Wi-Fi and per-thread stats."""
+        latest = self.latest or self.sample()
+        return {**latest, "uptime": int(time.time() - self.start_time),
+                "sampler": {"interval": self.interval, "samples": self.samples, "sample_ms": self.sample_ms}}
+
+    def get_history(self, since: float = -600) -> List[Dict[str, Any]]:
+        """History samples newer than since (epoch seconds; <= 0 means relative to now)."""
+        if since <= 0:
+            since = time.time() + since
+        return [entry for entry in list(self.history) if entry["timestamp"] > since]
+
+from ..config.settings import settings
+system_service = SystemService(interval=settings.system.sample_interval,
+                               history_seconds=settings.system.history_seconds,
+                               wifi_interface=settings.system.wifi_interface)
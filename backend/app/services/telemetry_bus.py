@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+# Keys that change on every poll and are not worth an update on their own.
+VOLATILE_KEYS = {"timestamp"}
+
+class TelemetryBus:
+    """In-process pub/sub for live state (vehicle telemetry, subsystem health).
+
+    Producers publish() full snapshots from their own threads; only keys whose
+    value changed become an update. Each update gets a sequence number and is
+    serialized once, both as a delta and (lazily) as a full snapshot, so every
+    SSE subscriber is handed the same JSON string. A short history of deltas
+    lets a reconnecting client resume from its Last-Event-ID, and lets
+    rate-capped subscribers coalesce several updates into one event.
+    """
+
+    def __init__(self, history: int = 256):
+        # Event ids are "<epoch>-<seq>" so ids from before a restart are not mistaken for current ones.
+        self.epoch = f"{int(time.time()):x}"
+        self.seq = 0
+        self.state: Dict[str, Any] = {}
+        self._full_json: Optional[str] = None
+        self._history = deque(maxlen=history) # (seq, changes, changes JSON)
+        self._lock = threading.Lock()
+        # Async SSE handlers waiting for the next update: (loop, event) pairs.
+        self._waiters = set()
+
+    def publish(self, values: Dict[str, Any]) -> bool:
+        """Merges a snapshot into the bus state. Returns True if anything changed."""
+        with self._lock:
+            changes = {k: v for k, v in values.items() if k not in self.state or self.state[k] != v}
+            if not changes.keys() - VOLATILE_KEYS:
+                return False
+            self.state.update(changes)
+            self.seq += 1
+            self._full_json = None
+            self._history.append((self.seq, changes, json.dumps(changes)))
+        self._wake_waiters()
+        return True
+
+    def _wake_waiters(self):
+        for loop, event in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                self._waiters.discard((loop, event))
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, event_id: Optional[str]) -> int:
+        """Returns the seq a client last saw, or 0 if it has to start from a full snapshot."""
+        epoch, _, seq = (event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return 0
+        return int(seq)
+
+    def snapshot(self) -> Tuple[int, str]:
+        with self._lock:
+            return self.seq, self._snapshot_json()
+
+    def _snapshot_json(self) -> str:
+        if self._full_json is None:
+            self._full_json = json.dumps(self.state)
+        return self._full_json
+
+    def updates_since(self, seq: int, delta: bool = False) -> Optional[Tuple[int, str]]:
+        """Returns (new seq, JSON) bringing a client at seq up to date, or None if it is current.
+
+        Full mode always sends the current snapshot. Delta mode sends the
+        changed keys: the shared pre-serialized update when the client is one
+        behind, a merged delta when it skipped some, and a full snapshot when
+        it is new (seq 0) or fell out of the history.
+        """
+        with self._lock:
+            if seq >= self.seq:
+                return None
+            oldest = self._history[0][0] if self._history else self.seq + 1
+            if not delta or seq == 0 or seq < oldest - 1:
+                return self.seq, self._snapshot_json()
+            if seq == self.seq - 1:
+                return self.seq, self._history[-1][2]
+            merged: Dict[str, Any] = {}
+            for update_seq, changes, _ in self._history:
+                if update_seq > seq:
+                    merged.update(changes)
+            return self.seq, json.dumps(merged)
+
+    def changes_since(self, seq: int) -> Optional[Tuple[int, Dict[str, Any], bool]]:
+        """Like updates_since in delta mode, unserialized: (new seq, changed keys, is full snapshot)."""
+        with self._lock:
+            if seq >= self.seq:
+                return None
+            oldest = self._history[0][0] if self._history else self.seq + 1
+            if seq == 0 or seq < oldest - 1:
+                return self.seq, dict(self.state), True
+            merged: Dict[str, Any] = {}
+            for update_seq, changes, _ in self._history:
+                if update_seq > seq:
+                    merged.update(changes)
+            return self.seq, merged, False
+
+    async def wait_newer(self, seq: int, timeout: float = 15.0) -> bool:
+        """Waits on the event loop until an update newer than seq exists."""
+        if self.seq > seq:
+            return True
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        try:
+            # Re-check after registering so a publish in between is not missed.
+            if self.seq <= seq:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+telemetry_bus = TelemetryBus()
@@ -0,0 +1,84 @@
+import math
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from .telemetry_bus import TelemetryBus, telemetry_bus
+
+# Binary telemetry frame: header, then one entry per changed numeric key.
+FRAME_TELEMETRY = 1
+FLAG_FULL = 0x01 # Full snapshot rather than a delta
+HEADER = struct.Struct("<BBHd") # frame type, flags, entry count, hub timestamp (0 = unchanged)
+ENTRY = struct.Struct("<Hf") # key id, value (NaN = null)
+
+class TelemetryCodec:
+    """Encodes TelemetryBus updates as compact binary frames for /api/ws.
+
+    Numeric keys are sent as (u16 id, float32) pairs, 6 bytes each instead of
+    the key name and decimal text. Ids are assigned on first sight and never
+    reused, so a client only needs the key table once plus whatever was added
+    since (keys_from). Non-numeric values (units, the simulated flag) are
+    rare and returned separately to go out as JSON. Encoded frames are cached
+    per (from seq, to seq), so clients that are in step share one encode.
+    """
+
+    def __init__(self, bus: TelemetryBus, cache_size: int = 8):
+        self.bus = bus
+        self.keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._cache: "OrderedDict[Tuple[int, int], Tuple[bytes, Dict[str, Any]]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def frame_since(self, seq: int) -> Optional[Tuple[int, bytes, Dict[str, Any]]]:
+        """(new seq, binary frame, non-numeric changes) for a client at seq, or None if current."""
+        update = self.bus.changes_since(seq)
+        if update is None:
+            return None
+        new_seq, changes, full = update
+        key = (0 if full else seq, new_seq)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = self._cache[key] = self.encode(changes, full)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return new_seq, cached[0], cached[1]
+
+    def encode(self, changes: Dict[str, Any], full: bool = False) -> Tuple[bytes, Dict[str, Any]]:
+        entries = []
+        extras: Dict[str, Any] = {}
+        timestamp = 0.0
+        for name, value in changes.items():
+            if name == "timestamp":
+                timestamp = float(value)
+            elif value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+                entries.append(ENTRY.pack(self._key_id(name), math.nan if value is None else value))
+            else:
+                extras[name] = value
+        header = HEADER.pack(FRAME_TELEMETRY, FLAG_FULL if full else 0, len(entries), timestamp)
+        return header + b"".join(entries), extras
+
+    def _key_id(self, name: str) -> int:
+        key_id = self._ids.get(name)
+        if key_id is None:
+            key_id = self._ids[name] = len(self.keys)
+            self.keys.append(name)
+        return key_id
+
+    def keys_from(self, offset: int) -> List[str]:
+        return self.keys[offset:]
+
+    @staticmethod
+    def decode(frame: bytes, keys: List[str]) -> Tuple[bool, Dict[str, Any]]:
+        """Reference decoder (the frontend has its own): returns (full, values)."""
+        _, flags, count, timestamp = HEADER.unpack_from(frame)
+        values: Dict[str, Any] = {}
+        for i in range(count):
+            key_id, value = ENTRY.unpack_from(frame, HEADER.size + i * ENTRY.size)
+            values[keys[key_id]] = None if math.isnan(value) else value
+        if timestamp:
+            values["timestamp"] = timestamp
+        return bool(flags & FLAG_FULL), values
+
+telemetry_codec = TelemetryCodec(telemetry_bus)
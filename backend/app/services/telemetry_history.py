@@ -0,0 +1,141 @@
+import threading
+import time
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+class PIDHistory:
+    """Fixed-capacity ring of (wall time, value) samples for one PID.
+
+    Timestamps are float64 epoch seconds, values float32: 12 bytes per sample,
+    allocated once. Timestamps are kept non-decreasing (a clock stepping
+    backwards is clamped) so windows can be found with a binary search.
+    """
+
+    def __init__(self, capacity: int):
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.count = 0 # Total samples ever appended
+        self.unit: Optional[str] = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self.times)
+
+    def append(self, timestamp: float, value: float):
+        i = self.count % self.capacity
+        if self.count and timestamp < self.times[i - 1]:
+            timestamp = self.times[i - 1]
+        self.times[i] = timestamp
+        self.values[i] = value
+        self.count += 1
+
+    def window(self, since: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies out the samples at or after since, oldest first."""
+        n = min(self.count, self.capacity)
+        start = self.count % self.capacity if self.count > self.capacity else 0
+        # The ring is two sorted runs, [start:n] then [0:start]; only copy the tail that is wanted.
+        runs = [(start, n), (0, start)] if start else [(0, n)]
+        times, values = [], []
+        for lo, hi in runs:
+            first = lo + int(np.searchsorted(self.times[lo:hi], since, side="left"))
+            if first < hi:
+                times.append(self.times[first:hi])
+                values.append(self.values[first:hi])
+        if not times:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float32)
+        return np.concatenate(times), np.concatenate(values)
+
+def bucket_minmax(times: np.ndarray, values: np.ndarray, points: int) -> Dict[str, np.ndarray]:
+    """Splits the span into equal time buckets and reduces each to min/max/avg.
+
+    Empty buckets (gaps in the data) are left out rather than interpolated.
+    """
+    if len(times) == 0:
+        return {"t": times, "min": values, "max": values, "avg": values}
+    span = max(times[-1] - times[0], 1e-9)
+    bucket = np.minimum(((times - times[0]) / span * points).astype(np.int64), points - 1)
+    # Start index of each non-empty bucket; times are sorted so buckets are contiguous.
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    counts = np.diff(np.append(starts, len(times)))
+    values64 = values.astype(np.float64)
+    return {
+        "t": np.add.reduceat(times, starts) / counts,
+        "min": np.minimum.reduceat(values, starts),
+        "max": np.maximum.reduceat(values, starts),
+        "avg": np.add.reduceat(values64, starts) / counts,
+    }
+
+def lttb(times: np.ndarray, values: np.ndarray, points: int) -> Dict[str, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: picks the points-most visually significant samples.
+
+    Bucket means are computed in one vectorized pass; only the (inherently
+    sequential) selection loop runs per bucket, over numpy slices.
+    """
+    n = len(times)
+    if points < 3 or n <= points:
+        return {"t": times, "v": values}
+    v = values.astype(np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64) # points-2 buckets between the end points
+    counts = np.diff(edges)
+    mean_t = np.add.reduceat(times[:n - 1], edges[:-1]) / counts
+    mean_v = np.add.reduceat(v[:n - 1], edges[:-1]) / counts
+    # The "next" reference for the last bucket is the final sample.
+    next_t = np.append(mean_t[1:], times[-1])
+    next_v = np.append(mean_v[1:], v[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ta, va = times[a], v[a]
+        area = np.abs((ta - next_t[i]) * (v[lo:hi] - va) - (ta - times[lo:hi]) * (next_v[i] - va))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return {"t": times[selected], "v": values[selected]}
+
+DOWNSAMPLERS = {
+    "minmax": bucket_minmax,
+    "lttb": lttb,
+}
+
+class TelemetryHistory:
+    """In-memory history of every polled PID, one PIDHistory ring each."""
+
+    def __init__(self, capacities: Dict[str, int]):
+        self.pids = {name: PIDHistory(capacity) for name, capacity in capacities.items()}
+        self._lock = threading.Lock()
+
+    def record(self, values: Dict[str, object], timestamp: Optional[float] = None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            for name, history in self.pids.items():
+                value = values.get(name)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    history.append(timestamp, value)
+                    unit = values.get(f"{name}_unit")
+                    if unit:
+                        history.unit = unit
+
+    def query(self, pid: str, since: float = 0.0, points: int = 300, mode: str = "minmax") -> Dict[str, object]:
+        """Downsampled series for one PID. since <= 0 is relative to now (e.g. -1200 = last 20 min)."""
+        history = self.pids[pid]
+        if since <= 0:
+            since = time.time() + since if since else 0.0
+        with self._lock:
+            times, values = history.window(since)
+        series = DOWNSAMPLERS[mode](times, values, max(points, 1))
+        result: Dict[str, object] = {
+            "pid": pid,
+            "unit": history.unit,
+            "mode": mode,
+            "since": since,
+            "samples": len(times),
+        }
+        for key, column in series.items():
+            result[key] = column.round(3).tolist()
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"samples": min(h.count, h.capacity), "capacity": h.capacity}
+                for name, h in self.pids.items()}
@@ -0,0 +1,404 @@
+import bisect
+import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+from .health import health_service
+from .telemetry_history import DOWNSAMPLERS
+from ..logging.logger import logger
+
+# Trip file layout: a fixed 1 KiB header, then 16-byte records in time order.
+#   header: magic, version, channel count, start time, resolution (0 = raw,
+#           else seconds per summary bucket), then NUL-padded channel names.
+#   record: time, channel index, kind, value.
+# Fixed-size records can be appended with no framing, survive a torn tail
+# (the partial record is ignored) and map straight onto a numpy structured
+# array, so readers memory-map the file instead of loading it.
+MAGIC = b"VDTRIP\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIdd")
+HEADER_SIZE = 1024
+CHANNEL_NAME_SIZE = 32
+MAX_CHANNELS = (HEADER_SIZE - HEADER.size) // CHANNEL_NAME_SIZE
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("channel", "<u2"), ("kind", "<u2"), ("value", "<f4")])
+
+# Record kinds. Summaries store the bucket average as SAMPLE plus MIN/MAX.
+SAMPLE, EVENT, MIN, MAX = 0, 1, 2, 3
+# Health states are logged as EVENT records on "health.<subsystem>" channels.
+STATE_CODES = {"ACTIVE": 0, "WAITING": 1, "FAULTY": 2, "DISABLED": 3}
+STATE_NAMES = {code: state for state, code in STATE_CODES.items()}
+
+class TripReader:
+    """Read-only, memory-mapped view of one trip file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.id = os.path.basename(path)[:-len(".trip")]
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            # Empty or cut short, e.g. by a power cut before the header reached the card.
+            raise ValueError(f"{path} has an incomplete trip header")
+        magic, version, count, self.started, self.resolution = HEADER.unpack_from(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a VanDash trip file")
+        names = header[HEADER.size:HEADER.size + count * CHANNEL_NAME_SIZE]
+        self.channels = [names[i:i + CHANNEL_NAME_SIZE].rstrip(b"\x00").decode()
+                         for i in range(0, len(names), CHANNEL_NAME_SIZE)]
+
+        # Ignore a torn trailing record from an unclean shutdown.
+        n = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self.records = (np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+                        if n > 0 else np.zeros(0, dtype=RECORD_DTYPE))
+
+    @property
+    def start(self) -> float:
+        return float(self.records["time"][0]) if len(self.records) else self.started
+
+    @property
+    def end(self) -> float:
+        return float(self.records["time"][-1]) if len(self.records) else self.started
+
+    def _range(self, since: float = 0.0, until: float = 0.0):
+        # bisect probes only log2(n) records; np.searchsorted would first copy the
+        # strided time column out of the whole mapping.
+        times = self.records["time"]
+        lo = bisect.bisect_left(times, since) if since else 0
+        hi = bisect.bisect_right(times, until) if until else len(times)
+        return self.records[lo:hi]
+
+    def series(self, channel: str, since: float = 0.0, until: float = 0.0,
+               points: int = 500, mode: str = "minmax") -> Dict[str, Any]:
+        """Downsampled samples of one channel; only the requested time range is paged in."""
+        index = self.channels.index(channel)
+        records = self._range(since, until)
+        mask = (records["channel"] == index) & (records["kind"] == SAMPLE)
+        times = np.asarray(records["time"][mask])
+        values = np.asarray(records["value"][mask])
+        series = DOWNSAMPLERS[mode](times, values, points)
+        result: Dict[str, Any] = {"channel": channel, "mode": mode, "samples": len(times)}
+        for key, column in series.items():
+            result[key] = column.round(3).tolist()
+        return result
+
+    def events(self) -> List[Dict[str, Any]]:
+        records = self.records[self.records["kind"] == EVENT]
+        return [
+            {"time": float(r["time"]), "subsystem": self.channels[r["channel"]][len("health."):],
+             "state": STATE_NAMES.get(int(r["value"]), "UNKNOWN")}
+            for r in records
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.end - self.start, 1),
+            "records": len(self.records),
+            "bytes": HEADER_SIZE + self.records.nbytes,
+            "resolution": self.resolution,
+        }
+
+class TripLog:
+    """Persistent per-drive log of OBD samples and health transitions.
+
+    record() runs on the OBD poll thread and only queues (time, channel, kind,
+    value) tuples. A writer thread turns each batch into one numpy record
+    array, appends it to the current trip file and fsyncs, so the SD card sees
+    one write + fsync per flush_interval rather than one per sample. A pause in
+    samples longer than gap_seconds ends the trip; the next sample starts a new
+    file. Closed trips older than compact_after_days are rewritten as
+    compact_resolution summaries (avg/min/max per bucket), and the oldest trips
+    are deleted beyond max_total_bytes.
+    """
+
+    def __init__(self, directory: str, pids: List[str], gap_seconds: float = 300.0,
+                 flush_interval: float = 5.0, queue_records: int = 8192,
+                 compact_after_days: float = 7.0, compact_resolution: float = 10.0,
+                 max_total_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.channels = list(pids) + [f"health.{name}" for name in health_service.subsystems]
+        if len(self.channels) > MAX_CHANNELS:
+            raise ValueError(f"Trip files hold at most {MAX_CHANNELS} channels")
+        self._channel_index = {name: i for i, name in enumerate(self.channels)}
+        self.gap_seconds = gap_seconds
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after_days * 86400
+        self.compact_resolution = compact_resolution
+        self.max_total_bytes = max_total_bytes
+
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_records)
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock() # Guards the trip files against compaction/deletion while read
+        self._file = None
+        self.current_id: Optional[str] = None
+        self._last_sample = 0.0
+
+        self.records_written = 0
+        self.records_dropped = 0
+        self.write_errors = 0
+        self.trips_compacted = 0
+        self.trips_deleted = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        health_service.add_listener(self._on_health_change)
+        self.thread = threading.Thread(target=self._write_loop, daemon=True, name="TripLogWriter")
+        self.thread.start()
+        health_service.register_metrics("trip_log", self.get_stats)
+        logger.log("trips", "Trip log started", level="INFO", action=f"Writing trips to {self.directory}")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.flush_interval + 2)
+
+    # Producer side (OBD poll thread, health updates)
+
+    def record(self, values: Dict[str, Any], timestamp: float):
+        """Queues every numeric PID value in an OBD snapshot."""
+        if not self.running:
+            return
+        for name, value in values.items():
+            channel = self._channel_index.get(name)
+            if channel is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                self._put((timestamp, channel, SAMPLE, value))
+
+    def _on_health_change(self, name: str, old_state: str, new_state: str):
+        channel = self._channel_index.get(f"health.{name}")
+        if self.running and channel is not None:
+            self._put((time.time(), channel, EVENT, STATE_CODES.get(new_state, -1)))
+
+    def _put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.records_dropped += 1
+
+    # Writer side
+
+    def _write_loop(self):
+        self._maintain()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while self.running or not self.queue.empty():
+            try:
+                batch.append(self.queue.get(timeout=max(0.0, min(0.5, deadline - time.monotonic()))))
+            except queue.Empty:
+                pass
+
+            if time.monotonic() >= deadline or not self.running:
+                if batch:
+                    self._write_batch(batch)
+                    batch = []
+                if self._file and time.time() - self._last_sample > self.gap_seconds:
+                    self._close_trip()
+                    self._maintain()
+                deadline = time.monotonic() + self.flush_interval
+        self._close_trip()
+
+    def _write_batch(self, batch):
+        started = time.monotonic()
+        records = np.array(batch, dtype=RECORD_DTYPE)
+        records.sort(order="time", kind="stable")
+        samples = records["time"][records["kind"] == SAMPLE]
+
+        # Health events only land in a trip that is already open; samples open/rotate trips.
+        if len(samples):
+            if self._file and samples[0] - self._last_sample > self.gap_seconds:
+                self._close_trip()
+            if self._file is None:
+                self._open_trip(float(samples[0]))
+            self._last_sample = float(samples[-1])
+        if self._file is None:
+            return
+
+        try:
+            self._file.write(records.tobytes())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.write_errors += 1
+            self.records_dropped += len(records)
+            logger.log("trips", "Trip log write failed", level="ERROR", reason=str(e),
+                       action="Dropping batch and starting a new trip file")
+            self._close_trip()
+            return
+        self.records_written += len(records)
+        self.last_flush_ms = (time.monotonic() - started) * 1000
+
+    def _open_trip(self, started: float):
+        self.current_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(started))
+        path = self._path(self.current_id)
+        try:
+            self._file = open(path, "ab")
+            if self._file.tell() < HEADER_SIZE:
+                # New file, or one left without a complete header: (re)write it and make it durable
+                # before any records, so a power cut never leaves records without a header.
+                self._file.truncate(0)
+                self._file.write(self._header(started, 0.0))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            self.write_errors += 1
+            logger.log("trips", "Trip file could not be started", level="ERROR", reason=str(e),
+                       action="Dropping samples until the next batch")
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self.current_id = None
+            return
+        logger.log("trips", f"Trip {self.current_id} started", level="INFO",
+                   reason="OBD samples received", action=f"Logging to {path}")
+
+    def _close_trip(self):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        except OSError:
+            pass
+        logger.log("trips", f"Trip {self.current_id} ended", level="INFO",
+                   reason=f"No OBD samples for {self.gap_seconds:.0f}s or shutdown")
+        self._file = None
+        self.current_id = None
+
+    def _header(self, started: float, resolution: float, channels: Optional[List[str]] = None) -> bytes:
+        channels = channels if channels is not None else self.channels
+        header = bytearray(HEADER_SIZE)
+        HEADER.pack_into(header, 0, MAGIC, VERSION, len(channels), started, resolution)
+        for i, name in enumerate(channels):
+            offset = HEADER.size + i * CHANNEL_NAME_SIZE
+            header[offset:offset + CHANNEL_NAME_SIZE] = name.encode()[:CHANNEL_NAME_SIZE].ljust(CHANNEL_NAME_SIZE, b"\x00")
+        return bytes(header)
+
+    def _path(self, trip_id: str) -> str:
+        return os.path.join(self.directory, f"{trip_id}.trip")
+
+    # Compaction and retention (writer thread, between trips)
+
+    def _maintain(self):
+        try:
+            now = time.time()
+            for reader in self._closed_trips():
+                if reader.resolution == 0 and now - reader.end > self.compact_after:
+                    self._compact(reader)
+            self._enforce_limits()
+        except (OSError, ValueError) as e:
+            logger.log("trips", "Trip maintenance failed", level="WARN", reason=str(e),
+                       action="Retrying after the next trip")
+
+    def _closed_trips(self) -> List[TripReader]:
+        readers = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".trip") and name[:-len(".trip")] != self.current_id:
+                try:
+                    readers.append(TripReader(os.path.join(self.directory, name)))
+                except ValueError:
+                    continue
+        return readers
+
+    def _compact(self, reader: TripReader):
+        """Rewrites a raw trip as per-bucket avg/min/max records (health events kept as-is)."""
+        records = reader.records
+        samples = records[records["kind"] == SAMPLE]
+        events = np.array(records[records["kind"] == EVENT])
+
+        # Group samples by (bucket, channel) with one stable sort, then reduce each run.
+        bucket = ((samples["time"] - reader.start) // self.compact_resolution).astype(np.int64)
+        key = bucket * MAX_CHANNELS + samples["channel"]
+        order = np.argsort(key, kind="stable")
+        key, times, values = key[order], samples["time"][order], samples["value"][order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(key)) + 1)) if len(key) else np.zeros(0, np.int64)
+        counts = np.diff(np.append(starts, len(key)))
+
+        summary = np.zeros(len(starts) * 3, dtype=RECORD_DTYPE)
+        if len(starts):
+            mean_time = np.add.reduceat(times, starts) / counts
+            channel = (key[starts] % MAX_CHANNELS).astype(np.uint16)
+            for i, (kind, column) in enumerate((
+                    (SAMPLE, np.add.reduceat(values.astype(np.float64), starts) / counts),
+                    (MIN, np.minimum.reduceat(values, starts)),
+                    (MAX, np.maximum.reduceat(values, starts)))):
+                part = summary[i::3]
+                part["time"], part["channel"], part["kind"], part["value"] = mean_time, channel, kind, column
+        out = np.concatenate((summary, events))
+        out.sort(order="time", kind="stable")
+
+        tmp = reader.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._header(reader.started, self.compact_resolution, reader.channels))
+            f.write(out.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        before = reader.summary()["bytes"]
+        del reader.records # Drop the mapping before replacing the file
+        with self._lock:
+            os.replace(tmp, reader.path)
+        self.trips_compacted += 1
+        logger.log("trips", f"Compacted trip {reader.id}", level="INFO",
+                   reason=f"Older than {self.compact_after / 86400:.0f} days",
+                   action=f"{before} -> {HEADER_SIZE + out.nbytes} bytes at {self.compact_resolution:.0f}s resolution")
+
+    def _enforce_limits(self):
+        # Never delete the trip currently being written.
+        trips = [(name, os.path.getsize(os.path.join(self.directory, name)))
+                 for name in sorted(os.listdir(self.directory)) if name.endswith(".trip")]
+        total = sum(size for _, size in trips)
+        for name, size in trips:
+            if total <= self.max_total_bytes:
+                break
+            if name[:-len(".trip")] == self.current_id:
+                continue
+            with self._lock:
+                os.remove(os.path.join(self.directory, name))
+            total -= size
+            self.trips_deleted += 1
+
+    # Readers (API)
+
+    def list_trips(self) -> List[Dict[str, Any]]:
+        trips = []
+        with self._lock:
+            for name in sorted(os.listdir(self.directory), reverse=True) if os.path.isdir(self.directory) else []:
+                if not name.endswith(".trip"):
+                    continue
+                try:
+                    summary = TripReader(os.path.join(self.directory, name)).summary()
+                except ValueError:
+                    continue
+                summary["active"] = summary["id"] == self.current_id
+                trips.append(summary)
+        return trips
+
+    def open_trip(self, trip_id: str) -> Optional[TripReader]:
+        path = self._path(os.path.basename(trip_id))
+        with self._lock:
+            try:
+                return TripReader(path) if os.path.exists(path) else None
+            except ValueError:
+                return None # Not a readable trip (see TripReader)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "current_trip": self.current_id,
+            "records_written": self.records_written,
+            "records_dropped": self.records_dropped,
+            "write_errors": self.write_errors,
+            "queue_depth": self.queue.qsize(),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "trips_compacted": self.trips_compacted,
+            "trips_deleted": self.trips_deleted,
+        }
@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .health import health_service
+from .metrics import StageStats
+from ..logging.logger import logger
+
+# freshness() -> (streaming, age): streaming is True while the subsystem should
+# be producing (frames, samples) and age is seconds since it last did; otherwise
+# age is since its worker loop last made any progress. None while stopped.
+Freshness = Callable[[], Optional[Tuple[bool, float]]]
+
+class Watch:
+    __slots__ = ("name", "freshness", "restart", "deadline", "hang_deadline", "stalls", "restarts")
+
+    def __init__(self, name: str, freshness: Freshness, restart: Callable[[str], None],
+                 deadline: float, hang_deadline: float):
+        self.name = name
+        self.freshness = freshness
+        self.restart = restart
+        self.deadline = deadline
+        self.hang_deadline = hang_deadline
+        self.stalls = 0
+        self.restarts = 0
+
+class Watchdog:
+    """Restarts subsystems whose data stopped arriving.
+
+    Services only report the state they believe they are in, so a capture
+    thread blocked in cap.read() on a wedged USB device, or an OBD query hung on
+    Bluetooth, would stay ACTIVE forever. The watchdog polls each watched
+    subsystem's freshness from its own thread; past the deadline the subsystem
+    is marked WAITING with an error (counting towards FAULTY in HealthService)
+    and restarted. A stall is thus acted on within deadline + interval.
+    Subsystems that HealthService has given up on are left alone until they
+    are reset.
+    """
+
+    def __init__(self, interval: float = 0.5, hang_seconds: float = 60.0):
+        self.interval = interval
+        self.hang_seconds = hang_seconds
+        self.watches: List[Watch] = []
+        self.detection_ms = StageStats(window=64) # Stall age beyond the deadline when acted on
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, name: str, freshness: Freshness, restart: Callable[[str], None],
+              deadline: float, hang_deadline: Optional[float] = None):
+        self.watches.append(Watch(name, freshness, restart, deadline,
+                                  hang_deadline if hang_deadline is not None else self.hang_seconds))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Watchdog")
+        self._thread.start()
+        logger.log("SUPERVISOR", "Watchdog started", level="INFO",
+                   action=", ".join(f"{w.name} {w.deadline:.1f}s" for w in self.watches))
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        for watch in self.watches:
+            try:
+                self._check_one(watch)
+            except Exception as e:
+                logger.log("SUPERVISOR", f"Watchdog check failed for {watch.name.upper()}", level="ERROR",
+                           reason=str(e), action="Skipping until the next check")
+
+    def _check_one(self, watch: Watch):
+        fresh = watch.freshness()
+        if fresh is None:
+            return
+        streaming, age = fresh
+        deadline = watch.deadline if streaming else watch.hang_deadline
+        if age <= deadline or not health_service.should_retry(watch.name):
+            return
+
+        watch.stalls += 1
+        self.detection_ms.record((age - deadline) * 1000)
+        reason = (f"No data for {age:.1f}s (deadline {deadline:.1f}s)" if streaming
+                  else f"Worker loop stuck for {age:.0f}s (deadline {deadline:.0f}s)")
+        health_service.update_status(watch.name, "WAITING", message="Stalled, restarting", error=reason)
+        if not health_service.should_retry(watch.name):
+            return # Now FAULTY; HealthService already logged that recovery is suspended
+
+        logger.log("SUPERVISOR", f"Restarting stalled {watch.name.upper()}", level="WARN",
+                   reason=reason, action="Abandoning the stuck worker and starting a new one")
+        watch.restart(reason)
+        watch.restarts += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "detection_ms": self.detection_ms.summary(),
+            "watches": {
+                w.name: {"deadline": round(w.deadline, 2), "stalls": w.stalls, "restarts": w.restarts}
+                for w in self.watches
+            },
+        }
+
+from ..config.settings import settings
+watchdog = Watchdog(interval=settings.supervision.watchdog_interval,
+                    hang_seconds=settings.supervision.hang_seconds)
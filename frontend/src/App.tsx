@@ -49,7 +49,7 @@ function App() {
             <h2 style={{ position: 'absolute', top: '20px', zIndex: 10 }}>Front View</h2>
             <div style={{ width: '100%', height: '100%', background: '#000', display: 'flex', alignItems: 'center', justifyContent: 'center' }}>
               <img
-                src="/api/camera/front/stream"
+                src="/api/camera/front/stream?auto=true"
                 alt="Front Camera Stream"
                 style={{ maxWidth: '100%', maxHeight: '100%', objectFit: 'contain' }}
                 onError={(e) => {
@@ -65,7 +65,7 @@ function App() {
             <h2 style={{ position: 'absolute', top: '20px', zIndex: 10 }}>Rear View</h2>
             <div style={{ width: '100%', height: '100%', background: '#000', display: 'flex', alignItems: 'center', justifyContent: 'center' }}>
               <img
-                src="/api/camera/rear/stream"
+                src="/api/camera/rear/stream?auto=true"
                 alt="Rear Camera Stream"
                 style={{ maxWidth: '100%', maxHeight: '100%', objectFit: 'contain' }}
                 onError={(e) => {
@@ -8,6 +8,7 @@ import {
     ShieldAlert,
     Settings2
 } from 'lucide-react';
+import { socket } from '../socket';
 
 interface Subsystem {
     state: string;
@@ -48,18 +49,8 @@ export const StatusCorner: React.FC<StatusCornerProps> = ({ onNavigate }) => {
     const [health, setHealth] = useState<HealthData | null>(null);
 
     useEffect(() => {
-        const fetchHealth = async () => {
-            try {
-                const res = await fetch('/api/health');
-                if (res.ok) setHealth(await res.json());
-            } catch (e) {
-                console.error("Health poll failed", e);
-            }
-        };
-
-        fetchHealth();
-        const interval = setInterval(fetchHealth, 2000);
-        return () => clearInterval(interval);
+        // Pushed on every state change over the shared socket.
+        return socket.subscribe('health', setHealth);
     }, []);
 
     if (!health) return null;
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { ArcGauge } from './Gauges/ArcGauge';
 import { BeamGauge } from './Gauges/BeamGauge';
 import { DigitGauge } from './Gauges/DigitGauge';
+import { socket } from '../socket';
 
 interface OBDData {
     RPM?: number;
@@ -9,6 +10,15 @@ interface OBDData {
     COOLANT_TEMP?: number;
     THROTTLE_POS?: number;
     ELM_VOLTAGE?: number;
+    // Derived on the hub (see backend derived_telemetry.py)
+    ACCELERATION?: number | null;
+    GEAR?: number | null;
+    FUEL_RATE?: number | null;
+    ECONOMY?: number | null;
+    TRIP_DISTANCE?: number;
+    TRIP_ECONOMY?: number | null;
+    RPM_MAX?: number | null;
+    SPEED_MAX?: number | null;
     timestamp: number;
     simulated?: boolean;
 }
@@ -18,19 +28,14 @@ export const TelemetryGrid: React.FC = () => {
     const [isLive, setIsLive] = useState(false);
 
     useEffect(() => {
-        const eventSource = new EventSource('/api/obd/stream');
-
-        eventSource.onmessage = (event) => {
-            setData(JSON.parse(event.data));
+        // The first message is a full snapshot, later ones only changed keys.
+        const unsubscribe = socket.subscribe('telemetry', (changes) => {
+            setData(prev => ({ ...prev, ...changes }));
             setIsLive(true);
-        };
-
-        eventSource.onerror = () => {
-            setIsLive(false);
-            eventSource.close();
-        };
-
-        return () => eventSource.close();
+        });
+        // The socket reconnects on its own and resubscribes.
+        const unwatch = socket.onStatus(open => { if (!open) setIsLive(false); });
+        return () => { unsubscribe(); unwatch(); };
     }, []);
 
     const getCoolantColor = (temp: number) => {
@@ -105,6 +110,35 @@ export const TelemetryGrid: React.FC = () => {
                 </div>
             </div>
 
+            {/* Trip computer: values derived on the hub, displayed as-is */}
+            <div className="glass-panel" style={{
+                padding: '12px 16px',
+                display: 'grid',
+                gridTemplateColumns: 'repeat(auto-fit, minmax(110px, 1fr))',
+                gap: '12px',
+                fontFamily: 'monospace'
+            }}>
+                {[
+                    ['Gear', data?.GEAR ?? '-', ''],
+                    ['Accel', data?.ACCELERATION?.toFixed(1) ?? '-', 'm/s²'],
+                    ['Economy', data?.ECONOMY?.toFixed(1) ?? '-', 'L/100km'],
+                    ['Fuel Flow', data?.FUEL_RATE?.toFixed(1) ?? '-', 'L/h'],
+                    ['Trip', data?.TRIP_DISTANCE?.toFixed(1) ?? '-', 'km'],
+                    ['Trip Avg', data?.TRIP_ECONOMY?.toFixed(1) ?? '-', 'L/100km'],
+                    ['Peak RPM', data?.RPM_MAX != null ? Math.round(data.RPM_MAX) : '-', '1 min'],
+                    ['Peak Speed', data?.SPEED_MAX != null ? Math.round(data.SPEED_MAX * 0.621371) : '-', 'mph'],
+                ].map(([label, value, unit]) => (
+                    <div key={label as string} style={{ display: 'flex', flexDirection: 'column' }}>
+                        <span style={{ fontSize: '0.6rem', color: 'var(--text-secondary)', letterSpacing: '0.1em' }}>
+                            {(label as string).toUpperCase()}
+                        </span>
+                        <span style={{ fontSize: '1.3rem', fontWeight: 700, color: '#fff' }}>
+                            {value} <span style={{ fontSize: '0.6rem', color: 'var(--text-secondary)' }}>{unit}</span>
+                        </span>
+                    </div>
+                ))}
+            </div>
+
             {data?.timestamp && (
                 <div style={{ textAlign: 'right', fontSize: '0.6rem', color: 'var(--text-secondary)', marginTop: 'auto' }}>
                     HUB_TIME: {new Date(data.timestamp * 1000).toLocaleTimeString()}
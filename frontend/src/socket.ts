@@ -0,0 +1,120 @@
+// One multiplexed connection to /api/ws shared by every component.
+// Telemetry arrives as binary frames (see backend telemetry_codec.py):
+//   header <u8 type, u8 flags, u16 count, f64 timestamp>, then count x <u16 key id, f32 value>
+// Health, logs and telemetry key tables arrive as JSON {topic, data}.
+
+type Handler = (data: any, message: any) => void;
+type Options = Record<string, unknown>;
+
+const HEADER_SIZE = 12;
+const ENTRY_SIZE = 6;
+const FLAG_FULL = 0x01;
+
+class VanDashSocket {
+    private ws: WebSocket | null = null;
+    private handlers = new Map<string, Set<Handler>>();
+    private options = new Map<string, Options>();
+    private last = new Map<string, any>(); // Replayed to late subscribers of a topic
+    private keys: string[] = [];
+    private retryDelay = 500;
+    private statusHandlers = new Set<(open: boolean) => void>();
+
+    subscribe(topic: string, handler: Handler, options: Options = {}): () => void {
+        const set = this.handlers.get(topic) ?? new Set<Handler>();
+        this.handlers.set(topic, set);
+        set.add(handler);
+        const changed = JSON.stringify(this.options.get(topic)) !== JSON.stringify(options);
+        if (set.size === 1 || changed) {
+            this.options.set(topic, options);
+            this.send({ op: 'subscribe', topic, ...options });
+        } else if (this.last.has(topic)) {
+            handler(this.last.get(topic), { topic, data: this.last.get(topic) });
+        }
+        this.connect();
+
+        return () => {
+            set.delete(handler);
+            if (set.size === 0) {
+                this.handlers.delete(topic);
+                this.options.delete(topic);
+                this.last.delete(topic);
+                this.send({ op: 'unsubscribe', topic });
+            }
+        };
+    }
+
+    onStatus(handler: (open: boolean) => void): () => void {
+        this.statusHandlers.add(handler);
+        handler(this.ws?.readyState === WebSocket.OPEN);
+        return () => { this.statusHandlers.delete(handler); };
+    }
+
+    private connect() {
+        if (this.ws) return;
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const ws = new WebSocket(`${protocol}://${window.location.host}/api/ws`);
+        ws.binaryType = 'arraybuffer';
+        this.ws = ws;
+
+        ws.onopen = () => {
+            this.retryDelay = 500;
+            this.keys = [];
+            this.options.forEach((options, topic) => this.send({ op: 'subscribe', topic, ...options }));
+            this.statusHandlers.forEach(h => h(true));
+        };
+        ws.onmessage = (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                this.dispatch('telemetry', this.decodeTelemetry(event.data));
+                return;
+            }
+            const message = JSON.parse(event.data);
+            if (message.topic === 'telemetry.keys') {
+                this.keys.splice(message.offset, message.data.length, ...message.data);
+                return;
+            }
+            this.dispatch(message.topic, message.data, message);
+        };
+        ws.onclose = () => {
+            this.ws = null;
+            this.statusHandlers.forEach(h => h(false));
+            if (this.handlers.size === 0) return;
+            setTimeout(() => this.connect(), this.retryDelay);
+            this.retryDelay = Math.min(this.retryDelay * 2, 10000);
+        };
+    }
+
+    private send(command: Options) {
+        if (this.ws?.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify(command));
+        } // Otherwise sent from onopen
+    }
+
+    private dispatch(topic: string, data: any, message: any = { topic, data }) {
+        if (topic === 'telemetry') {
+            this.last.set(topic, { ...this.last.get(topic), ...data });
+        } else if (topic === 'health') {
+            this.last.set(topic, data);
+        }
+        this.handlers.get(topic)?.forEach(h => h(data, message));
+    }
+
+    private decodeTelemetry(buffer: ArrayBuffer): Record<string, number | null> {
+        const view = new DataView(buffer);
+        const flags = view.getUint8(1);
+        const count = view.getUint16(2, true);
+        const timestamp = view.getFloat64(4, true);
+        const values: Record<string, number | null> = {};
+        if (flags & FLAG_FULL) this.last.delete('telemetry');
+        for (let i = 0; i < count; i++) {
+            const offset = HEADER_SIZE + i * ENTRY_SIZE;
+            const name = this.keys[view.getUint16(offset, true)];
+            const value = view.getFloat32(offset + 2, true);
+            // float32 -> shortest decimal that round-trips (0.4 rather than 0.4000000059604645)
+            if (name !== undefined) values[name] = Number.isNaN(value) ? null : Number(value.toPrecision(7));
+        }
+        if (timestamp) values.timestamp = timestamp;
+        return values;
+    }
+}
+
+export const socket = new VanDashSocket();
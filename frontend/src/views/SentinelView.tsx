@@ -1,6 +1,8 @@
 import React, { useEffect, useState } from 'react';
+import { socket } from '../socket';
 
 interface LogEntry {
+    seq: number;
     timestamp: string;
     source: string;
     level: string;
@@ -21,6 +23,8 @@ interface HealthData {
     simulation_active: boolean;
 }
 
+const LOG_LINES = 50;
+
 export const SentinelView: React.FC = () => {
     const [health, setHealth] = useState<HealthData | null>(null);
     const [logs, setLogs] = useState<LogEntry[]>([]);
@@ -44,35 +48,26 @@ export const SentinelView: React.FC = () => {
     };
 
     useEffect(() => {
-        const fetchHealth = async () => {
-            try {
-                const res = await fetch('/api/health');
-                if (res.ok) setHealth(await res.json());
-            } catch (err) {
-                console.error("Failed to fetch health data", err);
-            }
-        };
-        fetchHealth();
-        const interval = setInterval(fetchHealth, 2000);
-        return () => clearInterval(interval);
+        // Health is pushed on change instead of polled.
+        return socket.subscribe('health', setHealth);
     }, []);
 
     useEffect(() => {
-        const fetchLogsAndSources = async () => {
-            try {
-                const sRes = await fetch('/api/logs/sources');
-                if (sRes.ok) setSources(await sRes.json());
+        fetch('/api/logs/sources')
+            .then(res => res.ok ? res.json() : [])
+            .then(setSources)
+            .catch(err => console.error("Failed to fetch log sources", err));
+    }, []);
 
-                const url = source ? `/api/logs/tail?source=${source}` : '/api/logs/tail';
-                const res = await fetch(url);
-                if (res.ok) setLogs(await res.json());
-            } catch (err) {
-                console.error("Failed to fetch logs or sources", err);
-            }
-        };
-        fetchLogsAndSources();
-        const interval = setInterval(fetchLogsAndSources, 2000);
-        return () => clearInterval(interval);
+    useEffect(() => {
+        // The first message is the recent backlog, later ones only new entries; nothing is sent while quiet.
+        return socket.subscribe('logs', (entries: LogEntry[], message) => {
+            setLogs(prev => [...(message.reset ? [] : prev), ...entries].slice(-LOG_LINES));
+            setSources(prev => {
+                const added = entries.map(e => e.source).filter(s => !prev.includes(s));
+                return added.length ? [...new Set([...prev, ...added])].sort() : prev;
+            });
+        }, { source: source || null, lines: LOG_LINES });
     }, [source]);
 
     return (
@@ -158,8 +153,8 @@ export const SentinelView: React.FC = () => {
                     </select>
                 </div>
                 <div style={{ flex: 1, overflowY: 'auto', background: 'rgba(0,0,0,0.3)', borderRadius: '8px', padding: '8px', fontFamily: 'monospace', fontSize: '0.8rem' }}>
-                    {logs.map((log, i) => (
-                        <div key={i} style={{ marginBottom: '4px', borderBottom: '1px solid rgba(255,255,255,0.05)', paddingBottom: '2px' }}>
+                    {logs.map((log) => (
+                        <div key={log.seq} style={{ marginBottom: '4px', borderBottom: '1px solid rgba(255,255,255,0.05)', paddingBottom: '2px' }}>
                             <span style={{ color: 'var(--text-secondary)' }}>[{new Date(log.timestamp).toLocaleTimeString()}]</span>{' '}
                             <span style={{ color: log.level === 'ERROR' ? 'var(--danger-color)' : log.level === 'WARN' ? 'var(--warning-color)' : 'var(--accent-color)' }}>{log.source.toUpperCase()}</span>:{' '}
                             {log.message}
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""CPU cost of an unwatched camera and how fast it comes back for a viewer.
+
+For each idle mode (off = always full rate, keepalive, release) and each
+capture mode (thread, process), runs one simulated camera with no viewers
+until it has gone to standby and measures CPU (this process plus the
+capture process, if any). Then a viewer is attached and detached --cycles
+times and the time from the viewer arriving to the first fresh frame being
+published is reported (CameraService.first_frame_ms).
+
+The simulated source has no device to open: with real hardware, release
+adds the V4L2 open/configure time (and warmup_frames) to time-to-first-frame.
+
+Usage: uv run python scripts/bench_camera_idle.py [--duration 10] [--fps 30] [--cycles 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+
+def cpu_seconds(camera) -> float:
+    times = psutil.Process().cpu_times()
+    total = times.user + times.system
+    if camera.process is not None:
+        child = psutil.Process(camera.process.pid).cpu_times()
+        total += child.user + child.system
+    return total
+
+
+def run(capture: str, idle_mode: str, fps: int, duration: float, cycles: int):
+    from backend.app.services.camera import CameraService
+
+    camera = CameraService("camera_rear", None, None, (720, 480), fps, "MJPG", simulation=True, allow_real=False,
+                           capture_process=(capture == "process"), idle_mode=idle_mode, idle_fps=1.0,
+                           idle_after=1.0, warmup_frames=4)
+    camera.start()
+    time.sleep(4.0 if capture == "process" else 2.0) # Past idle_after (and the child's imports)
+
+    started_cpu, started = cpu_seconds(camera), time.monotonic()
+    time.sleep(duration)
+    cpu = (cpu_seconds(camera) - started_cpu) / (time.monotonic() - started) * 100
+
+    if idle_mode != "off":
+        for _ in range(cycles):
+            recorded = camera.first_frame_ms.count
+            camera.broadcaster.acquire_viewer()
+            deadline = time.monotonic() + 5
+            while camera.first_frame_ms.count == recorded and time.monotonic() < deadline:
+                time.sleep(0.001)
+            camera.broadcaster.release_viewer()
+            time.sleep(1.5) # Back into standby
+    summary = camera.first_frame_ms.summary()
+    camera.stop()
+    return cpu, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--cycles", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Simulated 720x480 @ {args.fps} fps, no viewers, {args.duration:.0f}s per run")
+    print(f"  {'capture':<9}{'idle mode':<11}{'CPU %':>7}{'first frame p50 ms':>20}{'max ms':>8}")
+    for capture in ("thread", "process"):
+        for idle_mode in ("off", "keepalive", "release"):
+            cpu, ttff = run(capture, idle_mode, args.fps, args.duration, args.cycles)
+            p50 = f"{ttff['p50']:.1f}" if ttff["p50"] is not None else "-"
+            worst = f"{ttff['max']:.1f}" if ttff["max"] is not None else "-"
+            print(f"  {capture:<9}{idle_mode:<11}{cpu:>7.1f}{p50:>20}{worst:>8}")
+
+
+if __name__ == "__main__":
+    main()
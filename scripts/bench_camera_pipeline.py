@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark of the camera streaming pipeline.
+
+Starts the backend in-process with the rear camera on its synthetic
+(simulated) source, connects N HTTP clients to the MJPEG stream and reports:
+  - per-client frame rate and aggregate throughput
+  - client-side frame age on arrival (from the X-Timestamp part header)
+  - the server's per-stage latency percentiles from /api/camera/latency
+
+Usage: uv run python scripts/bench_camera_pipeline.py [--clients 3] [--duration 10] [--query "auto=true"]
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+
+class StreamClient(threading.Thread):
+    def __init__(self, port: int, path: str, duration: float):
+        super().__init__(daemon=True)
+        self.port = port
+        self.path = path
+        self.duration = duration
+        self.frames = 0
+        self.bytes = 0
+        self.ages_ms = []
+        self.status = None
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", self.path)
+        response = conn.getresponse()
+        self.status = response.status
+        if response.status != 200:
+            return
+
+        deadline = time.time() + self.duration
+        stream = response.fp
+        while time.time() < deadline:
+            line = stream.readline()
+            if not line.startswith(b"--frame"):
+                continue
+            headers = {}
+            while True:
+                line = stream.readline().strip()
+                if not line:
+                    break
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = stream.read(int(headers["content-length"]))
+            received = time.time()
+            self.frames += 1
+            self.bytes += len(body)
+            if "x-timestamp" in headers:
+                self.ages_ms.append((received - float(headers["x-timestamp"])) * 1000)
+        conn.close()
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"p50 {p50:7.2f}  p95 {p95:7.2f}  p99 {p99:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--query", default="", help="Extra stream query string, e.g. 'width=320&fps=15'")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    import uvicorn
+    from backend.app.main import app
+    from backend.app.services.camera import camera_rear, camera_front
+
+    # Synthetic source only: never probe real devices during a benchmark.
+    for camera in (camera_rear, camera_front):
+        camera.simulation_mode = True
+        camera.allow_real = False
+    camera_rear.broadcaster.max_viewers = max(camera_rear.broadcaster.max_viewers, args.clients)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    time.sleep(1.0) # Let the camera thread fill the ring
+
+    path = "/api/camera/rear/stream" + (f"?{args.query}" if args.query else "")
+    clients = [StreamClient(args.port, path, args.duration) for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join(args.duration + 5)
+
+    conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=5)
+    conn.request("GET", "/api/camera/latency")
+    stages = json.loads(conn.getresponse().read())["camera_rear"]
+    server.should_exit = True
+
+    print(f"{args.clients} clients x {args.duration:.0f}s on {path}")
+    total_bytes = 0
+    all_ages = []
+    for i, client in enumerate(clients):
+        if client.status != 200:
+            print(f"  client {i}: HTTP {client.status}")
+            continue
+        total_bytes += client.bytes
+        all_ages.extend(client.ages_ms)
+        print(f"  client {i}: {client.frames / args.duration:6.1f} fps  "
+              f"{client.bytes / args.duration / 1024:8.1f} KiB/s  age {percentiles(client.ages_ms)}")
+    print(f"aggregate: {total_bytes / args.duration / 1024 / 1024:.2f} MiB/s, frame age {percentiles(all_ages)}")
+    print("server stages (ms):")
+    for stage, stats in stages.items():
+        if stats["count"]:
+            print(f"  {stage:<8} n={stats['count']:<6} p50 {stats['p50']:7.2f}  p95 {stats['p95']:7.2f}  p99 {stats['p99']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
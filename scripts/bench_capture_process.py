@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Capture jitter with the capture loop on a thread vs in a child process.
+
+Runs one simulated camera at --fps in each mode while --load threads keep
+the API process's GIL busy the way request handling does (JSON encoding,
+dict churn), plus one thread JPEG-encoding every frame like a stream viewer.
+Frame-to-frame intervals are taken from the capture timestamps on the ring,
+so they show when frames were produced, not when this script saw them.
+
+Usage: uv run python scripts/bench_capture_process.py [--duration 10] [--fps 30] [--load 4]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+
+def gil_load(stop: threading.Event):
+    payload = {f"key_{i}": [i * 0.5, str(i), {"nested": i}] for i in range(200)}
+    while not stop.is_set():
+        json.loads(json.dumps(payload))
+
+
+def viewer(camera, stop: threading.Event):
+    seq = 0
+    while not stop.is_set():
+        frame = camera.ring.wait_newer(seq, timeout=0.5)
+        if frame is not None:
+            seq, _ = camera.broadcaster.get_jpeg()
+
+
+def collect(camera, duration: float):
+    timestamps = {}
+    seq = camera.ring.seq
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if camera.ring.wait_newer(seq, timeout=0.5) is None:
+            continue
+        head = camera.ring.seq
+        # Pick up frames skipped while this thread waited for the GIL.
+        for missed in range(max(seq + 1, head - camera.ring.capacity + 2), head + 1):
+            frame = camera.ring.get(missed)
+            if frame is not None:
+                timestamps[missed] = frame.timestamp
+        seq = head
+    return [timestamps[s] for s in sorted(timestamps)]
+
+
+def run(mode: str, fps: int, load: int, duration: float):
+    from backend.app.services.camera import CameraService
+
+    camera = CameraService("camera_rear", None, None, (720, 480), fps, "MJPG", simulation=True,
+                           allow_real=False, capture_process=(mode == "process"), idle_mode="off")
+    camera.start()
+    time.sleep(3.0 if mode == "process" else 1.0) # Spawned child imports cv2/numpy first
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=gil_load, args=(stop,), daemon=True) for _ in range(load)]
+    threads.append(threading.Thread(target=viewer, args=(camera, stop), daemon=True))
+    for thread in threads:
+        thread.start()
+    timestamps = collect(camera, duration)
+    stop.set()
+    for thread in threads:
+        thread.join(2)
+    camera.stop()
+
+    intervals = np.diff(timestamps) * 1000
+    target = 1000.0 / fps
+    return {
+        "fps": len(timestamps) / duration,
+        "p50": np.percentile(intervals, 50),
+        "p99": np.percentile(intervals, 99),
+        "max": intervals.max(),
+        "jitter": np.abs(intervals - np.median(intervals)).mean(),
+        "late": float(np.mean(intervals > target * 1.5) * 100),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--load", type=int, default=4, help="GIL-bound threads in the API process")
+    args = parser.parse_args()
+
+    print(f"720x480 simulated camera @ {args.fps} fps, {args.load} load threads + 1 viewer, {args.duration:.0f}s")
+    print(f"  {'mode':<8}{'fps':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'jitter ms':>11}{'late %':>8}")
+    for mode in ("thread", "process"):
+        r = run(mode, args.fps, args.load, args.duration)
+        print(f"  {mode:<8}{r['fps']:>7.1f}{r['p50']:>9.1f}{r['p99']:>9.1f}{r['max']:>9.1f}"
+              f"{r['jitter']:>11.2f}{r['late']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark the JPEG encoder backends used by CameraService.
+
+For each backend (OpenCV, TurboJPEG if installed, and both behind an
+EncoderPool) and each resolution, reports:
+  - ms/frame and CPU% when one camera encodes serially
+  - aggregate fps and CPU% when two cameras encode concurrently
+
+CPU% is process CPU time over wall time, so 100% = one full core.
+Frames come from the camera simulator (with its analog noise) rather than
+random data, which would be an unrealistic worst case for JPEG.
+
+Usage: uv run python scripts/bench_encoders.py [--frames 200] [--quality 70]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+from backend.app.services.camera_sim import FrameSimulator  # noqa: E402
+from backend.app.services.encoders import EncoderPool, OpenCVEncoder, TurboJPEGEncoder  # noqa: E402
+
+
+def measure(fn):
+    wall, cpu = time.perf_counter(), time.process_time()
+    fn()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def bench(encoder, frames, count: int, quality: int):
+    def serial():
+        for i in range(count):
+            encoder.encode(frames[i % len(frames)], quality)
+
+    def two_cameras():
+        threads = [threading.Thread(target=serial) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    serial()  # warm up
+    wall, cpu = measure(serial)
+    wall2, cpu2 = measure(two_cameras)
+    return (wall / count * 1000, cpu / wall * 100, 2 * count / wall2, cpu2 / wall2 * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--quality", type=int, default=70)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    backends = [("opencv", OpenCVEncoder())]
+    try:
+        backends.append(("turbojpeg", TurboJPEGEncoder()))
+    except Exception as e:
+        print(f"turbojpeg unavailable ({str(e).splitlines()[0]}); skipping")
+
+    encoders = []
+    for name, encoder in backends:
+        encoders.append((name, encoder))
+        encoders.append((f"{name} pool x{args.workers}", EncoderPool(encoder, args.workers, name="bench")))
+
+    for resolution in [(640, 480), (720, 480)]:
+        simulator = FrameSimulator("camera_rear", resolution)
+        frames = [simulator.render(time.time() + i / 30, 0.5).copy() for i in range(30)]
+
+        print(f"\n{resolution[0]}x{resolution[1]} q{args.quality}, {args.frames} frames per camera")
+        print(f"  {'backend':<22}{'ms/frame':>10}{'CPU%':>8}{'2-cam fps':>12}{'2-cam CPU%':>12}")
+        for name, encoder in encoders:
+            ms, cpu, fps2, cpu2 = bench(encoder, frames, args.frames, args.quality)
+            print(f"  {name:<22}{ms:>10.2f}{cpu:>8.0f}{fps2:>12.0f}{cpu2:>12.0f}")
+
+    for _, encoder in encoders:
+        if isinstance(encoder, EncoderPool):
+            encoder.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""CPU cost of the parking sentinel per camera at 2, 5 and 10 fps analysis.
+
+For each analysis rate, runs one simulated camera in standby (no viewers,
+idle_mode release) twice: once with the rate held at that fps but no
+detector, which is the capture cost the sentinel forces, and once with a
+MotionDetector armed on it. The difference is the analysis itself.
+
+Then times the per-frame analysis on a 720x480 frame for both inputs: decoded
+pixels (INTER_AREA downscale + gray) and a passthrough JPEG (1/8 scale
+grayscale decode, i.e. DC coefficients only), against a full JPEG decode.
+
+Usage: uv run python scripts/bench_motion.py [--duration 10] [--rates 2 5 10] [--capture thread]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+
+def cpu_seconds(camera) -> float:
+    times = psutil.Process().cpu_times()
+    total = times.user + times.system
+    if camera.process is not None:
+        child = psutil.Process(camera.process.pid).cpu_times()
+        total += child.user + child.system
+    return total
+
+
+def run(capture: str, fps: float, duration: float, detect: bool, directory: str):
+    from backend.app.services.camera import CameraService
+    from backend.app.services.motion import MotionDetector
+
+    camera = CameraService("camera_rear", None, None, (720, 480), 30, "MJPG", simulation=True, allow_real=False,
+                           capture_process=(capture == "process"), idle_mode="release", idle_after=1.0)
+    camera.start()
+    detector = None
+    if detect:
+        detector = MotionDetector(camera, directory, fps=fps, arm="always", cooldown_seconds=1.0)
+        detector.start()
+    else:
+        camera.hold_rate("bench", fps)
+    time.sleep(4.0 if capture == "process" else 2.0) # Past idle_after (and the child's imports)
+
+    started_cpu, started = cpu_seconds(camera), time.monotonic()
+    analysed = detector.frames_analysed if detector else 0
+    time.sleep(duration)
+    elapsed = time.monotonic() - started
+    cpu = (cpu_seconds(camera) - started_cpu) / elapsed * 100
+    stats = detector.get_stats() if detector else None
+    rate = (detector.frames_analysed - analysed) / elapsed if detector else 0.0
+    if detector:
+        detector.stop()
+    camera.stop()
+    return cpu, rate, stats
+
+
+def per_frame(iterations: int):
+    from backend.app.services.frame_ring import Frame
+    from backend.app.services.camera_sim import FrameSimulator
+    from backend.app.services.motion import MotionDetector
+
+    class Ring:
+        def is_current(self, frame):
+            return True
+
+    class Camera:
+        name = "bench"
+        ring = Ring()
+
+    pixels = FrameSimulator("camera_rear", (720, 480)).render(time.time(), 0.5)
+    jpeg = cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+    detector = MotionDetector(Camera(), tempfile.gettempdir())
+    cases = {
+        "pixels (resize + gray)": lambda: detector.analyse(Frame(1, 0.0, 0.0, pixels, None)),
+        "jpeg (1/8 gray decode)": lambda: detector.analyse(Frame(1, 0.0, 0.0, None, jpeg)),
+        "jpeg (full decode, ref)": lambda: cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR),
+    }
+    results = {}
+    for name, case in cases.items():
+        case()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            case()
+        results[name] = (time.perf_counter() - started) / iterations * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rates", type=float, nargs="+", default=[2, 5, 10])
+    parser.add_argument("--capture", choices=("thread", "process"), default="thread")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"720x480 simulated camera in standby ({args.capture} capture), {args.duration:.0f}s per run")
+    print(f"  {'fps':>5}{'held CPU %':>12}{'sentinel CPU %':>16}{'analysis CPU %':>16}"
+          f"{'analysed/s':>12}{'p50 ms':>8}{'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for fps in args.rates:
+            held, _, _ = run(args.capture, fps, args.duration, False, directory)
+            sentinel, rate, stats = run(args.capture, fps, args.duration, True, directory)
+            timing = stats["analysis_ms"]
+            print(f"  {fps:>5g}{held:>12.1f}{sentinel:>16.1f}{sentinel - held:>16.1f}"
+                  f"{rate:>12.1f}{timing['p50'] or 0:>8.2f}{timing['p99'] or 0:>8.2f}")
+
+    print(f"\nPer-frame cost, {args.iterations} iterations")
+    for name, ms in per_frame(args.iterations).items():
+        print(f"  {name:<26}{ms:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Benchmark OBD history queries on a full day of 10 Hz samples.
+
+Fills one PIDHistory ring with 24 h of synthetic 10 Hz RPM data (864,000
+samples, including a few dropouts) and times TelemetryHistory.query() for
+several windows, point counts and both downsamplers. Also reports the ring's
+memory footprint and the per-sample append cost paid by the poll thread.
+
+Usage: uv run python scripts/bench_obd_history.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+from backend.app.services.telemetry_history import TelemetryHistory  # noqa: E402
+
+HZ = 10
+DAY = 24 * 3600
+
+def synthetic_day(now: float):
+    n = DAY * HZ
+    times = now - DAY + np.arange(n) / HZ
+    rpm = 800 + 2500 * (1 + np.sin(np.arange(n) / 3000.0)) + np.random.default_rng(1).normal(0, 60, n)
+    # Drop a few stretches (engine off / adapter unplugged)
+    keep = np.ones(n, dtype=bool)
+    for start in (n // 5, n // 2, 4 * n // 5):
+        keep[start:start + 20 * 60 * HZ] = False
+    return times[keep], rpm[keep]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    now = time.time()
+    times, values = synthetic_day(now)
+    history = TelemetryHistory({"RPM": DAY * HZ})
+    ring = history.pids["RPM"]
+
+    start = time.perf_counter()
+    for t, v in zip(times.tolist(), values.tolist()):
+        ring.append(t, v)
+    append_us = (time.perf_counter() - start) / len(times) * 1e6
+    mb = (ring.times.nbytes + ring.values.nbytes) / 1024 / 1024
+    print(f"{len(times):,} samples in a {ring.capacity:,}-slot ring: {mb:.1f} MiB, append {append_us:.2f} us/sample")
+
+    print(f"  {'window':<8}{'points':>8}{'mode':>8}{'samples':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, seconds in (("20 min", 1200), ("1 h", 3600), ("6 h", 6 * 3600), ("24 h", DAY)):
+        for points in (300, 1000):
+            for mode in ("minmax", "lttb"):
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    result = history.query("RPM", since=now - seconds, points=points, mode=mode)
+                    timings.append((time.perf_counter() - start) * 1000)
+                p50, p95 = np.percentile(timings, [50, 95])
+                print(f"  {label:<8}{points:>8}{mode:>8}{result['samples']:>10,}{p50:>10.2f}{p95:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark OBD polling strategies against a simulated ELM327.
+
+The simulated adapter answers like an ELM327 on a CAN (ISO 15765-4) vehicle:
+every request costs a fixed round-trip (serial + ECU response time) plus a
+little per returned byte, and replies are real ISO-TP frame lines parsed by
+python-obd's own CAN protocol parser, so multi-frame multi-PID answers are
+exercised end to end.
+
+Compares, using the dashboard's PID set and configured pid_rates:
+  - legacy:  every PID queried one by one each polling_interval
+  - single:  per-PID scheduler, one PID per request
+  - multi:   per-PID scheduler with multi-PID mode 01 requests
+
+and reports requests/s and the achieved Hz for each PID.
+
+Usage: uv run python scripts/bench_obd_scheduler.py [--duration 10] [--latency-ms 45]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+import obd  # noqa: E402
+from obd.protocols import ISO_15765_4_11bit_500k  # noqa: E402
+
+from backend.app.config.settings import settings  # noqa: E402
+from backend.app.services.obd_scheduler import PIDScheduler, build_rates  # noqa: E402
+
+# Mode 01 payloads for the PIDs the dashboard polls (A, B...)
+PID_DATA = {
+    0x05: b"\x7b",          # COOLANT_TEMP 83 C
+    0x0C: b"\x1a\xf8",      # RPM 1726
+    0x0D: b"\x32",          # SPEED 50 km/h
+    0x0F: b"\x41",          # INTAKE_TEMP 25 C
+    0x10: b"\x01\x90",      # MAF 4 g/s
+    0x11: b"\x40",          # THROTTLE_POS 25%
+}
+
+class SimulatedELM327:
+    """Stands in for obd.OBD: same query()/protocol_id() surface, simulated timing."""
+
+    def __init__(self, latency_ms: float, byte_ms: float, multi_pid: bool = True):
+        self.latency = latency_ms / 1000
+        self.byte_time = byte_ms / 1000
+        self.multi_pid = multi_pid
+        self.protocol = ISO_15765_4_11bit_500k(["7E8 06 41 00 BE 3E B8 11"])
+        self.requests = 0
+
+    def is_connected(self):
+        return True
+
+    def protocol_id(self):
+        return self.protocol.ELM_ID
+
+    def query(self, cmd, force=False):
+        self.requests += 1
+        lines = self._respond(cmd.command)
+        time.sleep(self.latency + self.byte_time * sum(len(line) // 3 for line in lines))
+        return cmd(self.protocol(lines))
+
+    def _respond(self, command: bytes):
+        if command == b"ATRV":
+            return ["12.6V"]
+        mode, pids = command[:2], [int(command[i:i + 2], 16) for i in range(2, len(command), 2)]
+        if mode != b"01" or (len(pids) > 1 and not self.multi_pid):
+            return ["NO DATA"]
+        payload = b"\x41" + b"".join(bytes([pid]) + PID_DATA[pid] for pid in pids if pid in PID_DATA)
+        return self._isotp_lines(payload)
+
+    @staticmethod
+    def _isotp_lines(payload: bytes):
+        def line(data: bytes):
+            return "7E8 " + " ".join("%02X" % b for b in data.ljust(8, b"\x00"))
+        if len(payload) <= 7:
+            return [line(bytes([len(payload)]) + payload)]
+        lines = [line(bytes([0x10 | (len(payload) >> 8), len(payload) & 0xFF]) + payload[:6])]
+        rest, index = payload[6:], 1
+        while rest:
+            lines.append(line(bytes([0x20 | (index & 0x0F)]) + rest[:7]))
+            rest, index = rest[7:], index + 1
+        return lines
+
+def run_legacy(connection, commands, duration: float, interval: float):
+    samples = {cmd.name: 0 for cmd in commands}
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        for cmd in commands:
+            if not connection.query(cmd).is_null():
+                samples[cmd.name] += 1
+        time.sleep(interval)
+    return {name: count / duration for name, count in samples.items()}
+
+def run_scheduler(connection, scheduler: PIDScheduler, duration: float):
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        scheduler.poll(connection)
+        time.sleep(scheduler.time_until_next())
+    return {name: stats["samples"] / duration for name, stats in scheduler.stats().items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=45.0, help="Fixed cost per request")
+    parser.add_argument("--byte-ms", type=float, default=0.3, help="Extra cost per returned CAN byte")
+    args = parser.parse_args()
+
+    commands = [obd.commands.RPM, obd.commands.SPEED, obd.commands.COOLANT_TEMP,
+                obd.commands.THROTTLE_POS, obd.commands.INTAKE_TEMP, obd.commands.MAF, obd.commands.ELM_VOLTAGE]
+    interval = settings.obd.polling_interval
+    rates = build_rates(commands, settings.obd.pid_rates, 1.0 / interval)
+
+    runs = []
+    connection = SimulatedELM327(args.latency_ms, args.byte_ms)
+    runs.append((f"legacy ({interval}s)", run_legacy(connection, commands, args.duration, interval), connection.requests))
+    for label, multi in (("single", False), ("multi", True)):
+        connection = SimulatedELM327(args.latency_ms, args.byte_ms)
+        achieved = run_scheduler(connection, PIDScheduler(rates, multi_pid=multi), args.duration)
+        runs.append((label, achieved, connection.requests))
+
+    print(f"{args.duration:.0f}s per run, {args.latency_ms:.0f} ms/request + {args.byte_ms} ms/byte")
+    print(f"  {'PID':<14}{'target':>8}" + "".join(f"{label:>18}" for label, _, _ in runs))
+    for cmd in commands:
+        print(f"  {cmd.name:<14}{rates[cmd]:>7.1f}H" + "".join(f"{achieved[cmd.name]:>17.2f}H" for _, achieved, _ in runs))
+    print(f"  {'requests/s':<22}" + "".join(f"{requests / args.duration:>18.1f}" for _, _, requests in runs))
+
+if __name__ == "__main__":
+    main()
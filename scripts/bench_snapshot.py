@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Cost of /api/camera/{name}/snapshot for tile pollers.
+
+Starts the backend in-process with the rear camera on its synthetic source
+and runs --pollers clients that each fetch a snapshot every --interval
+seconds, in three ways:
+  - plain:       no validators, every request downloads the image
+  - revalidate:  If-None-Match with the last ETag, as browsers do for no-cache
+  - thumbnail:   revalidating at ?width=320
+and reports requests/s, 200 vs 304 responses, bytes downloaded, request
+latency and the snapshot cache misses (the cache is per frame and size, so
+pollers within one frame interval share one encode).
+
+Usage: uv run python scripts/bench_snapshot.py [--pollers 8] [--interval 0.02] [--duration 5]
+"""
+import argparse
+import http.client
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+
+class Poller(threading.Thread):
+    def __init__(self, port: int, path: str, revalidate: bool, interval: float, duration: float):
+        super().__init__(daemon=True)
+        self.port = port
+        self.path = path
+        self.revalidate = revalidate
+        self.interval = interval
+        self.duration = duration
+        self.statuses = {200: 0, 304: 0}
+        self.bytes = 0
+        self.latency_ms = []
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        etag = None
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline:
+            headers = {"If-None-Match": etag} if self.revalidate and etag else {}
+            started = time.perf_counter()
+            conn.request("GET", self.path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            self.latency_ms.append((time.perf_counter() - started) * 1000)
+            self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+            self.bytes += len(body)
+            etag = response.getheader("ETag") or etag
+            time.sleep(self.interval)
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pollers", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between a poller's requests")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8797)
+    args = parser.parse_args()
+
+    import uvicorn
+    from backend.app.main import app
+    from backend.app.services.camera import camera_rear, camera_front
+
+    for camera in (camera_rear, camera_front):
+        camera.simulation_mode = True
+        camera.allow_real = False
+        camera.idle_mode = "off"
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    time.sleep(1.0)
+
+    print(f"{args.pollers} pollers every {args.interval * 1000:.0f} ms for {args.duration:.0f}s, "
+          f"camera at {camera_rear.framerate} fps")
+    print(f"  {'mode':<12}{'req/s':>8}{'200':>7}{'304':>7}{'KiB/s':>9}{'p50 ms':>8}{'p99 ms':>8}{'misses':>8}")
+    broadcaster = camera_rear.broadcaster
+    for mode, path, revalidate in (("plain", "/api/camera/rear/snapshot", False),
+                                   ("revalidate", "/api/camera/rear/snapshot", True),
+                                   ("thumbnail", "/api/camera/rear/snapshot?width=320", True)):
+        misses = broadcaster.snapshot_misses
+        pollers = [Poller(args.port, path, revalidate, args.interval, args.duration) for _ in range(args.pollers)]
+        for poller in pollers:
+            poller.start()
+        for poller in pollers:
+            poller.join(args.duration + 5)
+        latency = np.concatenate([p.latency_ms for p in pollers])
+        requests = sum(sum(p.statuses.values()) for p in pollers)
+        p50, p99 = np.percentile(latency, [50, 99])
+        print(f"  {mode:<12}{requests / args.duration:>8.0f}{sum(p.statuses[200] for p in pollers):>7}"
+              f"{sum(p.statuses[304] for p in pollers):>7}{sum(p.bytes for p in pollers) / args.duration / 1024:>9.0f}"
+              f"{p50:>8.2f}{p99:>8.2f}{broadcaster.snapshot_misses - misses:>8}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Compare what one phone costs over each dashboard transport.
+
+Starts the backend in-process with simulated OBD telemetry at --hz, with
+cameras stopped so only the telemetry/health/log traffic is measured. A
+separate client process then emulates what the dashboard opens:
+  - legacy: OBD EventSource (full JSON), /api/health polled every 2 s by both
+            StatusCorner and SentinelView, /api/logs/sources + tail every 2 s
+  - sse:    OBD delta stream, two health streams and the log stream
+  - ws:     one /api/ws socket subscribed to telemetry, health and logs
+and reports wire bytes/s (headers and framing included, both directions),
+open sockets, and the backend process CPU against an idle baseline.
+
+Usage: uv run python scripts/bench_ws_multiplex.py [--duration 10] [--hz 10] [--phones 1]
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+class Wire:
+    """Raw TCP connection counting every byte sent and received."""
+
+    def __init__(self, port: int):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.sent = 0
+        self.received = 0
+        self._buffer = b""
+
+    def send(self, data: bytes):
+        self.sock.sendall(data)
+        self.sent += len(data)
+
+    def recv(self) -> bytes:
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("closed")
+        self.received += len(data)
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            self._buffer += self.recv()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def read_until(self, marker: bytes) -> bytes:
+        while marker not in self._buffer:
+            self._buffer += self.recv()
+        data, _, self._buffer = self._buffer.partition(marker)
+        return data + marker
+
+def request(path: str, extra: str = "") -> bytes:
+    # Roughly the headers a mobile browser sends with a same-origin request
+    return (f"GET {path} HTTP/1.1\r\nHost: 192.168.4.1:8000\r\nConnection: keep-alive\r\n"
+            "User-Agent: Mozilla/5.0 (Linux; Android 14; Pixel 7) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36\r\n"
+            f"Accept: */*\r\nAccept-Encoding: gzip, deflate\r\nAccept-Language: en-GB,en;q=0.9\r\n{extra}\r\n").encode()
+
+def stream(wire: Wire, path: str, stop: threading.Event):
+    wire.send(request(path, "Accept: text/event-stream\r\nCache-Control: no-cache\r\n"))
+    while not stop.is_set():
+        try:
+            wire.recv()
+        except socket.timeout:
+            continue
+
+def poll(wire: Wire, paths, interval: float, stop: threading.Event):
+    while not stop.is_set():
+        for path in paths:
+            wire.send(request(path))
+            headers = wire.read_until(b"\r\n\r\n").decode()
+            length = int(headers.lower().split("content-length:")[1].split("\r\n")[0])
+            wire.read_exact(length)
+        stop.wait(interval)
+
+def ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    length = len(payload)
+    header = bytes([0x80 | opcode]) + (bytes([0x80 | length]) if length < 126 else
+                                       bytes([0x80 | 126]) + struct.pack(">H", length))
+    return header + mask + masked
+
+def websocket(wire: Wire, stop: threading.Event):
+    key = base64.b64encode(os.urandom(16)).decode()
+    wire.send(request("/api/ws", f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                                 "Sec-WebSocket-Version: 13\r\n"))
+    wire.read_until(b"\r\n\r\n")
+    for command in ({"op": "subscribe", "topic": "telemetry"}, {"op": "subscribe", "topic": "health"},
+                    {"op": "subscribe", "topic": "logs", "lines": 50}):
+        wire.send(ws_frame(json.dumps(command).encode()))
+    while not stop.is_set():
+        try:
+            first, second = wire.read_exact(2)
+        except socket.timeout:
+            continue
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", wire.read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", wire.read_exact(8))[0]
+        payload = wire.read_exact(length)
+        opcode = first & 0x0F
+        if opcode == 0x9:
+            wire.send(ws_frame(payload, 0xA)) # Pong
+
+def run_clients(scenario: str, port: int, phones: int, duration: float, results):
+    stop = threading.Event()
+    wires, threads = [], []
+
+    def start(target, *args):
+        wire = Wire(port)
+        wire.sock.settimeout(0.5)
+        wires.append(wire)
+        threads.append(threading.Thread(target=target, args=(wire, *args), daemon=True))
+
+    for _ in range(phones):
+        if scenario == "legacy":
+            start(stream, "/api/obd/stream", stop)
+            start(poll, ["/api/health"], 2.0, stop) # StatusCorner
+            start(poll, ["/api/health"], 2.0, stop) # SentinelView
+            start(poll, ["/api/logs/sources", "/api/logs/tail"], 2.0, stop)
+        elif scenario == "sse":
+            start(stream, "/api/obd/stream?delta=true", stop)
+            start(stream, "/api/health/stream", stop)
+            start(stream, "/api/health/stream", stop)
+            start(stream, "/api/logs/stream?lines=50", stop)
+        else:
+            start(websocket, stop)
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(2)
+    results.put({"down": sum(w.received for w in wires), "up": sum(w.sent for w in wires),
+                 "sockets": len(wires)})
+
+def measure(scenario: str, port: int, phones: int, duration: float):
+    # Spawned, not forked: the backend's threads must not be duplicated into the client.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    client = None
+    if scenario != "idle":
+        client = context.Process(target=run_clients, args=(scenario, port, phones, duration, results))
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    if client is not None:
+        client.start()
+        outcome = results.get(timeout=duration + 30)
+        client.join()
+    else:
+        time.sleep(duration)
+        outcome = {"down": 0, "up": 0, "sockets": 0}
+    wall = time.monotonic() - wall_start
+    outcome["cpu"] = (time.process_time() - cpu_start) / wall * 100
+    return outcome
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--hz", type=float, default=10.0, help="Simulated telemetry publish rate")
+    parser.add_argument("--phones", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8798)
+    args = parser.parse_args()
+
+    import uvicorn
+    from backend.app.main import app
+    from backend.app.services.camera import camera_rear, camera_front
+    from backend.app.services.obd import obd_service
+    from backend.app.services.simulation import simulation_service
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    for camera in (camera_rear, camera_front):
+        camera.stop()
+    obd_service.polling_interval = 1.0 / args.hz
+    simulation_service.toggle()
+    time.sleep(1.0)
+
+    print(f"{args.phones} phone(s) x {args.duration:.0f}s, telemetry at {args.hz:g} Hz")
+    print(f"  {'scenario':<8}{'sockets':>8}{'down KiB/s':>12}{'up KiB/s':>10}{'backend CPU':>13}")
+    baseline = None
+    for scenario in ("idle", "legacy", "sse", "ws"):
+        result = measure(scenario, args.port, args.phones, args.duration)
+        baseline = result["cpu"] if baseline is None else baseline
+        extra = f"  (+{result['cpu'] - baseline:.1f}%)" if scenario != "idle" else ""
+        print(f"  {scenario:<8}{result['sockets']:>8}{result['down'] / args.duration / 1024:>12.2f}"
+              f"{result['up'] / args.duration / 1024:>10.2f}{result['cpu']:>12.1f}%{extra}")
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
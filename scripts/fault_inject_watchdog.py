@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Fault-injection harness for the stall watchdog.
+
+Runs a camera service and an OBD service against fake devices that work
+normally until told to wedge: the fake capture blocks inside read() forever
+(like a hung USB camera) and the fake ELM327 blocks inside query() until its
+port is closed (like a dead Bluetooth link). For each trial it reports:
+  - detect:  wedge -> watchdog restart
+  - recover: wedge -> first fresh frame/sample from the replacement worker
+and checks detect against the bound deadline + watchdog interval.
+
+Deadlines come from the supervision config exactly as the backend computes them.
+
+Usage: uv run python scripts/fault_inject_watchdog.py [--trials 3] [--interval 0.5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+import obd  # noqa: E402
+from obd.protocols.protocol import Message  # noqa: E402
+
+from backend.app.config.settings import settings  # noqa: E402
+from backend.app.services import camera as camera_module  # noqa: E402
+from backend.app.services import obd_connection  # noqa: E402
+
+SLACK = 0.25 # Scheduling jitter allowed on top of the bound
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in delivering frames at a fixed rate."""
+    wedge_next_read = False
+    instances = []
+    opened = 0
+    released = 0
+
+    def __init__(self, target, fps: float = 30.0):
+        self.interval = 1.0 / fps
+        self.unblock = threading.Event()
+        FakeCapture.opened += 1
+        FakeCapture.instances.append(self)
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return prop != camera_module.cv2.CAP_PROP_CONVERT_RGB
+
+    def read(self, out=None):
+        if FakeCapture.wedge_next_read:
+            FakeCapture.wedge_next_read = False
+            self.unblock.wait() # Stuck in the driver
+        time.sleep(self.interval)
+        frame = out if out is not None else np.zeros((240, 320, 3), dtype=np.uint8)
+        return True, frame
+
+    def release(self):
+        FakeCapture.released += 1
+        self.unblock.set()
+
+class FakeOBD:
+    """obd.OBD stand-in; one PID per request, a query blocks while wedged until close()."""
+    wedge_next_query = False
+
+    def __init__(self, port, *args, **kwargs):
+        self.closed = threading.Event()
+
+    def is_connected(self):
+        return not self.closed.is_set()
+
+    def protocol_id(self):
+        return "3" # Not CAN: single-PID requests
+
+    def supports(self, cmd):
+        return True
+
+    def query(self, cmd, force=False):
+        if FakeOBD.wedge_next_query:
+            FakeOBD.wedge_next_query = False
+            self.closed.wait()
+        time.sleep(0.02)
+        if self.closed.is_set():
+            return obd.OBDResponse()
+        response = obd.OBDResponse(cmd, [Message([])])
+        response.value = 42.0
+        return response
+
+    def close(self):
+        self.closed.set()
+
+def wait_until(condition, timeout: float) -> float:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return time.monotonic()
+        time.sleep(0.005)
+    raise TimeoutError("condition not reached")
+
+def run_trials(name: str, service, wedge, last_output, deadline: float, interval: float, trials: int):
+    bound = deadline + interval + SLACK
+    results = []
+    for _ in range(trials):
+        wait_until(lambda: time.monotonic() - last_output() < 0.5, timeout=deadline * 4 + 10)
+        restarts = service.restarts
+        wedge()
+        wedged = time.monotonic()
+        restarted = wait_until(lambda: service.restarts > restarts, timeout=bound * 4)
+        recovered = wait_until(lambda: last_output() > restarted, timeout=deadline * 4 + 10)
+        results.append((restarted - wedged, recovered - wedged))
+
+    print(f"{name}: deadline {deadline:.2f}s, bound {bound:.2f}s (deadline + interval + {SLACK}s slack)")
+    for i, (detect, recover) in enumerate(results, 1):
+        verdict = "ok" if detect <= bound else "LATE"
+        print(f"  trial {i}: detect {detect:6.2f}s  recover {recover:6.2f}s  {verdict}")
+    return all(detect <= bound for detect, _ in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=settings.supervision.watchdog_interval)
+    args = parser.parse_args()
+
+    settings.trips.enabled = False
+    camera_module.cv2.VideoCapture = FakeCapture
+    obd_connection.obd.OBD = FakeOBD
+
+    from backend.app.services.obd import OBDService
+    from backend.app.services.watchdog import Watchdog
+
+    supervision = settings.supervision
+    framerate = 30
+    cam_deadline = max(supervision.camera_missed_frames / framerate, supervision.min_deadline_seconds)
+    obd_deadline = max(supervision.obd_missed_polls * settings.obd.polling_interval,
+                       supervision.min_deadline_seconds)
+
+    cam = camera_module.CameraService(
+        name="camera_rear", device_path="/dev/fake-video", device_index=None, resolution=(320, 240),
+        framerate=framerate, pixel_format="MJPG", simulation=False, allow_real=True,
+        idle_mode="off") # Nothing watches the stream here; keep full-rate capture to wedge
+    port = tempfile.NamedTemporaryFile(prefix="fake-rfcomm")
+    obd_service = OBDService()
+    obd_service.simulation_mode = False
+    obd_service.link.scanner.port = port.name
+
+    watchdog = Watchdog(interval=args.interval, hang_seconds=supervision.hang_seconds)
+    watchdog.watch(cam.name, cam.freshness, cam.restart, deadline=cam_deadline)
+    watchdog.watch("obd", obd_service.freshness, obd_service.restart, deadline=obd_deadline)
+
+    cam.start()
+    obd_service.start()
+    watchdog.start()
+    try:
+        def wedge_camera():
+            FakeCapture.wedge_next_read = True
+        def wedge_obd():
+            FakeOBD.wedge_next_query = True
+
+        ok = run_trials("camera (read() hangs)", cam, wedge_camera, lambda: cam._last_frame_mono,
+                        cam_deadline, args.interval, args.trials)
+        ok &= run_trials("obd (query hangs)", obd_service, wedge_obd, lambda: obd_service.last_sample,
+                         obd_deadline, args.interval, args.trials)
+    finally:
+        watchdog.stop()
+        cam.stop()
+        obd_service.stop()
+        for capture in FakeCapture.instances:
+            capture.unblock.set() # Let abandoned threads wake up and release their handles
+        time.sleep(0.2)
+
+    print(f"camera handles opened {FakeCapture.opened}, released {FakeCapture.released}")
+    print(f"watchdog: {watchdog.get_stats()}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
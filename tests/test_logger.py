@@ -0,0 +1,34 @@
+import os
+
+os.environ.setdefault("VANDASH_PROFILE", "maintenance")
+
+from backend.app.logging.logger import LoggingService  # noqa: E402
+
+
+def throttled_logger() -> LoggingService:
+    # No refill, a burst of 3 and no summaries during the test.
+    return LoggingService(rate_per_source=0.0, burst_per_source=3, summary_interval=60.0, console=False)
+
+
+def test_info_over_budget_is_suppressed():
+    service = throttled_logger()
+    for i in range(10):
+        service.log("camera_rear", "Frame late", level="INFO")
+    service.flush()
+    assert len(service.tail(source="camera_rear")) == 3
+    assert service.suppressed_total == 7
+    service.stop()
+
+
+def test_error_goes_through_while_source_is_throttled():
+    service = throttled_logger()
+    for i in range(10):
+        service.log("camera_rear", "Frame late", level="INFO")
+    service.log("camera_rear", "Capture crashed", level="ERROR", reason="USB reset")
+    service.log("camera_rear", "Device missing", level="CRITICAL")
+    service.flush()
+    kept = service.tail(source="camera_rear", lines=50)
+    assert [entry["level"] for entry in kept[-2:]] == ["ERROR", "CRITICAL"]
+    assert kept[-2]["message"].startswith("Capture crashed")
+    assert service.suppressed_total == 7
+    service.stop()